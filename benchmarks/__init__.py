@@ -0,0 +1,3 @@
+"""
+Package for benchmark scripts (run with python -m benchmarks.<name>)
+"""
@@ -0,0 +1,39 @@
+"""
+Compare per-row Evaluator.eval_node against one vectorised
+Evaluator.eval_batch pass over NumPy columns.
+
+Usage: python -m benchmarks.bench_batch [rows]
+"""
+import sys
+
+import numpy as np
+
+from benchmarks.common import timed, report
+from dask_core.evaluator import Evaluator
+from dask_core.expression import DaskExpression
+from dask_core.parser import ExpressionParser
+
+
+def main(rows: int = 20000):
+    tree = ExpressionParser().parse("((Alpha+(Beta*(Gamma/Sigma)))++(Alpha**2))")
+    rng = np.random.default_rng(0)
+    columns = {name: rng.uniform(1, 10, rows) for name in ['Alpha', 'Beta', 'Gamma', 'Sigma']}
+    evaluator = Evaluator()
+
+    contexts = [
+        {name: DaskExpression(name, repr(float(values[i]))) for name, values in columns.items()}
+        for i in range(rows)
+    ]
+
+    def per_row():
+        for context in contexts:
+            tree.evaluate(evaluator, context)
+
+    print(f'{rows} rows')
+    baseline = timed(per_row)
+    report('eval_node per row', baseline)
+    report('eval_batch', timed(lambda: tree.evaluate_batch(columns, evaluator)), baseline)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,34 @@
+"""
+Measure how many small expression files the headless CLI processes per
+minute in one run (python main.py eval ...).
+
+Usage: python -m benchmarks.bench_cli [files] [lines_per_file]
+"""
+import contextlib
+import io
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from benchmarks.common import synthetic_lines
+from ui.cli import main as cli_main
+
+
+def main(files: int = 2000, lines: int = 50):
+    block = ''.join(f'{name}={expr}\n' for name, expr in synthetic_lines(lines))
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(files):
+            path = Path(directory) / f'session_{i}.txt'
+            path.write_text(block, encoding='utf-8')
+            paths.append(str(path))
+        start = perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            status = cli_main(['eval', 'Va', *paths])
+        seconds = perf_counter() - start
+    print(f'{files} files x {lines} lines: {seconds:.2f} s, {files / seconds * 60:,.0f} files/minute (exit {status})')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
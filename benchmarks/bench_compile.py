@@ -0,0 +1,48 @@
+"""
+Compare Evaluator.eval_node against compiled closures (ParseTree.compile)
+on the sample sessions in data/, per tree and for whole evaluation passes.
+
+Usage: python -m benchmarks.bench_compile [repeat]
+"""
+import sys
+
+from benchmarks.common import load_sample_session, timed, report
+from dask_core.evaluator import Evaluator
+
+
+def main(repeat: int = 2000):
+    manager = load_sample_session()
+    context = manager.expressions
+    evaluator = Evaluator()
+    trees = [expr.parse_tree for expr in context.values()]
+
+    def walk():
+        for tree in trees:
+            tree.evaluate(evaluator, context)
+
+    def compiled():
+        for tree in trees:
+            tree.evaluate_compiled(context)
+
+    for tree in trees:
+        tree.compile(evaluator)
+
+    def work_stack_pass():
+        # evaluate_all before passes ran compiled closures
+        iterative = Evaluator(iterative=True)
+        cache = {}
+        for name in context:
+            iterative.eval_variable(name, context, cache=cache)
+
+    print(f'{len(trees)} expressions x {repeat} evaluations')
+    baseline = timed(walk, repeat)
+    report('eval_node', baseline)
+    report('compiled closures', timed(compiled, repeat), baseline)
+    manager.evaluate_all()
+    baseline = timed(work_stack_pass, repeat)
+    report('pass with the work stack', baseline)
+    report('evaluate_all (compiled pass)', timed(manager.evaluate_all, repeat), baseline)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,68 @@
+"""
+Evaluate derivatives, whose product and quotient rules repeat subtrees,
+with and without common subexpression elimination, and count the nodes
+CostAnalyser reports as removed.
+
+Usage: python -m benchmarks.bench_cse [expressions] [depth]
+"""
+import random
+import sys
+from unittest.mock import patch
+
+from benchmarks.common import timed, report
+from dask_core.evaluator import Evaluator
+from dask_core.expression import DaskExpression
+from dask_core.parser import ExpressionParser
+from features.cost_analysis import CostAnalyser
+from features.differentiation import differentiate
+
+LEAVES = ['X', 'X', 'Y', '2', '3']
+OPERATORS = ['+', '*', '*', '/', '-']
+
+
+def generate(depth: int, rng: random.Random) -> str:
+    if depth == 0:
+        return rng.choice(LEAVES)
+    return f'({generate(depth - 1, rng)}{rng.choice(OPERATORS)}{generate(depth - 1, rng)})'
+
+
+def derivatives(count: int, depth: int, context: dict) -> list:
+    rng = random.Random(2411)
+    parser = ExpressionParser(cache_size=0)
+    trees = []
+    while len(trees) < count:
+        try:
+            tree = differentiate(parser.parse(generate(depth, rng)).optimised_root, 'X')
+            if tree is not None:
+                tree.evaluate(context=context)
+        except ZeroDivisionError:
+            continue
+        if tree is not None and tree.optimised_root is not None:
+            trees.append(tree)
+    return trees
+
+
+def evaluate_all(trees: list, context: dict):
+    evaluator = Evaluator(iterative=True)
+    for tree in trees:
+        evaluator.eval_node(tree.optimised_root, context)
+
+
+def main(count: int = 2000, depth: int = 5):
+    context = {'X': DaskExpression('X', '(3+4)'), 'Y': DaskExpression('Y', '(1+2)')}
+
+    with patch('dask_core.parse_tree.share_common_subtrees', lambda root: root):
+        plain = derivatives(count, depth, context)
+    shared = derivatives(count, depth, context)
+    nodes = sum(CostAnalyser(tree).statistics['optimised_total_nodes'] for tree in shared)
+    removed = sum(CostAnalyser(tree).statistics['cse_removed_nodes'] for tree in shared)
+    print(f'{count} derivatives, {nodes} optimised nodes, {removed} removed by CSE ({removed / nodes:.1%})')
+
+    plain_seconds = timed(lambda: evaluate_all(plain, context))
+    seconds = timed(lambda: evaluate_all(shared, context))
+    report('evaluate, every subtree computed', plain_seconds)
+    report('evaluate, shared subtrees computed once', seconds, plain_seconds)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,33 @@
+"""
+Compare resolving an input file name with a recursive rglob on every
+lookup against the mtime-checked DirectoryIndex.
+
+Usage: python -m benchmarks.bench_file_lookup [directories] [files_per_directory]
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import timed, report
+from io_utils.file_handler import FileHandler
+
+
+def main(directories: int = 200, files: int = 50, repeat: int = 50):
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        for d in range(directories):
+            directory = root / 'data' / f'batch{d}'
+            directory.mkdir(parents=True)
+            for f in range(files):
+                (directory / f'session_{d}_{f}.txt').touch()
+        target = f'session_{directories - 1}_{files - 1}.txt'
+        handler = FileHandler(root)
+
+        print(f'{directories * files} files in {directories} directories, {repeat} lookups')
+        baseline = timed(lambda: sorted(root.rglob(target))[0], repeat)
+        report('rglob per lookup', baseline)
+        report('DirectoryIndex (incl. first build)', timed(lambda: handler.resolve(target), repeat), baseline)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
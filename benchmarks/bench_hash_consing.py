@@ -0,0 +1,60 @@
+"""
+Compare memory used by plain TreeNodes against hash-consed nodes from a
+NodeFactory on a synthetic session with repeated subexpressions.
+
+The parse cache is disabled for both runs so only the node representation
+differs.
+
+Usage: python -m benchmarks.bench_hash_consing [nodes]
+"""
+import sys
+import tracemalloc
+from time import perf_counter
+
+from benchmarks.common import variable_name
+from dask_core.node_factory import NodeFactory
+from dask_core.parser import ExpressionParser
+
+NODES_PER_EXPRESSION = 13
+
+
+def session_lines(nodes: int) -> list[str]:
+    """
+    Expressions of 13 nodes each that reuse a small pool of operands.
+    """
+    lines = []
+    for i in range(nodes // NODES_PER_EXPRESSION):
+        a = variable_name(i % 40)
+        b = variable_name(i % 70)
+        c = variable_name(i % 30)
+        lines.append(f"((({a}+{i % 9})*({b}-2))+(({c}*3)/{i % 5 + 1}))")
+    return lines
+
+
+def measure(lines: list[str], parser: ExpressionParser) -> tuple[list, int, float]:
+    tracemalloc.start()
+    start = perf_counter()
+    trees = [parser.parse(line) for line in lines]
+    elapsed = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return trees, peak, elapsed
+
+
+def main(nodes: int = 1_000_000):
+    lines = session_lines(nodes)
+    print(f'{len(lines)} expressions, {len(lines) * NODES_PER_EXPRESSION} nodes')
+
+    trees, plain_peak, plain_time = measure(lines, ExpressionParser(cache_size=0))
+    del trees
+    factory = NodeFactory()
+    trees, shared_peak, shared_time = measure(lines, ExpressionParser(cache_size=0, node_factory=factory))
+
+    print(f'{"plain TreeNode":<30} {plain_peak / 2**20:>10.1f} MiB {plain_time:>8.2f} s')
+    print(f'{"hash-consed (NodeFactory)":<30} {shared_peak / 2**20:>10.1f} MiB {shared_time:>8.2f} s')
+    print(f'distinct nodes: {len(factory)}   reuse hits: {factory.hits}')
+    print(f'memory ratio: x{plain_peak / shared_peak:.2f}')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,23 @@
+"""
+Measure what a bulk import costs now that trees are built, optimised and
+evaluated on first use, and what the first full pass then pays for them.
+
+Usage: python -m benchmarks.bench_lazy_import [expressions]
+"""
+import sys
+
+from benchmarks.common import synthetic_lines, timed, report
+from dask_core.expression_manager import ExpressionManager
+
+
+def main(count: int = 200_000):
+    lines = [f'{name}={expr}' for name, expr in synthetic_lines(count)]
+    manager = ExpressionManager()
+    print(f'{count:,} expressions')
+    report('load_stream', timed(lambda: manager.load_stream(lines)))
+    report('first evaluate_dirty (builds trees)', timed(manager.evaluate_dirty))
+    report('next evaluate_dirty', timed(manager.evaluate_dirty))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,33 @@
+"""
+Compare the original character-by-character tokenize with the master-regex
+iter_tokens scanner on a multi-megabyte expression file. tokenize returns
+bare strings, so it is also timed with the per-token classification later
+stages had to redo.
+
+Usage: python -m benchmarks.bench_lexer [megabytes]
+"""
+import sys
+
+from benchmarks.common import synthetic_lines, timed, report
+from dask_core.lexer import tokenize, iter_tokens
+from dask_core.tree_node import classify
+
+
+def main(megabytes: int = 4):
+    text = ''
+    count = 1000
+    while len(text) < megabytes * 1_000_000:
+        count *= 2
+        text = '\n'.join(f'{name}={expr}' for name, expr in synthetic_lines(count))
+    lines = text.splitlines()
+
+    print(f'{len(text) / 1_000_000:.1f} MB, {len(lines)} lines')
+    report('tokenize (strings only)', timed(lambda: [tokenize(line) for line in lines]))
+    baseline = timed(lambda: [[classify(token) for token in tokenize(line)] for line in lines])
+    report('tokenize + classify', baseline)
+    report('iter_tokens', timed(lambda: [list(iter_tokens(line)) for line in lines]), baseline)
+    report('iter_tokens (whole file)', timed(lambda: list(iter_tokens(text))), baseline)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,48 @@
+"""
+Measure ExpressionManager.evaluate_all scaling from 1 to N worker processes
+on a synthetic session of independent reference chains. Every tree is
+built once before timing. For each worker count the first pass also
+encodes the trees sent to the pool; the repeat pass reuses them.
+
+The pool only pays off when evaluating a tree costs more than the
+parent's per-variable bookkeeping (ordering, chunking, storing the value,
+a few microseconds). The synthetic trees have about five nodes, which the
+in-process compiled pass evaluates in under 4 us each, so here the pool
+is slower than workers=1 on any CPU count. On 100k expressions with one
+CPU, workers=2 went from 2.5 s to 0.8 s a pass against 0.4 s in process:
+the worker side fell from 1.85 s to 0.33 s by running the encodings
+directly instead of rebuilding trees, and the parent no longer collects
+garbage over the whole session mid-pass.
+
+Usage: python -m benchmarks.bench_parallel [expressions] [max_workers]
+"""
+import os
+import sys
+
+from benchmarks.common import synthetic_lines, timed, report
+from dask_core.expression_manager import ExpressionManager
+
+
+def main(count: int = 200000, max_workers: int = os.cpu_count() or 1):
+    manager = ExpressionManager()
+    for name, expr in synthetic_lines(count):
+        manager.add_expression(name, expr)
+    # Trees are built and optimised on first use; pay for that before timing
+    # so every worker count measures evaluation alone
+    manager.evaluate_all()
+
+    print(f'{count} expressions')
+    baseline = None
+    workers = 1
+    while workers <= max_workers:
+        manager.workers = workers
+        seconds = timed(manager.evaluate_all)
+        baseline = baseline or seconds
+        report(f'evaluate_all workers={workers}', seconds, baseline)
+        if workers > 1:
+            report(f'evaluate_all workers={workers}, repeat', timed(manager.evaluate_all), baseline)
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,47 @@
+"""
+Evaluate a session of reference chains before and after propagating
+constants across variables, and time the propagation pass itself and
+its incremental re-run after one edit.
+
+Usage: python -m benchmarks.bench_propagation [expressions] [chain]
+"""
+import sys
+
+from benchmarks.common import synthetic_lines, timed, report, variable_name
+from dask_core.expression_manager import ExpressionManager
+
+
+def session(count: int, chain: int) -> ExpressionManager:
+    manager = ExpressionManager()
+    manager.load_stream(f'{name}={expr}' for name, expr in synthetic_lines(count, chain))
+    manager.evaluate_all()
+    return manager
+
+
+def tails(count: int, chain: int) -> list[str]:
+    return [variable_name(i) for i in range(chain - 1, count, chain)]
+
+
+def main(count: int = 100_000, chain: int = 10):
+    manager = session(count, chain)
+    names = tails(count, chain)
+    print(f'{count:,} expressions in chains of {chain}')
+
+    def evaluate_tails():
+        for name in names:
+            manager.evaluate_variable(name)
+
+    plain_pass = timed(manager.evaluate_all)
+    plain_tails = timed(evaluate_tails)
+    report('propagate_constants', timed(manager.propagate_constants))
+    report('evaluate_all', plain_pass)
+    report('evaluate_all, propagated', timed(manager.evaluate_all), plain_pass)
+    report('evaluate chain tails', plain_tails)
+    report('evaluate chain tails, propagated', timed(evaluate_tails), plain_tails)
+
+    manager.add_expression(variable_name(0), '(1+1)')
+    report(f'propagate after one edit ({len(manager.dirty)} dirty)', timed(manager.propagate_constants))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,63 @@
+"""
+Compare evaluated node counts and weighted op cost (CostAnalyser) of the
+single-pass optimiser with the fixed-point optimiser that gathers the
+constants of '+' and '*' chains, on generated expressions.
+
+Usage: python -m benchmarks.bench_reassociation [expressions] [depth]
+"""
+import random
+import sys
+from unittest.mock import patch
+
+from benchmarks.common import timed, report
+from dask_core.parser import ExpressionParser
+from features.cost_analysis import CostAnalyser
+
+LEAVES = ['Alpha', 'Beta', 'Gamma', '1', '2', '3', '0.5']
+OPERATORS = ['+', '*', '+', '*', '-']
+
+
+def generate(depth: int, rng: random.Random) -> str:
+    if depth == 0 or rng.random() < 0.25:
+        return rng.choice(LEAVES)
+    return f'({generate(depth - 1, rng)}{rng.choice(OPERATORS)}{generate(depth - 1, rng)})'
+
+
+def workload(count: int, depth: int) -> list[str]:
+    rng = random.Random(1507)
+    expressions = []
+    while len(expressions) < count:
+        expr = generate(depth, rng)
+        if expr.startswith('('):
+            expressions.append(expr)
+    return expressions
+
+
+def totals(expressions: list[str]) -> tuple[int, int, int]:
+    parser = ExpressionParser(cache_size=0)
+    original = nodes = cost = 0
+    for expr in expressions:
+        statistics = CostAnalyser(parser.parse(expr)).statistics
+        original += statistics['original_total_nodes']
+        nodes += statistics['optimised_total_nodes']
+        cost += statistics['optimised_weighted_op_cost']
+    return original, nodes, cost
+
+
+def main(count: int = 5000, depth: int = 6):
+    expressions = workload(count, depth)
+    with patch('dask_core.parse_tree.apply_reassociation', lambda node, fold: None):
+        original, single_nodes, single_cost = totals(expressions)
+        single_seconds = timed(lambda: totals(expressions))
+    _, nodes, cost = totals(expressions)
+    seconds = timed(lambda: totals(expressions))
+    print(f'{count} expressions, {original} nodes before optimising')
+    print(f'single pass   {single_nodes:>8} nodes   op cost {single_cost:>8}')
+    print(f'fixed point   {nodes:>8} nodes   op cost {cost:>8}   '
+          f'({(single_nodes - nodes) / single_nodes:.1%} fewer nodes)')
+    report('parse + optimise + analyse, single pass', single_seconds)
+    report('parse + optimise + analyse, fixed point', seconds, single_seconds)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,88 @@
+"""
+Measure memory per TreeNode and per DaskExpression with tracemalloc,
+comparing the slotted, interning classes against dict-based equivalents
+laid out like the previous versions.
+
+Python 3.11, 200k objects each:
+    TreeNode        171.6 -> 80.1 bytes (53% less)
+    DaskExpression  112.1 -> 80.1 bytes (29% less)
+
+A DaskExpression holds one reference to its session (parser, context and
+propagated trees, see ExpressionSession) on top of the four attributes of
+the previous layout.
+
+Usage: python -m benchmarks.bench_slots [count]
+"""
+import sys
+import tracemalloc
+
+from benchmarks.common import variable_name
+from dask_core.expression import DaskExpression
+from dask_core.parser import ExpressionParser
+from dask_core.tree_node import TreeNode, VARIABLE
+
+
+class DictTreeNode:
+    # Previous TreeNode layout: attributes in a per-instance __dict__
+    def __init__(self, value=None, left=None, right=None, kind=None, number=None):
+        self.left = left
+        self.right = right
+        self._value = value
+        self.kind = kind
+        self.number = number
+
+
+class DictExpression:
+    # Previous DaskExpression layout
+    def __init__(self, var_name, expr, parse_tree=None):
+        self.name = var_name
+        self.expression = expr
+        self.parse_tree = parse_tree
+        self.value = None
+
+
+def fresh(text: str) -> str:
+    # A new string object with the same spelling, as the lexer produces per token
+    return ''.join(list(text))
+
+
+def bytes_per_item(build, count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = build(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return (after - before) / count
+
+
+def main(count: int = 200_000):
+    names = [variable_name(i % 50) for i in range(count)]
+    tree = ExpressionParser().parse("(Va+1)")
+
+    def nodes(cls):
+        return lambda n: [cls(fresh(names[i]), None, None, VARIABLE) for i in range(n)]
+
+    # Variable names are unique per expression, so they are made (and
+    # interned, as the leaves referring to them would) up front and only the
+    # objects themselves are measured
+    expression_names = [sys.intern(variable_name(i)) for i in range(count)]
+
+    def expressions(cls):
+        return lambda n: [cls(expression_names[i], "(Va+1)", tree) for i in range(n)]
+
+    rows = [
+        ('TreeNode, dict', bytes_per_item(nodes(DictTreeNode), count)),
+        ('TreeNode, __slots__ + intern', bytes_per_item(nodes(TreeNode), count)),
+        ('DaskExpression, dict', bytes_per_item(expressions(DictExpression), count)),
+        ('DaskExpression, __slots__ + intern', bytes_per_item(expressions(DaskExpression), count)),
+    ]
+    print(f'{count} objects each')
+    for label, size in rows:
+        print(f'{label:<40} {size:>8.1f} bytes/object')
+    print(f'node saving: {1 - rows[1][1] / rows[0][1]:.0%}   '
+          f'expression saving: {1 - rows[3][1] / rows[2][1]:.0%}')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,48 @@
+"""
+Compare reopening a saved session from a binary snapshot with importing the
+same session again from text.
+
+Usage: python -m benchmarks.bench_snapshot [expressions]
+"""
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from benchmarks.common import synthetic_lines
+from dask_core.expression_manager import ExpressionManager
+
+
+def main(count: int = 1_000_000):
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = Path(directory) / 'session.txt'
+        snapshot_path = Path(directory) / 'session.snap'
+        with text_path.open('w', encoding='utf-8') as file:
+            for name, expr in synthetic_lines(count):
+                file.write(f'{name}={expr}\n')
+
+        start = perf_counter()
+        manager = ExpressionManager()
+        with text_path.open(encoding='utf-8') as file:
+            manager.load_stream(file)
+        manager.evaluate_dirty()
+        text_seconds = perf_counter() - start
+
+        start = perf_counter()
+        manager.save_snapshot(snapshot_path)
+        save_seconds = perf_counter() - start
+        del manager
+
+        start = perf_counter()
+        reopened = ExpressionManager()
+        reopened.load_snapshot(snapshot_path)
+        load_seconds = perf_counter() - start
+
+        print(f'{count:,} expressions, snapshot {snapshot_path.stat().st_size / 2**20:.1f} MiB')
+        print(f'text import + evaluate  {text_seconds:>8.2f} s')
+        print(f'save_snapshot           {save_seconds:>8.2f} s')
+        print(f'load_snapshot           {load_seconds:>8.2f} s   ({text_seconds / load_seconds:.1f}x faster)')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
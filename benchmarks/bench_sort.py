@@ -0,0 +1,51 @@
+"""
+Compare the previous option 5 report (one scan of every expression per
+distinct value, built with string +=) with ExpressionManager.write_sorted.
+
+Usage: python -m benchmarks.bench_sort [expressions] [distinct_values]
+"""
+import sys
+from io import StringIO
+
+from benchmarks.common import timed, report, variable_name
+from dask_core.expression_manager import ExpressionManager
+
+
+def build(count: int, distinct: int) -> ExpressionManager:
+    manager = ExpressionManager()
+    for i in range(count):
+        manager.add_expression(variable_name(i), f'({i % distinct}+1)')
+    manager.evaluate_dirty()
+    return manager
+
+
+def legacy_report(manager: ExpressionManager) -> str:
+    values = sorted({expr.value for expr in manager.expressions.values() if expr.value is not None}, reverse=True)
+    values.append(None)
+    output = ''
+    for value in values:
+        output += f'*** Expressions with value=> {value}\n'
+        for expr in manager.expressions.values():
+            if expr.value == value:
+                output += f'{expr.name}={expr.expression}\n'
+        output += '\n'
+    return output
+
+
+def streamed_report(manager: ExpressionManager) -> str:
+    stream = StringIO()
+    manager.write_sorted(stream)
+    return stream.getvalue()
+
+
+def main(count: int = 20_000, distinct: int = 2_000):
+    manager = build(count, distinct)
+    assert legacy_report(manager) == streamed_report(manager)
+    print(f'{count} expressions, {distinct} distinct values')
+    baseline = timed(lambda: legacy_report(manager))
+    report('scan per value', baseline)
+    report('write_sorted', timed(lambda: streamed_report(manager)), baseline)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,72 @@
+"""
+Compare peak memory and throughput of reading a whole expression file
+(read_text, split, parse everything, then add) with the streaming
+ExpressionManager.load_stream.
+
+The file redefines a fixed set of variables over and over, so the session
+stays the same size and any growth in peak memory comes from the loader.
+
+Usage: python -m benchmarks.bench_stream_load [megabytes] [batch_size]
+"""
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+
+from benchmarks.common import synthetic_lines
+from dask_core.expression_manager import ExpressionManager
+
+DISTINCT = 2000
+
+
+def write_file(path: Path, megabytes: int) -> int:
+    block = ''.join(f'{name}={expr}\n' for name, expr in synthetic_lines(DISTINCT))
+    repeats = max(1, megabytes * 1_000_000 // len(block))
+    with path.open('w', encoding='utf-8') as file:
+        for _ in range(repeats):
+            file.write(block)
+    return repeats * DISTINCT
+
+
+def load_whole(path: Path) -> ExpressionManager:
+    # Previous Menu.read_from_file flow
+    manager = ExpressionManager()
+    parsed = {}
+    for line in path.read_text(encoding='utf-8').split('\n'):
+        _, valid, name, expr, tokens = manager.validate_and_tokenize(line)
+        if valid:
+            parsed[name] = (expr, manager.parser.parse(expr, tokens))
+    for name, (expr, tree) in parsed.items():
+        manager.add_expression(name, expr, tree)
+    return manager
+
+
+def load_streaming(path: Path, batch_size: int) -> ExpressionManager:
+    manager = ExpressionManager()
+    with path.open(encoding='utf-8') as file:
+        manager.load_stream(file, batch_size)
+    return manager
+
+
+def measure(label: str, load, lines: int):
+    tracemalloc.start()
+    start = perf_counter()
+    load()
+    elapsed = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<30} peak {peak / 2**20:>8.1f} MiB   {lines / elapsed:>10,.0f} lines/s')
+
+
+def main(megabytes: int = 20, batch_size: int = 1000):
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'session.txt'
+        lines = write_file(path, megabytes)
+        print(f'{path.stat().st_size / 1_000_000:.1f} MB, {lines} lines')
+        measure('read whole file', lambda: load_whole(path), lines)
+        measure(f'load_stream (batch {batch_size})', lambda: load_streaming(path, batch_size), lines)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
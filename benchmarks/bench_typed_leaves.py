@@ -0,0 +1,144 @@
+"""
+Compare the string-classifying leaf handling that evaluation and
+optimisation used before TreeNode recorded kinds against the typed-leaf
+path, on the same trees: the sample session plus one literal-heavy
+expression.
+
+The legacy arms reproduce the old code (isinstance checks and the number
+regex on every leaf visit, float() calls in the optimiser rules); both
+arms share the operator dispatch and the walk, so the difference is the
+leaf handling alone.
+
+Usage: python -m benchmarks.bench_typed_leaves [repeat]
+"""
+import sys
+
+from benchmarks.common import timed, report, load_sample_session
+from dask_core.evaluator import Evaluator
+from dask_core.tree_node import TreeNode, NUMBER_RE
+from features.optimiser import apply_identity_rules, apply_zero_rules
+
+EXPRESSION = "((((2+(4*5))/(3.5*1))+((Alpha*0)+(7.25**2)))-((10++4)//(3+0)))"
+
+
+class LegacyEvaluator(Evaluator):
+    """
+    eval_node as it was before leaves were typed: every leaf visit checks
+    the value's type and matches number strings with the regex.
+    """
+    def eval_node(self, node, context, visited=None, cache=None, shared=None):
+        if visited is None:
+            visited = set()
+        if node.is_leaf():
+            if isinstance(node.value, (int, float)):
+                return self._normalize_number(node.value)
+            if isinstance(node.value, str):
+                if NUMBER_RE.fullmatch(node.value):
+                    return self._normalize_number(float(node.value))
+                return self.eval_variable(node.value, context, visited, cache)
+            return None
+        return self._apply_operator(
+            node.value,
+            self.eval_node(node.left, context, visited, cache),
+            self.eval_node(node.right, context, visited, cache),
+        )
+
+
+def legacy_is_number(node) -> bool:
+    if isinstance(node.value, (int, float)):
+        return True
+    if isinstance(node.value, str):
+        try:
+            float(node.value)
+            return True
+        except ValueError:
+            return False
+    return False
+
+
+def legacy_identity_rules(node, left_is_num, right_is_num):
+    if node.value == '+':
+        if right_is_num and float(node.right.value) == 0:
+            return node.left
+        if left_is_num and float(node.left.value) == 0:
+            return node.right
+    if node.value == '*':
+        if left_is_num and float(node.left.value) == 1:
+            return node.right
+        if right_is_num and float(node.right.value) == 1:
+            return node.left
+    if node.value == '/':
+        if right_is_num and float(node.right.value) == 1:
+            return node.left
+    if node.value == '**':
+        if right_is_num and float(node.right.value) == 1:
+            return node.left
+        if right_is_num and float(node.right.value) == 0:
+            return TreeNode(1)
+    return None
+
+
+def legacy_zero_rules(node, left_is_num, right_is_num):
+    if node.value == '*':
+        if (left_is_num and float(node.left.value) == 0) or (right_is_num and float(node.right.value) == 0):
+            return TreeNode(0)
+    if node.value == '/':
+        if left_is_num and float(node.left.value) == 0:
+            if right_is_num and float(node.right.value) != 0:
+                return TreeNode(0)
+    return None
+
+
+def fold_pass(node, folder, typed: bool):
+    """
+    One post-order pass of constant folding and identity/zero rules, as
+    ParseTree.optimise did before leaves were typed, rebuilding the tree.
+    """
+    if node.is_leaf():
+        return node
+    node = TreeNode(node.value, fold_pass(node.left, folder, typed), fold_pass(node.right, folder, typed),
+                    node.kind, node.number)
+    left, right = node.left, node.right
+    if typed:
+        left_is_num = left.is_leaf() and left.is_number()
+        right_is_num = right.is_leaf() and right.is_number()
+        if left_is_num and right_is_num:
+            return TreeNode(folder._apply_operator(node.value, left.number, right.number))
+        identity, zero = apply_identity_rules, apply_zero_rules
+    else:
+        left_is_num = left.is_leaf() and legacy_is_number(left)
+        right_is_num = right.is_leaf() and legacy_is_number(right)
+        if left_is_num and right_is_num:
+            return TreeNode(folder._apply_operator(node.value, float(left.value), float(right.value)))
+        identity, zero = legacy_identity_rules, legacy_zero_rules
+    replacement = identity(node, left_is_num, right_is_num)
+    if replacement is None:
+        replacement = zero(node, left_is_num, right_is_num)
+    return node if replacement is None else replacement
+
+
+def main(repeat: int = 200):
+    manager = load_sample_session()
+    manager.add_expression('Bench', EXPRESSION)
+    roots = [expression.parse_tree.original_root for expression in manager.expressions.values()]
+    context = manager.expressions
+    legacy, typed = LegacyEvaluator(), Evaluator()
+    folder = Evaluator()
+
+    # Both arms must agree before they are timed
+    for root in roots:
+        assert legacy.eval_node(root, context) == typed.eval_node(root, context)
+        folded = [fold_pass(root, folder, flag) for flag in (False, True)]
+        assert typed.eval_node(folded[0], context) == typed.eval_node(folded[1], context)
+
+    print(f'{len(roots)} trees x {repeat}')
+    baseline = timed(lambda: [legacy.eval_node(root, context) for root in roots], repeat)
+    report('eval_node, string checks per leaf', baseline)
+    report('eval_node, typed leaves', timed(lambda: [typed.eval_node(root, context) for root in roots], repeat), baseline)
+    baseline = timed(lambda: [fold_pass(root, folder, False) for root in roots], repeat)
+    report('fold pass, string checks per leaf', baseline)
+    report('fold pass, typed leaves', timed(lambda: [fold_pass(root, folder, True) for root in roots], repeat), baseline)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
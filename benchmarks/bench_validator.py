@@ -0,0 +1,98 @@
+"""
+Compare the multi-pass validator followed by a second scan in the parser
+with the single-pass validator whose tokens go straight to the parser.
+
+Usage: python -m benchmarks.bench_validator [lines]
+"""
+import re
+import sys
+
+from benchmarks.common import synthetic_lines, timed, report
+from dask_core.operators import OPERATORS
+from dask_core.parser import ExpressionParser
+from dask_core.validator import validate_line
+
+
+def legacy_validate(expression: str) -> tuple:
+    # The multi-pass validator this module replaced
+    valid_operators = set(OPERATORS)
+    operator_chars = ''.join(sorted(set(''.join(valid_operators))))
+    allowed_chars = set('0123456789()=.' + operator_chars)
+    operator_class = re.escape(operator_chars + '^')
+    expression = expression.strip()
+    if '=' not in expression:
+        return "*Missing '=' sign in expression. Please re enter the expression*", False, '', ''
+
+    if expression.count('=') > 1:
+        return "*Multiple '=' signs in expression. Please re enter the expression*", False, '', ''
+
+    if expression.count('(') != expression.count(')'):
+        return "*Mismatched parentheses in expression. Please re enter the expression*", False, '', ''
+
+    if re.search(r'\(\s*\)', expression):
+        return "*Empty parentheses in expression. Please re enter the expression*", False, '', ''
+
+    for char in expression:
+        if char not in valid_operators and char not in allowed_chars and not char.isalpha():
+            return f"*Invalid character '{char}' in expression. Please re enter the expression*", False, '', ''
+
+
+    name, expr = expression.split('=', 1)
+    name = name.strip()
+    expr = expr.strip()
+
+    if not re.match(r'^[a-zA-Z_]+$', name):
+        return "*Invalid variable name. Please re enter the expression*", False, '', ''
+
+    if re.search(rf'[{operator_class}][\s\)]*$', expr):
+        return "*Expression cannot end with an operator. Please re enter the expression*", False, '', ''
+
+    if re.search(rf'^[{operator_class}]\s*', expr):
+        return "*Expression cannot start with an operator. Please re enter the expression*", False, '', ''
+
+    if re.search(r'(^|[=(*/+])\s*-\s*[\d\.]', expr):
+        return "*Negative numbers are not allowed. Please re enter the expression*", False, '', ''
+
+    for number in re.findall(r'[\d\.]+', expr):
+        if not re.fullmatch(r'(\d+(\.\d*)?|\.\d+)', number):
+            return "*Invalid number format. Please re enter the expression*", False, '', ''
+
+    if expr == '':
+        return "*Expression cannot be empty. Please re enter the expression*", False, '', ''
+
+    if not any(op in expr for op in valid_operators):
+        return "*Enter a valid expression with an operator*", False, '', ''
+
+    if '(' not in expr or ')' not in expr:
+        return "*Empty parentheses in expression. Please re enter the expression*", False, '', ''   
+
+    return '', True, name, expr
+
+
+def main(count: int = 50_000):
+    lines = [f'{name}={expr}' for name, expr in synthetic_lines(count)]
+    parser = ExpressionParser(cache_size=0)
+
+    def legacy_ingest():
+        for line in lines:
+            _, valid, _, expr = legacy_validate(line)
+            if valid:
+                parser.parse(expr)
+
+    def single_pass_ingest():
+        for line in lines:
+            _, valid, _, expr, tokens = validate_line(line)
+            if valid:
+                parser.parse(expr, tokens)
+
+    print(f'{len(lines)} lines')
+    baseline = timed(lambda: [legacy_validate(line) for line in lines])
+    report('multi-pass validate', baseline)
+    report('single-pass validate', timed(lambda: [validate_line(line) for line in lines]), baseline)
+    baseline = timed(legacy_ingest)
+    report('validate + parse (two scans)', baseline)
+    report('validate + parse (one scan)', timed(single_pass_ingest), baseline)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,84 @@
+"""
+Shared helpers for benchmark scripts
+"""
+import sys
+from pathlib import Path
+from time import perf_counter
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = PROJECT_ROOT / 'data'
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from dask_core.expression_manager import ExpressionManager
+
+
+def sample_lines() -> list[str]:
+    """
+    Return every valid DASK expression line found in the sample files in data/.
+    """
+    manager = ExpressionManager()
+    lines = []
+    for path in sorted(DATA_DIR.glob('*.txt')):
+        for line in path.read_text(encoding='utf-8').splitlines():
+            _, valid, _, _ = manager.validate_expression(line)
+            if valid:
+                lines.append(line.strip())
+    return lines
+
+
+def load_sample_session() -> ExpressionManager:
+    """
+    Build an ExpressionManager from the sample files in data/.
+    """
+    manager = ExpressionManager()
+    for line in sample_lines():
+        _, _, name, expr, tokens = manager.validate_and_tokenize(line)
+        try:
+            manager.add_expression(name, expr, manager.parser.parse(expr, tokens))
+        except (ZeroDivisionError, IndexError):
+            continue
+    return manager
+
+
+def timed(fn, repeat: int = 1) -> float:
+    """
+    Run fn repeat times and return the total elapsed seconds.
+    """
+    start = perf_counter()
+    for _ in range(repeat):
+        fn()
+    return perf_counter() - start
+
+
+def report(label: str, seconds: float, baseline: float | None = None):
+    line = f'{label:<40} {seconds * 1000:>10.2f} ms'
+    if baseline:
+        line += f'   x{baseline / seconds:.2f}'
+    print(line)
+
+
+def variable_name(i: int) -> str:
+    """
+    Spell i as a letters-only DASK variable name (Va, Vb, ..., Vba, ...).
+    """
+    letters = ''
+    while True:
+        i, digit = divmod(i, 26)
+        letters += chr(ord('a') + digit)
+        if i == 0:
+            return 'V' + letters
+
+
+def synthetic_lines(count: int, chain: int = 10) -> list[tuple[str, str]]:
+    """
+    Generate count (name, expression) pairs made of independent reference
+    chains of the given length.
+    """
+    lines = []
+    for i in range(count):
+        name = variable_name(i)
+        if i % chain == 0:
+            lines.append((name, f'(({i % 97}+2)*3)'))
+        else:
+            lines.append((name, f'(({variable_name(i - 1)}*2)+{i % 13})'))
+    return lines
@@ -0,0 +1,452 @@
+"""
+Array-backed parse tree (no TreeNode objects)
+
+A tree is stored as parallel arrays in post-order, so children always come
+before their parent and the root is the last entry:
+    codes:   operator index in the registry, or a negative leaf kind
+    numbers: literal value of NUMBER leaves
+    symbols: id in the parser's SymbolTable (variable names, number
+             spellings), -1 for operators and folded constants
+    left, right: child indices, -1 for leaves
+
+Every tree a parser builds lives in one shared NodeArrays, the arena, as
+a range of entries whose child indices point into the arena. Five arrays
+per tree would cost more in array headers than the nodes themselves. The
+entries of a tree that is dropped are not reclaimed.
+"""
+from array import array
+
+from dask_core.tree_node import TreeNode, NUMBER, OPERATOR, normalize_number
+from dask_core.operators import OPERATORS
+from dask_core.evaluator import Evaluator
+from features.optimiser import apply_identity_rules, apply_zero_rules, ASSOCIATIVE_OPERATORS, collect_chain, fold_constants
+
+# Leaf kinds; operator codes are their (non-negative) index in OPERATORS
+NUMBER_CODE = -1
+VARIABLE_CODE = -2
+UNKNOWN_CODE = -3
+INVALID_CODE = -4
+
+# Evaluator used for constant folding
+_folder = Evaluator()
+
+
+def _fits_double(value) -> bool:
+    try:
+        return isinstance(value, float) or float(value) == value
+    except OverflowError:
+        return False
+
+
+class NodeArrays:
+    """
+    Trees as parallel arrays (see module docstring): one tree indexed from
+    0, or the arena shared by the trees of a parser.
+    """
+    __slots__ = ('codes', 'numbers', 'symbols', 'left', 'right')
+
+    def __init__(self):
+        self.codes = array('b')
+        self.numbers = array('d')
+        self.symbols = array('i')
+        self.left = array('i')
+        self.right = array('i')
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def root(self) -> int:
+        return len(self.codes) - 1
+
+    def append(self, code: int, number: float = 0.0, symbol: int = -1, left: int = -1, right: int = -1) -> int:
+        self.codes.append(code)
+        self.numbers.append(number)
+        self.symbols.append(symbol)
+        self.left.append(left)
+        self.right.append(right)
+        return len(self.codes) - 1
+
+    def copy_node(self, source: 'NodeArrays', i: int, left: int = -1, right: int = -1) -> int:
+        return self.append(source.codes[i], source.numbers[i], source.symbols[i], left, right)
+
+    def extend(self, source: 'NodeArrays') -> int:
+        """
+        Append a tree indexed from 0, moving its child indices to where it
+        now starts. Returns that start.
+        """
+        start = len(self.codes)
+        self.codes.extend(source.codes)
+        self.numbers.extend(source.numbers)
+        self.symbols.extend(source.symbols)
+        for children, moved in ((source.left, self.left), (source.right, self.right)):
+            moved.extend(array('i', [-1 if child < 0 else child + start for child in children]))
+        return start
+
+    def section(self, start: int, end: int) -> 'NodeArrays':
+        """
+        Copy the tree stored in [start, end), with child indices from 0.
+        """
+        result = NodeArrays()
+        result.codes = self.codes[start:end]
+        result.numbers = self.numbers[start:end]
+        result.symbols = self.symbols[start:end]
+        result.left = array('i', [-1 if child < 0 else child - start for child in self.left[start:end]])
+        result.right = array('i', [-1 if child < 0 else child - start for child in self.right[start:end]])
+        return result
+
+    def truncate(self, end: int):
+        for column in (self.codes, self.numbers, self.symbols, self.left, self.right):
+            del column[end:]
+
+    def reachable(self, root: int) -> 'NodeArrays':
+        """
+        Return the subtree under root, dropping entries nothing points to.
+        Relative order is kept, so the result is still in post-order.
+        """
+        keep = bytearray(root + 1)
+        if root >= 0:
+            keep[root] = 1
+        for i in range(root, -1, -1):
+            if keep[i] and self.codes[i] >= 0:
+                keep[self.left[i]] = 1
+                keep[self.right[i]] = 1
+
+        result = NodeArrays()
+        index = array('i', [-1]) * (root + 1)
+        for i in range(root + 1):
+            if keep[i]:
+                left = index[self.left[i]] if self.codes[i] >= 0 else -1
+                right = index[self.right[i]] if self.codes[i] >= 0 else -1
+                index[i] = result.copy_node(self, i, left, right)
+        return result
+
+
+class _Operand:
+    # Minimal stand-in for TreeNode so the optimiser rules can be reused
+    __slots__ = ('value', 'left', 'right', 'number')
+
+    def __init__(self, value=None, left=None, right=None, number=None):
+        self.value = value
+        self.left = left
+        self.right = right
+        self.number = number
+
+
+class SymbolTable:
+    """
+    Variable names and number spellings, stored once and referred to by id.
+    One table is shared by every tree a parser builds.
+    """
+    __slots__ = ('names', '_ids')
+
+    def __init__(self):
+        self.names: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, symbol: int) -> str:
+        return self.names[symbol]
+
+    def get(self, text: str) -> int | None:
+        return self._ids.get(text)
+
+    def add(self, text: str) -> int:
+        symbol = self._ids.get(text)
+        if symbol is None:
+            symbol = len(self.names)
+            self.names.append(text)
+            self._ids[text] = symbol
+        return symbol
+
+
+class CompactParseTree:
+    """
+    ParseTree backend that keeps both the original and the optimised tree
+    as ranges of an arena (see module docstring). Build one with
+    ExpressionParser(compact=True). When optimisation changes nothing, both
+    ranges are the same entries.
+    """
+    __slots__ = ('symbols', 'arena', 'start', 'original_end', 'optimised_start', 'optimised_end')
+
+    def __init__(self, symbols: SymbolTable = None, arena: NodeArrays = None):
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.arena = arena if arena is not None else NodeArrays()
+        # The original tree is built at the end of the arena, then closed by finish()
+        self.start = self.original_end = len(self.arena)
+        self.optimised_start = self.optimised_end = None
+
+    # Building (used by ExpressionParser)
+
+    def add_number(self, text: str, number: float) -> int:
+        return self.arena.append(NUMBER_CODE, number, self.symbols.add(text))
+
+    def add_leaf(self, text: str, code: int = VARIABLE_CODE) -> int:
+        return self.arena.append(code, 0.0, self.symbols.add(text))
+
+    def add_operator(self, symbol: str, left: int, right: int) -> int:
+        return self.arena.append(list(OPERATORS).index(symbol), 0.0, -1, left, right)
+
+    def finish(self, root: int):
+        """
+        End the original tree at root, the index returned when it was added.
+        Entries added since the start that root does not reach (unreduced
+        leftovers) are dropped.
+        """
+        arena = self.arena
+        if root != len(arena) - 1:
+            kept = arena.section(self.start, len(arena)).reachable(root - self.start)
+            arena.truncate(self.start)
+            arena.extend(kept)
+        self.original_end = len(arena)
+
+    @property
+    def original(self) -> NodeArrays:
+        """
+        Copy of the original tree, indexed from 0.
+        """
+        return self._arrays("original")
+
+    @property
+    def optimised(self) -> NodeArrays:
+        """
+        Copy of the optimised tree, indexed from 0.
+        """
+        return self._arrays("optimised")
+
+    def _arrays(self, root: str) -> NodeArrays:
+        start, end = self._range(root)
+        return self.arena.section(start, end)
+
+    def _range(self, root: str) -> tuple[int, int]:
+        if root not in ["original", "optimised"]:
+            raise ValueError("root must be original or optimised")
+        if root == "original":
+            return self.start, self.original_end
+        if self.optimised_start is None:
+            self.optimise()
+        return self.optimised_start, self.optimised_end
+
+    # Optimisation
+
+    def optimise(self) -> NodeArrays:
+        """
+        Constant folding plus the identity and zero rules, in one pass over
+        the post-order arrays. Entries orphaned by a rule are dropped at the end.
+        """
+        original = source = self.original
+        while True:
+            result, root = self._optimise_pass(source)
+            if result.codes == source.codes:
+                # Nothing was folded or replaced
+                break
+            source = result.reachable(root)
+        if source is original:
+            self.optimised_start, self.optimised_end = self.start, self.original_end
+        else:
+            self.optimised_start = self.arena.extend(source)
+            self.optimised_end = len(self.arena)
+        return source
+
+    def _optimise_pass(self, source: NodeArrays) -> tuple[NodeArrays, int]:
+        result = NodeArrays()
+        operators = list(OPERATORS)
+        index = array('i')
+        for i, code in enumerate(source.codes):
+            if code < 0:
+                index.append(result.copy_node(source, i))
+                continue
+            left, right = index[source.left[i]], index[source.right[i]]
+            index.append(self._optimise_operator(result, operators[code], code, left, right))
+        return result, index[-1] if index else -1
+
+    def _optimise_operator(self, result: NodeArrays, symbol: str, code: int, left: int, right: int) -> int:
+        left_is_num = result.codes[left] == NUMBER_CODE
+        right_is_num = result.codes[right] == NUMBER_CODE
+        left_num = normalize_number(result.numbers[left]) if left_is_num else None
+        right_num = normalize_number(result.numbers[right]) if right_is_num else None
+
+        # Constant folding (only when both are numbers)
+        if left_is_num and right_is_num:
+            value = _folder._apply_operator(symbol, left_num, right_num)
+            if not isinstance(value, (int, float)):
+                # Not a real number (e.g. complex): evaluates to None, as a folded TreeNode does
+                return result.append(INVALID_CODE, 0.0, self.symbols.add(str(value)))
+            if _fits_double(value):
+                return result.append(NUMBER_CODE, value)
+            # Integers too large for a double stay unfolded and are computed exactly
+            return result.append(code, 0.0, -1, left, right)
+
+        if symbol in ASSOCIATIVE_OPERATORS:
+            reassociated = self._reassociate(result, symbol, code, left, right)
+            if reassociated is not None:
+                return reassociated
+
+        if left_is_num or right_is_num:
+            node = _Operand(symbol, _Operand(number=left_num), _Operand(number=right_num))
+            replacement = apply_identity_rules(node, left_is_num, right_is_num)
+            if replacement is None:
+                replacement = apply_zero_rules(node, left_is_num, right_is_num)
+            if replacement is node.left:
+                return left
+            if replacement is node.right:
+                return right
+            if replacement is not None:
+                return result.append(NUMBER_CODE, replacement.number)
+        return result.append(code, 0.0, -1, left, right)
+
+    def _reassociate(self, result: NodeArrays, symbol: str, code: int, left: int, right: int) -> int | None:
+        # Same as features.optimiser.apply_reassociation, over the arrays
+        codes = result.codes
+
+        def chain_of(i: int):
+            return (result.left[i], result.right[i]) if codes[i] == code else None
+
+        operands = collect_chain(left, right, chain_of)
+        numbers = [normalize_number(result.numbers[i]) for i in operands if codes[i] == NUMBER_CODE]
+        if len(numbers) < 2:
+            return None
+        value = fold_constants(symbol, numbers, _folder._apply_operator)
+        if not _fits_double(value):
+            return None
+        constant = result.append(NUMBER_CODE, value)
+        others = [i for i in operands if codes[i] != NUMBER_CODE]
+        if not others:
+            return constant
+        node = others[0]
+        for i in others[1:]:
+            node = result.append(code, 0.0, -1, node, i)
+        # One constant left, so this only applies the identity and zero rules
+        return self._optimise_operator(result, symbol, code, node, constant)
+
+    # Evaluation
+
+    def evaluate(self, evaluator: Evaluator = None, context: dict = None, visited: set | None = None, cache: dict | None = None):
+        """
+        Evaluate the optimised arrays with the same results as
+        ParseTree.evaluate. Variables defined by other compact trees are
+        evaluated over their arrays too; anything else goes through evaluator.
+        """
+        if evaluator is None:
+            evaluator = Evaluator()
+        if visited is None:
+            visited = set()
+        start, end = self._range("optimised")
+        if start == end:
+            return None
+
+        arena = self.arena
+        left, right, numbers = arena.left, arena.right, arena.numbers
+        apply = evaluator._apply_operator
+        operators = list(OPERATORS)
+        symbols = self.symbols
+        # values[i - start] is the value of arena entry i
+        values = []
+        push = values.append
+        for i, code in enumerate(arena.codes[start:end], start):
+            if code >= 0:
+                push(apply(operators[code], values[left[i] - start], values[right[i] - start]))
+            elif code == NUMBER_CODE:
+                push(normalize_number(numbers[i]))
+            elif code != INVALID_CODE:
+                push(self._load(symbols[arena.symbols[i]], evaluator, context, visited, cache))
+            else:
+                push(None)
+        return values[-1]
+
+    def _load(self, name: str, evaluator: Evaluator, context: dict, visited: set, cache: dict | None):
+        # Same cache and cycle semantics as Evaluator.eval_variable
+        if cache is not None and name in cache:
+            evaluator.cache_hits += 1
+            return cache[name]
+        if context is None or name not in context or name in visited:
+            return None
+        parse_tree = context[name].parse_tree
+        if parse_tree is None:
+            return None
+        if not isinstance(parse_tree, CompactParseTree):
+            return evaluator.eval_variable(name, context, visited, cache)
+        visited.add(name)
+        result = parse_tree.evaluate(evaluator, context, visited, cache)
+        visited.discard(name)
+        if cache is not None:
+            evaluator.cache_misses += 1
+            cache[name] = result
+        return result
+
+    def compile(self, evaluator: Evaluator = None):
+        """
+        Match ParseTree.compile: function(context, visited, cache=None) -> value.
+        """
+        return lambda context, visited, cache=None: self.evaluate(evaluator, context, visited, cache)
+
+    # Queries
+
+    def to_expression(self, root: str = "original") -> str:
+        """
+        Convert the arrays back into the infix string format (see ParseTree.to_expression).
+        """
+        arrays = self._arrays(root)
+        operators = list(OPERATORS)
+        strings = []
+        for i, code in enumerate(arrays.codes):
+            if code >= 0:
+                strings.append(f"({strings[arrays.left[i]]}{operators[code]}{strings[arrays.right[i]]})")
+            elif arrays.symbols[i] >= 0:
+                strings.append(self.symbols[arrays.symbols[i]])
+            else:
+                strings.append(str(normalize_number(arrays.numbers[i])))
+        return strings[-1] if strings else ""
+
+    def count_x_variable(self, x) -> int:
+        symbol = self.symbols.get(x)
+        if symbol is None:
+            return 0
+        start, end = self._range("optimised")
+        arena = self.arena
+        return sum(
+            1 for code, sym in zip(arena.codes[start:end], arena.symbols[start:end])
+            if code == VARIABLE_CODE and sym == symbol
+        )
+
+    def variables(self) -> set[str]:
+        start, end = self._range("optimised")
+        arena = self.arena
+        return {
+            self.symbols[sym]
+            for code, sym in zip(arena.codes[start:end], arena.symbols[start:end])
+            if code == VARIABLE_CODE
+        }
+
+    # TreeNode views, for code that walks nodes (built on every access)
+
+    def to_nodes(self, root: str = "original") -> TreeNode | None:
+        arrays = self._arrays(root)
+        operators = list(OPERATORS)
+        nodes = []
+        for i, code in enumerate(arrays.codes):
+            symbol = arrays.symbols[i]
+            text = self.symbols[symbol] if symbol >= 0 else None
+            if code >= 0:
+                nodes.append(TreeNode(operators[code], nodes[arrays.left[i]], nodes[arrays.right[i]], OPERATOR))
+            elif code == NUMBER_CODE:
+                number = normalize_number(arrays.numbers[i])
+                nodes.append(TreeNode(text, kind=NUMBER, number=number) if text is not None else TreeNode(number))
+            elif code == INVALID_CODE:
+                nodes.append(TreeNode(complex(text)))
+            else:
+                nodes.append(TreeNode(text))
+        return nodes[-1] if nodes else None
+
+    @property
+    def original_root(self) -> TreeNode | None:
+        return self.to_nodes("original")
+
+    @property
+    def optimised_root(self) -> TreeNode | None:
+        return self.to_nodes("optimised")
+
+    def evaluation_root(self) -> TreeNode | None:
+        return self.optimised_root
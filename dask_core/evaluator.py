@@ -1,41 +1,44 @@
 """
 Handles evaluating trees, special ops (++ , //, **)
 """
-import re
-from dask_core.tree_node import TreeNode
+from dask_core.tree_node import TreeNode, SharedNode, NUMBER, normalize_number
+from dask_core.operators import OPERATORS, sum_to
+
+try:
+    import numpy as np
+except ImportError: # NumPy is only needed for batch evaluation
+    np = None
+
+# Work stack actions for the iterative evaluator
+_VISIT, _APPLY, _LEAVE, _SHARE = 0, 1, 2, 3
+
 class Evaluator:
-    def __init__(self):
-        pass
+    def __init__(self, iterative: bool = False):
+        """
+        :param iterative: evaluate with an explicit work stack instead of
+            recursion, so long chains of variable references cannot hit
+            Python's recursion limit
+        """
+        self.iterative = iterative
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def _normalize_number(self, value):
-        if isinstance(value, float) and value.is_integer():
-            return int(value)
-        return value
+        return normalize_number(value)
 
     def _sum_to(self, n: float) -> float:
-        return n * (n + 1) / 2
+        return sum_to(n)
     
     def _apply_operator(self, op, left_val, right_val):
         if left_val is None or right_val is None:
             return None
-        left_val = self._normalize_number(left_val)
-        right_val = self._normalize_number(right_val)
-        if op == '+':
-            return self._normalize_number(left_val + right_val)
-        if op == '-':
-            return self._normalize_number(left_val - right_val)
-        if op == '*':
-            return self._normalize_number(left_val * right_val)
-        if op == '/':
-            return self._normalize_number(left_val / right_val)
-        if op == '++':
-            return self._normalize_number(self._sum_to(left_val) + self._sum_to(right_val))
-        if op == '//':
-            return self._normalize_number(self._sum_to(left_val) / self._sum_to(right_val))
-        if op == '**':
-            return self._normalize_number(left_val**right_val)
+        operator = OPERATORS.get(op)
+        if operator is None:
+            return None
+        return normalize_number(operator.function(normalize_number(left_val), normalize_number(right_val)))
     
-    def eval_node(self, node: TreeNode, context: dict, visited: set | None = None) -> float | None:
+    def eval_node(self, node: TreeNode, context: dict, visited: set | None = None, cache: dict | None = None,
+                  shared: dict | None = None) -> float | None:
         """
         Docstring for eval_node
         
@@ -44,40 +47,284 @@ class Evaluator:
         :type node: TreeNode
         :param context: dict[var_name, expression]
         :type context: dict
+        :param cache: dict[var_name, value] shared across one evaluation pass
+        :type cache: dict | None
+        :param shared: dict[id(SharedNode), value] for this evaluation, so
+            each shared subtree is computed once
+        :type shared: dict | None
         :return: Description
         :rtype: float | None
         """
-        number_re = re.compile(r'(\d+(\.\d*)?|\.\d+)$')
         if visited is None:
             visited = set()
+        if self.iterative:
+            return self._eval_iterative(node, context, visited, cache)
         if node.is_leaf():
-            if isinstance(node.value, (int, float)):
-                return self._normalize_number(node.value)
+            if node.kind == NUMBER:
+                return node.number
             if isinstance(node.value, str):
-                if number_re.fullmatch(node.value):
-                    return self._normalize_number(float(node.value))
-                if context is None:
-                    return None
-                if node.value not in context:
-                    return None
-                if node.value in visited:
-                    return None
-                visited.add(node.value)
-                expression = context[node.value]
-                if expression.parse_tree is None:
-                    return None
-                parse_tree = expression.parse_tree
-                root = parse_tree.optimised_root if parse_tree.optimised_root is not None else parse_tree.original_root
-                if root is None:
-                    return None
-                result = self.eval_node(root, context, visited)
-                visited.discard(node.value)
-                return result
+                return self.eval_variable(node.value, context, visited, cache, shared)
             return None
 
-        return self._apply_operator(
+        if shared is None:
+            shared = {}
+        is_shared = type(node) is SharedNode
+        if is_shared and id(node) in shared:
+            return shared[id(node)]
+        result = self._apply_operator(
             node.value,
-            self.eval_node(node.left, context, visited),
-            self.eval_node(node.right, context, visited),
+            self.eval_node(node.left, context, visited, cache, shared),
+            self.eval_node(node.right, context, visited, cache, shared),
         )
+        if is_shared:
+            shared[id(node)] = result
+        return result
+
+    def eval_variable(self, name: str, context: dict, visited: set | None = None, cache: dict | None = None,
+                      shared: dict | None = None) -> float | None:
+        """
+        Evaluate the expression stored under name in context.
+
+        When a cache is given, each variable is computed at most once and later
+        lookups are counted as hits. Values cut short by the visited set are
+        safe to cache: they only occur for variables on a cycle, which
+        evaluate to None anyway.
+        """
+        if cache is not None and name in cache:
+            self.cache_hits += 1
+            return cache[name]
+        if visited is None:
+            visited = set()
+        if self.iterative:
+            return self._eval_iterative(TreeNode(name), context, visited, cache)
+        if context is None:
+            return None
+        if name not in context:
+            return None
+        if name in visited:
+            return None
+        visited.add(name)
+        expression = context[name]
+        if expression.parse_tree is None:
+            return None
+        root = expression.runtime_root()
+        if root is None:
+            return None
+        result = self.eval_node(root, context, visited, cache, shared)
+        visited.discard(name)
+        if cache is not None:
+            self.cache_misses += 1
+            cache[name] = result
+        return result
+
+    def _eval_iterative(self, node: TreeNode, context: dict, visited: set, cache: dict | None) -> float | None:
+        """
+        Evaluate node like eval_node, but walk the tree and every referenced
+        variable's tree with an explicit work stack. A variable stays in
+        visited from the moment its tree is entered until its value is known.
+        """
+        apply = self._apply_operator
+        work = [(_VISIT, node)]
+        values = []
+        shared = {}
+        while work:
+            action, item = work.pop()
+            if action == _APPLY:
+                right_val = values.pop()
+                values[-1] = apply(item, values[-1], right_val)
+                continue
+            if action == _SHARE:
+                shared[id(item)] = values[-1]
+                continue
+            if action == _LEAVE:
+                visited.discard(item)
+                if cache is not None:
+                    self.cache_misses += 1
+                    cache[item] = values[-1]
+                continue
+
+            if not item.is_leaf():
+                if type(item) is SharedNode:
+                    if id(item) in shared:
+                        values.append(shared[id(item)])
+                        continue
+                    work.append((_SHARE, item))
+                work.append((_APPLY, item.value))
+                work.append((_VISIT, item.right))
+                work.append((_VISIT, item.left))
+                continue
+            if item.kind == NUMBER:
+                values.append(item.number)
+                continue
+            value = item.value
+            if not isinstance(value, str):
+                values.append(None)
+                continue
+            if cache is not None and value in cache:
+                self.cache_hits += 1
+                values.append(cache[value])
+                continue
+            if context is None or value not in context or value in visited:
+                values.append(None)
+                continue
+            root = context[value].runtime_root()
+            if root is None:
+                values.append(None)
+                continue
+            visited.add(value)
+            work.append((_LEAVE, value))
+            work.append((_VISIT, root))
+        return values[-1]
+
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        if lookups == 0:
+            return 0.0
+        return self.cache_hits / lookups
+
+    def compile(self, node: TreeNode):
+        """
+        Compile a tree into nested closures so repeated evaluation skips the
+        per-visit regex matching and operator dispatch done by eval_node.
+
+        :param node: Root Node to compile
+        :type node: TreeNode
+        :return: function(context, visited, cache=None) returning the same
+            value as eval_node; cache works as in eval_variable, and its
+            hits and misses are counted on this evaluator
+        """
+        return self._compile(node, {})
+
+    def eval_compiled(self, name: str, context: dict, cache: dict | None = None) -> float | None:
+        """
+        Like eval_variable, but runs the compiled closures of the variable's
+        tree. References are loaded recursively, so a pass that evaluates
+        every variable after its dependencies keeps the stack shallow: each
+        reference is then a cache hit.
+        """
+        return self._compile_variable(name)(context, set(), cache)
+
+    def _compile(self, node: TreeNode, shared: dict):
+        # shared: id(SharedNode) -> its closure, so a shared subtree compiles once
+        if node is None:
+            return lambda context, visited, cache=None: None
+
+        if node.is_leaf():
+            if node.kind == NUMBER:
+                constant = node.number
+                return lambda context, visited, cache=None: constant
+            if isinstance(node.value, str):
+                return self._compile_variable(node.value)
+            return lambda context, visited, cache=None: None
+
+        operator = OPERATORS.get(node.value)
+        if operator is None:
+            return lambda context, visited, cache=None: None
+        if type(node) is SharedNode and id(node) in shared:
+            return shared[id(node)]
+        function = operator.function
+        left = self._compile(node.left, shared)
+        right = self._compile(node.right, shared)
+
+        def run(context, visited, cache=None):
+            left_val = left(context, visited, cache)
+            if left_val is None:
+                return None
+            right_val = right(context, visited, cache)
+            if right_val is None:
+                return None
+            return normalize_number(function(left_val, right_val))
+        if type(node) is not SharedNode:
+            return run
+
+        # Each evaluation passes its own visited set, so the value last
+        # computed is reused while the set is the same one. A node reached
+        # again while it is being computed (through a variable whose tree
+        # holds the same node) is computed afresh and not stored.
+        last = [None, None]
+        running = [0]
+
+        def run_once(context, visited, cache=None):
+            if last[0] is visited:
+                return last[1]
+            if running[0]:
+                return run(context, visited, cache)
+            running[0] += 1
+            try:
+                value = run(context, visited, cache)
+            finally:
+                running[0] -= 1
+            last[0], last[1] = visited, value
+            return value
+        shared[id(node)] = run_once
+        return run_once
+
+    def _compile_variable(self, name: str):
+        def load(context, visited, cache=None):
+            if cache is not None and name in cache:
+                self.cache_hits += 1
+                return cache[name]
+            if context is None or name not in context or name in visited:
+                return None
+            expression = context[name]
+            if expression.parse_tree is None:
+                return None
+            visited.add(name)
+            result = expression.compile(self)(context, visited, cache)
+            visited.discard(name)
+            if cache is not None:
+                self.cache_misses += 1
+                cache[name] = result
+            return result
+        return load
+
+    def eval_batch(self, node: TreeNode, bindings: dict, context: dict | None = None, visited: set | None = None):
+        """
+        Evaluate a tree elementwise over arrays of variable bindings in one
+        vectorised pass.
+
+        :param node: Root Node to begin evaluating
+        :param bindings: dict[var_name, array or scalar]; all arrays broadcast together
+        :param context: dict[var_name, expression] used for variables missing from bindings
+        :return: numpy masked array, masked where the scalar evaluator would
+            give None (missing variables, cycles, division by zero)
+        """
+        if np is None:
+            raise ImportError("NumPy is required for batch evaluation")
+        if visited is None:
+            visited = set()
+        shape = np.broadcast_shapes(*(np.shape(value) for value in bindings.values()))
+        values, valid = self._eval_batch(node, bindings, context, visited, shape)
+        return np.ma.MaskedArray(values, mask=~valid)
+
+    def _eval_batch(self, node, bindings, context, visited, shape):
+        invalid = (np.zeros(shape), np.zeros(shape, dtype=bool))
+        if node is None:
+            return invalid
+        if node.is_leaf():
+            if node.kind == NUMBER:
+                return np.full(shape, float(node.number)), np.ones(shape, dtype=bool)
+            value = node.value
+            if not isinstance(value, str):
+                return invalid
+            if value in bindings:
+                return np.broadcast_to(np.asarray(bindings[value], dtype=float), shape), np.ones(shape, dtype=bool)
+            if context is None or value not in context or value in visited:
+                return invalid
+            root = context[value].runtime_root()
+            if root is None:
+                return invalid
+            visited.add(value)
+            result = self._eval_batch(root, bindings, context, visited, shape)
+            visited.discard(value)
+            return result
 
+        operator = OPERATORS.get(node.value)
+        if operator is None:
+            return invalid
+        left_val, left_valid = self._eval_batch(node.left, bindings, context, visited, shape)
+        right_val, right_valid = self._eval_batch(node.right, bindings, context, visited, shape)
+        with np.errstate(all='ignore'):
+            result = operator.function(left_val, right_val)
+        # Division by zero and invalid powers come out as inf/nan: mask them
+        return result, left_valid & right_valid & np.isfinite(result)
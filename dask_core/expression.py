@@ -1,15 +1,162 @@
 """
 DaskExpression class (var name, raw expr, value, tree)
 """
+from sys import intern
 from dask_core.parser import ExpressionParser
-from dask_core.parse_tree import ParseTree
+from dask_core.parse_tree import ParseTree, PENDING
 from dask_core.evaluator import Evaluator
+class ExpressionSession:
+    """
+    What the expressions of one session share, held once rather than on
+    every DaskExpression: the parser that builds deferred trees, the
+    expressions values are read against, and propagated trees (with their
+    compiled closures) by variable name. ExpressionManager has the same
+    attributes and is the session of the expressions it holds.
+
+    read_cache, when a dict, holds the values read on demand and must be
+    cleared whenever an expression in the session changes; ExpressionManager
+    does so in mark_dirty. Here it is None, as nothing tracks the edits.
+    """
+    __slots__ = ('parser', 'expressions', 'propagated_roots', 'compiled_roots', 'read_cache')
+
+    def __init__(self, parser: ExpressionParser = None, expressions: dict | None = None):
+        self.parser = parser
+        self.expressions = expressions
+        self.propagated_roots = {}
+        self.compiled_roots = {} # name -> (propagated root, evaluator, closure)
+        self.read_cache = None
+
+
 class DaskExpression:
-    def __init__(self, var_name: str, expr: str):
-        self.name = var_name
+    """
+    A named DASK expression. The parse tree is built the first time it is
+    used, and the value is evaluated when read until an evaluation pass
+    stores it, so storing an expression costs little more than storing its
+    text.
+    """
+    __slots__ = ('name', 'expression', '_parse_tree', '_value', 'session')
+
+    def __init__(self, var_name: str, expr: str, parse_tree: ParseTree = None, parser: ExpressionParser = None,
+                 context: dict | None = None, session=None):
+        """
+        :param parse_tree: tree already parsed from expr, to avoid parsing twice
+        :param parser: parser (and parse cache) to build the tree with
+        :param context: expressions to evaluate the value against when it is
+            first read; without one the value is None until assigned
+        :param session: ExpressionSession (or ExpressionManager) to take the
+            parser and context from, shared with the session's other
+            expressions; replaces parser and context
+        """
+        self.name = intern(var_name) if type(var_name) is str else var_name
         self.expression = expr
-        self.parse_tree: ParseTree = self.build_tree()
-        self.value: float | int = self.evaluate()
+        self._parse_tree = parse_tree if parse_tree is not None else PENDING
+        self._value = PENDING
+        if session is None and (parser is not None or context is not None):
+            session = ExpressionSession(parser, context)
+        self.session = session
+
+    @property
+    def context(self) -> dict | None:
+        return self.session.expressions if self.session is not None else None
+
+    @property
+    def propagated_root(self):
+        """
+        Set by ExpressionManager.propagate_constants: the optimised tree
+        with the constants of the variables it references substituted in.
+        It depends on the session, so it is kept there rather than on the
+        parse tree, which variables with the same text share.
+        """
+        if self.session is None:
+            return None
+        return self.session.propagated_roots.get(self.name)
+
+    @propagated_root.setter
+    def propagated_root(self, root):
+        if self.session is None:
+            if root is None:
+                return
+            self.session = ExpressionSession()
+        if root is None:
+            self.session.propagated_roots.pop(self.name, None)
+            self.session.compiled_roots.pop(self.name, None)
+        else:
+            self.session.propagated_roots[self.name] = root
+
+    @property
+    def parse_tree(self) -> ParseTree:
+        if self._parse_tree is PENDING:
+            parser = self.session.parser if self.session is not None else None
+            if parser is not None:
+                self.build_tree(parser)
+            else:
+                self.build_tree()
+        return self._parse_tree
+
+    @parse_tree.setter
+    def parse_tree(self, parse_tree: ParseTree):
+        self._parse_tree = parse_tree
+
+    @property
+    def value(self) -> float | int:
+        if self._value is PENDING:
+            # Not stored until a pass does: a value read while a dependency
+            # is undefined or being edited would otherwise be kept after the
+            # edit. Reads share the session's read cache, which edits clear,
+            # so each referenced variable is computed once between edits.
+            # Iterative, so long reference chains cannot exhaust the stack.
+            context = self.context
+            reads = self.session.read_cache if self.session is not None else None
+            if reads is None or context.get(self.name) is not self:
+                return self.evaluate(Evaluator(iterative=True), context)
+            return Evaluator(iterative=True).eval_variable(self.name, context, cache=reads)
+        return self._value
+
+    @value.setter
+    def value(self, value: float | int):
+        self._value = value
+
+    @property
+    def is_evaluated(self) -> bool:
+        """Whether an evaluation pass has stored the value since the last invalidate()."""
+        return self._value is not PENDING
+
+    def invalidate(self):
+        """
+        Forget the stored value, so it is evaluated again when next read,
+        and any constants propagated into the tree.
+        """
+        self._value = PENDING
+        self.propagated_root = None
+
+    def runtime_root(self):
+        """
+        The root evaluators run: propagated_root when set, else the parse
+        tree's evaluation_root().
+        """
+        root = self.propagated_root
+        if root is not None:
+            return root
+        parse_tree = self.parse_tree
+        return parse_tree.evaluation_root() if parse_tree is not None else None
+
+    def compile(self, evaluator: Evaluator = None):
+        """
+        Compiled closure for runtime_root(): the parse tree's cached one, or
+        one for propagated_root, cached in the session on the same terms as
+        ParseTree.compile.
+        """
+        root = self.propagated_root
+        if root is None:
+            parse_tree = self.parse_tree
+            return parse_tree.compile(evaluator) if parse_tree is not None else None
+        compiled_roots = self.session.compiled_roots
+        compiled = compiled_roots.get(self.name)
+        if compiled is None or compiled[0] is not root or (evaluator is not None and compiled[1] is not evaluator):
+            if evaluator is None:
+                evaluator = Evaluator()
+            compiled_roots[self.name] = compiled = (root, evaluator, evaluator.compile(root))
+        return compiled[2]
 
     def build_tree(self, parser = ExpressionParser()):
         self.parse_tree = parser.parse(self.expression)
@@ -22,6 +169,9 @@ class DaskExpression:
             return None
         if evaluator is None:
             evaluator = Evaluator()
+        root = self.propagated_root
+        if root is not None:
+            return evaluator.eval_node(root, context)
         return self.parse_tree.evaluate(evaluator, context)
     
     def __str__(self):
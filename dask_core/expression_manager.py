@@ -1,18 +1,96 @@
 """
 Manages all expressions (add, modify, lookup, sort)
 """
-from dask_core.parser import ExpressionParser
+from dask_core.parser import ExpressionParser, parses
+from dask_core.parse_tree import ParseTree, variables_of
 from dask_core.expression import DaskExpression
-import re
+from dask_core.evaluator import Evaluator
+from dask_core.gc_pause import paused_collection
+from dask_core.parallel import connected_components, partition, evaluate_chunk, line_aligned_ranges, parse_chunk
+from dask_core.serialise import encode_tree
+from dask_core.snapshot import save_snapshot, load_snapshot
+from dask_core.graph import find_cycles, cycle_path
+from dask_core.validator import validate_line
+from dask_core.operators import may_divide_by_zero
+from dask_core.tree_node import NUMBER
+from features.optimiser import substitute_variables
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+import os
+from time import perf_counter
+
+
+def _value_order(group: tuple) -> tuple:
+    # Real values compare directly; complex ones (which cannot) sort after them
+    value = group[0]
+    if isinstance(value, complex):
+        return (False, value.real, value.imag)
+    return (True, value, 0)
+
+
+def _fits(root, limit: int) -> bool:
+    # Whether root has at most limit nodes, without counting past the limit
+    stack = [root]
+    count = 0
+    while stack:
+        node = stack.pop()
+        count += 1
+        if count > limit:
+            return False
+        if not node.is_leaf():
+            stack.append(node.left)
+            stack.append(node.right)
+    return True
+
+
+def _has_unevaluable_leaf(root) -> bool:
+    # Leaves other than numbers and names evaluate to None
+    stack = [root]
+    seen = set()
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if node.is_leaf():
+            if node.kind != NUMBER and not node.is_variable():
+                return True
+            continue
+        stack.append(node.left)
+        stack.append(node.right)
+    return False
+
+
 class ExpressionManager:
     def __init__(self):
         self.expressions: dict[str, DaskExpression] = {} # dict[str, DaskExpression]
         self.parser = ExpressionParser()
+        self.last_pass_stats = {'hits': 0, 'misses': 0, 'hit_rate': 0.0}
+        self._dependencies: dict[str, set[str]] = {} # var -> vars it references
+        self._dependents: dict[str, set[str]] = {} # var -> vars that reference it
+        self._unresolved: set[str] = set() # vars added lazily whose references are not known yet
+        self.dirty: set[str] = set()
+        self.workers = 1 # processes used by evaluate_all and evaluate_dirty; 1 evaluates in-process
+        self.cycles: list[list[str]] = [] # members of each cycle
+        self.unresolvable: set[str] = set() # variables on or behind a cycle
+        self._cycles_stale = False
+        self._snapshot = None # open snapshot that lazily loaded trees decode from
+        self._propagated: set[str] = set() # vars whose propagated_root is current
+        # Session state of the expressions added here (see ExpressionSession)
+        self.propagated_roots = {} # var -> propagated tree
+        self.compiled_roots = {} # var -> (propagated tree, evaluator, closure)
+        self.read_cache = {} # var -> value read on demand since the last edit or pass
+        self.encoded_roots = {} # var -> (runtime root, encode_tree of it) sent to evaluate_parallel workers
+        # Compiles and runs the evaluation passes; kept across passes because
+        # trees cache closures bound to the evaluator that compiled them
+        self._evaluator = Evaluator(iterative=True)
         # self.add_expression("Alpha", "(2+(4*5))")
         # self.add_expression("Pi", "(Alpha*3)")
         # self.add_expression("Mango", "((Alpha+(Delta+(Pi*(Beta*(Gamma/Sigma)))))/2)")
 
-    def add_expression(self, var_name: str, expression_str: str):
+    def add_expression(self, var_name: str, expression_str: str, parse_tree: ParseTree = None):
         """
         Docstring for add_expression
         
@@ -21,9 +99,231 @@ class ExpressionManager:
         :type var_name: str
         :param expression_str: Description
         :type expression_str: str
+        :param parse_tree: tree already parsed from expression_str, reused instead of parsing again
+        :type parse_tree: ParseTree
+        """
+        if parse_tree is None and may_divide_by_zero(expression_str):
+            # Parse now so a constant division by zero is reported here
+            parse_tree = self.parser.parse(expression_str)
+        self.expressions[var_name] = DaskExpression(var_name, expression_str, parse_tree, session=self)
+        if parse_tree is None:
+            # The tree is built, and its references found, on first use
+            self._defer_dependencies(var_name)
+        else:
+            self._update_dependencies(var_name)
+        self.mark_dirty(var_name)
+        self._cycles_stale = True
+
+    @property
+    def dependencies(self) -> dict[str, set[str]]:
+        self._resolve_dependencies()
+        return self._dependencies
+
+    @dependencies.setter
+    def dependencies(self, dependencies: dict[str, set[str]]):
+        self._dependencies = dependencies
+        self._unresolved = set()
+
+    @property
+    def dependents(self) -> dict[str, set[str]]:
+        self._resolve_dependencies()
+        return self._dependents
+
+    @dependents.setter
+    def dependents(self, dependents: dict[str, set[str]]):
+        self._dependents = dependents
+
+    def _resolve_dependencies(self):
+        """
+        Find the references of the variables added lazily. Until then they
+        have no edges, but they are always dirty: anything depending on them
+        was marked dirty through its own edges when they were added.
+        """
+        if not self._unresolved:
+            return
+        unresolved = self._unresolved
+        self._unresolved = set()
+        for name in unresolved:
+            if name in self.expressions:
+                self._update_dependencies(name)
+
+    def _update_dependencies(self, var_name: str):
+        self._unresolved.discard(var_name)
+        for name in self._dependencies.get(var_name, ()):
+            self._dependents[name].discard(var_name)
+        parse_tree = self.expressions[var_name].parse_tree
+        references = parse_tree.variables() if parse_tree is not None else set()
+        self._dependencies[var_name] = references
+        for name in references:
+            self._dependents.setdefault(name, set()).add(var_name)
+
+    def _defer_dependencies(self, var_name: str):
+        for name in self._dependencies.pop(var_name, ()):
+            self._dependents[name].discard(var_name)
+        self._unresolved.add(var_name)
+
+    def mark_dirty(self, var_name: str):
+        """
+        Mark var_name and every variable that transitively depends on it as
+        needing re-evaluation. Their stored values are dropped, so reading
+        one before the next pass evaluates it on demand, and so are their
+        propagated trees (see propagate_constants) and every value read on
+        demand so far.
+        """
+        # Deferred expressions have no dependency edges yet, so it is not
+        # known which values read on demand depended on var_name
+        self.read_cache.clear()
+        queue = deque([var_name])
+        while queue:
+            name = queue.popleft()
+            if name not in self.expressions:
+                continue
+            # A dirty variable's dependents are dirty already, unless
+            # constants were propagated into them since
+            if name in self.dirty and name not in self._propagated:
+                continue
+            self.dirty.add(name)
+            self._propagated.discard(name)
+            self.expressions[name].invalidate()
+            self.encoded_roots.pop(name, None)
+            queue.extend(self._dependents.get(name, ()))
+
+    def load_stream(self, lines, batch_size: int = 1000, progress=None) -> dict:
+        """
+        Validate, parse and add expressions from an iterable of lines (e.g. an
+        open file) without holding the input in memory. Lines are pulled
+        batch_size at a time; blank lines are skipped. The load is all or
+        nothing: on the first invalid line, one that cannot be parsed, or one
+        that divides by a constant zero, every expression added by this call
+        is rolled back. Parsing is checked without building the trees, which
+        are built on first use.
+
+        :param lines: iterable of "name=expression" lines, read lazily
+        :param batch_size: lines validated and parsed before they are added
+        :param progress: optional function(stats) called after every batch
+        :return: stats dict with lines, loaded, seconds, lines_per_second,
+            error (message, or None when the load succeeded) and line (the
+            failing line)
+        """
+        stats = {'lines': 0, 'loaded': 0, 'seconds': 0.0, 'lines_per_second': 0.0, 'error': None, 'line': None}
+        undo = {} # var -> expression it replaced (None if it was new)
+        lines = iter(lines)
+        start = perf_counter()
+        while stats['error'] is None:
+            batch = list(islice(lines, batch_size))
+            if not batch:
+                break
+            staged = []
+            for line in batch:
+                stats['lines'] += 1
+                if not line.strip():
+                    continue
+                message, valid, name, expr, tokens = self.validate_and_tokenize(line)
+                if valid:
+                    if not parses(tokens):
+                        message = f"Expression could not be parsed: {line.strip()}"
+                    elif not may_divide_by_zero(expr):
+                        # Nothing else to check: the tree is built on first use
+                        staged.append((name, expr, None))
+                        continue
+                    else:
+                        try:
+                            # Parse now to catch constant division by zero before storing
+                            staged.append((name, expr, self.parser.parse(expr, tokens)))
+                            continue
+                        except ZeroDivisionError:
+                            message = f"Division by zero detected in expression: {line.strip()}"
+                stats['error'], stats['line'] = message, line.strip()
+                break
+            if stats['error'] is not None:
+                break
+            self._add_staged(staged, undo, stats, start)
+            if progress is not None:
+                progress(stats)
+
+        if stats['error'] is not None:
+            self._rollback(undo)
+            stats['loaded'] = 0
+        stats['seconds'] = perf_counter() - start
+        if stats['seconds'] > 0:
+            stats['lines_per_second'] = stats['lines'] / stats['seconds']
+        return stats
+
+    def load_parallel(self, path, workers: int = None, chunks_per_worker: int = 4, chunk_bytes: int = 8 * 2**20, progress=None) -> dict:
+        """
+        Like load_stream, but the file is split into byte ranges on line
+        boundaries that a process pool validates and parse-checks. The
+        (var_name, expression) pairs come back per range and are added in
+        file order, so the last definition of a variable still wins; as with
+        load_stream, the trees are built on first use.
+
+        :param path: file to load
+        :param workers: processes to use (default: one per CPU)
+        :param chunks_per_worker: ranges per process, to even out the load
+        :param chunk_bytes: largest range, so results held for merging stay small
+        :param progress: optional function(stats) called after every range is added
+        :return: stats dict as returned by load_stream, plus workers
         """
-        # expression = self.parser.parse(var_name, expression_str)
-        self.expressions[var_name] = DaskExpression(var_name, expression_str)
+        workers = workers or os.cpu_count() or 1
+        stats = {'lines': 0, 'loaded': 0, 'seconds': 0.0, 'lines_per_second': 0.0, 'error': None, 'line': None, 'workers': workers}
+        undo = {}
+        start = perf_counter()
+        chunks = max(workers * chunks_per_worker, os.path.getsize(path) // chunk_bytes + 1)
+        tasks = [(str(path), begin, end) for begin, end in line_aligned_ranges(path, chunks)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for lines, parsed, error in pool.map(parse_chunk, tasks):
+                stats['lines'] += lines
+                if error is not None:
+                    # Earlier ranges are already added; they are rolled back below
+                    stats['error'], stats['line'] = error
+                    pool.shutdown(cancel_futures=True)
+                    break
+                self._add_staged([(name, expr, None) for name, expr in parsed], undo, stats, start)
+                if progress is not None:
+                    progress(stats)
+
+        if stats['error'] is not None:
+            self._rollback(undo)
+            stats['loaded'] = 0
+        stats['seconds'] = perf_counter() - start
+        if stats['seconds'] > 0:
+            stats['lines_per_second'] = stats['lines'] / stats['seconds']
+        return stats
+
+    def _add_staged(self, staged: list[tuple], undo: dict, stats: dict, start: float):
+        for name, expr, parse_tree in staged:
+            if name not in undo:
+                undo[name] = self.expressions.get(name)
+            self.add_expression(name, expr, parse_tree)
+            stats['loaded'] += 1
+        stats['seconds'] = perf_counter() - start
+        if stats['seconds'] > 0:
+            stats['lines_per_second'] = stats['lines'] / stats['seconds']
+
+    def _rollback(self, undo: dict):
+        """
+        Put back the expressions replaced by a failed load_stream and drop
+        the ones it added.
+        """
+        for name, previous in undo.items():
+            if previous is not None:
+                self.expressions[name] = previous
+                self._defer_dependencies(name)
+                self.mark_dirty(name)
+                continue
+            del self.expressions[name]
+            self.read_cache.clear()
+            self.propagated_roots.pop(name, None)
+            self.compiled_roots.pop(name, None)
+            self.encoded_roots.pop(name, None)
+            self.dirty.discard(name)
+            self._unresolved.discard(name)
+            for dependency in self._dependencies.pop(name, ()):
+                self._dependents[dependency].discard(name)
+            # Anything referring to it now sees an undefined variable again
+            for dependent in self._dependents.get(name, ()):
+                self.mark_dirty(dependent)
+        self._cycles_stale = True
 
     def validate_expression(self, expression:str) -> tuple:
         """
@@ -36,67 +336,445 @@ class ExpressionManager:
         Returns:
             tuple: error message, boolean of whether valid, var_name, var_expression
         """
-        valid_operators = {'+', '-', '*', '/', '**', '++', '//'}
-        allowed_chars = set('0123456789+-*/()=.')
-        expression = expression.strip()
-        if '=' not in expression:
-            return "*Missing '=' sign in expression. Please re enter the expression*", False, '', ''
-        
-        if expression.count('=') > 1:
-            return "*Multiple '=' signs in expression. Please re enter the expression*", False, '', ''
+        return validate_line(expression)[:4]
 
-        if expression.count('(') != expression.count(')'):
-            return "*Mismatched parentheses in expression. Please re enter the expression*", False, '', ''
-        
-        if re.search(r'\(\s*\)', expression):
-            return "*Empty parentheses in expression. Please re enter the expression*", False, '', ''
-            
-        for char in expression:
-            if char not in valid_operators and char not in allowed_chars and not char.isalpha():
-                return f"*Invalid character '{char}' in expression. Please re enter the expression*", False, '', ''
-            
-
-        name, expr = expression.split('=', 1)
-        name = name.strip()
-        expr = expr.strip()
-
-        if not re.match(r'^[a-zA-Z_]+$', name):
-            return "*Invalid variable name. Please re enter the expression*", False, '', ''
-        
-        if re.search(r'[\+\-*/^][\s\)]*$', expr):
-            return "*Expression cannot end with an operator. Please re enter the expression*", False, '', ''
-        
-        if re.search(r'^[+\-*/^]\s*', expr):
-            return "*Expression cannot start with an operator. Please re enter the expression*", False, '', ''
-
-        if re.search(r'(^|[=(*/+])\s*-\s*[\d\.]', expr):
-            return "*Negative numbers are not allowed. Please re enter the expression*", False, '', ''
+    def validate_and_tokenize(self, expression: str) -> tuple:
+        """
+        Like validate_expression, plus the expression's tokens from the same
+        scan, to hand to parser.parse(expr, tokens) so the line is scanned once.
 
-        for number in re.findall(r'[\d\.]+', expr):
-            if not re.fullmatch(r'(\d+(\.\d*)?|\.\d+)', number):
-                return "*Invalid number format. Please re enter the expression*", False, '', ''
-        
-        if expr == '':
-            return "*Expression cannot be empty. Please re enter the expression*", False, '', ''
-        
-        if not any(op in expr for op in valid_operators):
-            return "*Enter a valid expression with an operator*", False, '', ''
-        
-        if '(' not in expr or ')' not in expr:
-            return "*Empty parentheses in expression. Please re enter the expression*", False, '', ''   
-    
-        return '', True, name, expr
+        Returns:
+            tuple: error message, boolean of whether valid, var_name, var_expression, tokens
+        """
+        return validate_line(expression)
         
     def get_expression(self):
         pass
 
-    def evaluate_all(self): # re-evaluate all the values for all dask expressions contained within EM
+    def analyse_cycles(self):
+        """
+        Find the cycles in the dependency graph with Tarjan's SCC algorithm and
+        mark cycle members, and everything that depends on them, unresolvable.
+
+        Only the dirty region can gain or lose a cycle: a cycle through a
+        changed variable has all its members dirty, and a variable only
+        starts or stops depending on a cycle through a changed variable. So
+        the analysis re-runs over the dirty set, once per batch of additions.
+        """
+        if not self._cycles_stale:
+            return
+        region = self.dirty
+        dependencies = self.dependencies
+        order, blocked = self.topological_order(region)
+        self.cycles = [members for members in self.cycles if members[0] not in region]
+        self.cycles.extend(find_cycles(blocked, dependencies))
+        unresolvable = self.unresolvable
+        for name in region:
+            unresolvable.discard(name)
+        unresolvable.update(blocked)
+        for name in order:
+            if any(dependency in unresolvable for dependency in dependencies.get(name, ())):
+                unresolvable.add(name)
+        self._cycles_stale = False
+
+    def cycle_report(self) -> str:
+        self.analyse_cycles()
+        if not self.cycles:
+            return "No cycles found."
+        lines = []
+        for number, members in enumerate(self.cycles, start=1):
+            lines.append(f"Cycle {number}: {' -> '.join(cycle_path(members, self.dependencies))}")
+        in_cycles = {name for members in self.cycles for name in members}
+        blocked = sorted(self.unresolvable - in_cycles)
+        if blocked:
+            lines.append(f"Depends on a cycle: {', '.join(blocked)}")
+        return '\n'.join(lines)
+
+    def group_by_value(self) -> list[tuple[object, list[DaskExpression]]]:
+        """
+        Group expressions by value in one bucket pass, then sort the distinct
+        values once: highest first, complex values after real ones, and the
+        None group (always present) last. Each group keeps insertion order.
+
+        :return: (value, expressions) pairs
+        """
+        if self.dirty:
+            # One pass computes every value; reading them one by one would not share work
+            self.evaluate_dirty()
+        buckets: dict[object, list[DaskExpression]] = {}
+        unvalued = []
         for expr in self.expressions.values():
-            expr.value = expr.evaluate(context=self.expressions)
+            value = expr.value
+            if value is None:
+                unvalued.append(expr)
+            else:
+                # Equal values (e.g. 2 and 2.0) share the first one's bucket
+                buckets.setdefault(value, []).append(expr)
+        groups = sorted(buckets.items(), key=_value_order, reverse=True)
+        groups.append((None, unvalued))
+        return groups
+
+    def write_sorted(self, stream):
+        """
+        Write the "*** Expressions with value=>" report for group_by_value to
+        a text stream, one group at a time.
+
+        :param stream: writable text stream, e.g. an open output file
+        """
+        for value, group in self.group_by_value():
+            stream.write(f'*** Expressions with value=> {value}\n')
+            stream.writelines(f'{expr.name}={expr.expression}\n' for expr in group)
+            stream.write('\n')
+
+    def evaluate_variable(self, var_name: str):
+        """
+        Evaluate a single variable against the session without recursion, so
+        long reference chains cannot exhaust the native stack. A value stored
+        by a pass is returned as is while the variable is clean; otherwise a
+        fresh cache computes each reference once.
+        """
+        expression = self.expressions.get(var_name)
+        if expression is not None and expression.is_evaluated and var_name not in self.dirty:
+            return expression.value
+        self.analyse_cycles()
+        if var_name in self.unresolvable:
+            return None
+        return Evaluator(iterative=True).eval_variable(var_name, self.expressions, cache={})
+
+    def evaluate_all(self): # re-evaluate all the values for all dask expressions contained within EM
+        """
+        Re-evaluate every expression, sharing one value cache across the pass
+        so each variable is computed exactly once.
+        """
+        if self.workers > 1:
+            self.evaluate_parallel(self.workers)
+            return
+        self._resolve_dependencies()
+        self.analyse_cycles()
+        order, blocked = self.topological_order(self.expressions)
+        self._evaluate_in_order(order + blocked, {})
+        self.dirty.clear()
+
+    def _evaluate_in_order(self, order: list[str], cache: dict):
+        """
+        Evaluate and store the values of order with compiled closures that
+        share cache. Every variable comes after its dependencies, so each
+        reference is a cache hit and the closures do not recurse into other
+        trees; a tree too deep to compile or run recursively is evaluated
+        with the work stack instead.
+        """
+        evaluator = self._evaluator
+        evaluator.cache_hits = evaluator.cache_misses = 0
+        unresolvable = self.unresolvable
+        expressions = self.expressions
+        # Trees are built and compiled on first use
+        with paused_collection():
+            for name in order:
+                if name in unresolvable:
+                    expressions[name].value = None
+                    continue
+                try:
+                    value = evaluator.eval_compiled(name, expressions, cache)
+                except RecursionError:
+                    value = evaluator.eval_variable(name, expressions, cache=cache)
+                expressions[name].value = value
+        # Every value read on demand is stored now
+        self.read_cache.clear()
+        self._record_pass_stats(evaluator)
+
+    def topological_order(self, names) -> tuple[list[str], list[str]]:
+        """
+        Order names so every variable comes after the names it depends on,
+        considering only dependencies inside names (Kahn's algorithm).
+
+        Returns:
+            tuple: ordered names, names that could not be ordered because they
+            sit on or behind a cycle
+        """
+        dependencies = self.dependencies
+        dependents = self._dependents
+        pending = {}
+        for name in names:
+            pending[name] = sum(1 for dependency in dependencies.get(name, ()) if dependency in names)
+
+        queue = deque(name for name, count in pending.items() if count == 0)
+        order = []
+        while queue:
+            name = queue.popleft()
+            order.append(name)
+            for dependent in dependents.get(name, ()):
+                if dependent in pending:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        queue.append(dependent)
+        if len(order) == len(pending):
+            return order, []
+        ordered = set(order)
+        return order, [name for name in pending if name not in ordered]
+
+    def evaluate_parallel(self, workers: int, chunks_per_worker: int = 4, names=None, min_wavefront: int = 4096):
+        """
+        Evaluate names (default: every expression) on a process pool and
+        store their values, reusing the stored values of their other
+        dependencies like evaluate_dirty.
+
+        Components of the dependency graph small enough for one chunk are
+        sent whole. Larger ones are split into wavefronts by topological
+        depth: each wavefront only depends on earlier ones, so it is sent
+        with their values. A wavefront narrower than min_wavefront is not
+        worth the round trip and is evaluated in-process, as are variables
+        on or behind a cycle.
+
+        :param workers: processes to use
+        :param chunks_per_worker: chunks per process, to even out the load
+        :param names: variables to evaluate; their dirty marks are cleared
+        :param min_wavefront: fewest variables sent to the pool in one round
+        """
+        # Ordering, chunking and the values sent back are bulk allocations (see _evaluate_in_order)
+        with paused_collection():
+            names = set(self.expressions) if names is None else set(names)
+            self.analyse_cycles()
+            cache = self._stored_dependencies(names)
+            order, blocked = self.topological_order(names)
+            unresolvable = self.unresolvable
+            serial_tail = [name for name in order if name in unresolvable] + blocked
+            order = [name for name in order if name not in unresolvable]
+
+            pooled, steps = self._parallel_steps(order, workers * chunks_per_worker, min_wavefront)
+            hits = misses = 0
+            needs_pool = pooled or any(to_pool for to_pool, _ in steps)
+            with ProcessPoolExecutor(max_workers=workers) if needs_pool else nullcontext() as pool:
+                # Whole components need nothing from the rest of the pass, so the
+                # pool works on them while the wavefronts run
+                pending = pool.map(evaluate_chunk, *self._chunk_tasks(pooled, cache)) if pooled else ()
+                for to_pool, items in steps:
+                    if not to_pool:
+                        self._evaluate_in_order(items, cache)
+                        hits += self.last_pass_stats['hits']
+                        misses += self.last_pass_stats['misses']
+                        continue
+                    # The next wavefront needs the values of this one
+                    for values, chunk_hits, chunk_misses in pool.map(evaluate_chunk, *self._chunk_tasks(items, cache)):
+                        self._store_values(values, cache)
+                        hits += chunk_hits
+                        misses += chunk_misses
+                for values, chunk_hits, chunk_misses in pending:
+                    self._store_values(values, cache)
+                    hits += chunk_hits
+                    misses += chunk_misses
+            # Anything on or behind a cycle resolves to None in-process
+            self._evaluate_in_order(serial_tail, cache)
+            hits += self.last_pass_stats['hits']
+            misses += self.last_pass_stats['misses']
+            self.read_cache.clear()
+            lookups = hits + misses
+            self.last_pass_stats = {'hits': hits, 'misses': misses, 'hit_rate': hits / lookups if lookups else 0.0}
+            self.dirty.difference_update(names)
+
+    def _parallel_steps(self, order: list[str], chunks: int, min_wavefront: int) -> tuple[list, list]:
+        """
+        Plan evaluate_parallel over order, a topological order of resolvable
+        names.
+
+        :return: chunks of the components small enough to send whole (empty
+            if too few to be worth it), and the steps to run in order after
+            them: (True, chunks) for a wavefront sent to the pool, or
+            (False, names) for names evaluated in-process
+        """
+        dependencies = self.dependencies
+        share = -(-len(order) // chunks)
+        small, depth = [], {}
+        for component in connected_components(order, dependencies):
+            if len(component) <= share:
+                small.append(component)
+            else:
+                depth.update((name, None) for name in component)
+        # Names in a large component, grouped by distance from its leaves
+        wavefronts = []
+        for name in order:
+            if name in depth:
+                level = max((depth[dependency] + 1 for dependency in dependencies.get(name, ())
+                             if depth.get(dependency) is not None), default=0)
+                depth[name] = level
+                if level == len(wavefronts):
+                    wavefronts.append([])
+                wavefronts[level].append(name)
+
+        pooled = partition(small, chunks) if len(order) - len(depth) >= min_wavefront else []
+        steps = [] if pooled else [(False, [name for component in small for name in component])]
+        for wavefront in wavefronts:
+            if len(wavefront) >= min_wavefront:
+                step = -(-len(wavefront) // chunks)
+                steps.append((True, [wavefront[i:i + step] for i in range(0, len(wavefront), step)]))
+            elif steps and not steps[-1][0]:
+                steps[-1][1].extend(wavefront)
+            else:
+                steps.append((False, list(wavefront)))
+        return pooled, steps
+
+    def _chunk_tasks(self, chunks: list[list[str]], cache: dict) -> tuple[list, list]:
+        """
+        Arguments for evaluate_chunk: the encoded trees of each chunk, and
+        the values of the references it makes outside itself that are known.
+        """
+        dependencies = self.dependencies
+        encoded, known = [], []
+        for chunk in chunks:
+            encoded.append([(name, self._encoded_root(name)) for name in chunk])
+            known.append({
+                dependency: cache[dependency]
+                for name in chunk for dependency in dependencies.get(name, ())
+                if dependency in cache
+            })
+        return encoded, known
+
+    def _encoded_root(self, var_name: str) -> tuple:
+        """
+        encode_tree of the variable's runtime root, kept until it is marked
+        dirty or its runtime root changes.
+        """
+        root = self.expressions[var_name].runtime_root()
+        cached = self.encoded_roots.get(var_name)
+        if cached is None or cached[0] is not root:
+            cached = self.encoded_roots[var_name] = (root, encode_tree(root, numbers=True))
+        return cached[1]
+
+    def _store_values(self, values: dict, cache: dict):
+        expressions = self.expressions
+        for name, value in values.items():
+            expressions[name].value = value
+        cache.update(values)
+
+    def _record_pass_stats(self, evaluator: Evaluator):
+        self.last_pass_stats = {
+            'hits': evaluator.cache_hits,
+            'misses': evaluator.cache_misses,
+            'hit_rate': evaluator.cache_hit_rate(),
+        }
+
+    def evaluate_dirty(self):
+        """
+        Re-evaluate only the dirty variables, in topological order, reusing the
+        stored values of their clean dependencies.
+        """
+        if self.workers > 1:
+            self.evaluate_parallel(self.workers, names=self.dirty)
+            return
+        dirty = self.dirty
+        cache = self._stored_dependencies(dirty)
+        order, blocked = self.topological_order(dirty)
+        order.extend(blocked)
+        self.analyse_cycles()
+        self._evaluate_in_order(order, cache)
+        dirty.clear()
+
+    def _stored_dependencies(self, names) -> dict:
+        """
+        The stored values of the variables that names depend on outside
+        names, to seed the cache of a pass over names.
+        """
+        dependencies = self.dependencies
+        expressions = self.expressions
+        cache = {}
+        for name in names:
+            for dependency in dependencies.get(name, ()):
+                if dependency not in names and dependency in expressions:
+                    cache[dependency] = expressions[dependency].value
+        return cache
         
-    def optimise_all(self):
+    def save_snapshot(self, path):
+        """
+        Save the session to a binary snapshot (see dask_core.snapshot).
+
+        :param path: file to write
+        """
+        save_snapshot(self, path)
+
+    def load_snapshot(self, path):
+        """
+        Replace the session with a saved snapshot. The file is memory-mapped
+        and each parse tree is decoded the first time it is used, so
+        reopening a large session costs little more than reading its names
+        and values.
+
+        :param path: file written by save_snapshot
+        :raises SnapshotError: when path is not a snapshot of this version
+        """
+        self._snapshot = load_snapshot(self, path)
+
+    def optimise_all(self, inline_limit: int = 0):
+        """
+        Optimise every tree, then propagate constants across variables (see
+        propagate_constants).
+        """
         for expr in self.expressions.values():
             expr.parse_tree.optimise()
+        self.propagate_constants(inline_limit)
+
+    def propagate_constants(self, inline_limit: int = 0) -> int:
+        """
+        Substitute variables whose trees reduce to a constant into the trees
+        that reference them, and fold again, so Pi=(Alpha+1) with
+        Alpha=(3*5) evaluates as 16 without looking Alpha up. Variables are
+        visited in topological order, so a chain of references collapses in
+        one pass. The result is kept in each expression's propagated_root,
+        which only evaluation uses.
+
+        Variables on or behind a cycle are left alone, and so is any tree
+        whose refold would drop a reference it still holds. Only variables that
+        changed since the last pass, and their dependents (i.e. those
+        marked dirty), are visited again.
+
+        :param inline_limit: also inline the trees of referenced variables
+            with at most this many nodes (0 inlines constants only)
+        :return: number of trees rewritten
+        """
+        self._resolve_dependencies()
+        self.analyse_cycles()
+        expressions = self.expressions
+        pending = {name for name in expressions if name not in self._propagated}
+        order, blocked = self.topological_order(pending)
+        self._propagated.update(blocked)
+
+        def replacement(name: str):
+            expr = expressions.get(name)
+            if expr is None or name in self.unresolvable or expr.parse_tree is None:
+                return None
+            root = expr.runtime_root()
+            if root is None:
+                return None
+            if root.is_leaf():
+                return root if root.kind == NUMBER else None
+            if inline_limit and _fits(root, inline_limit):
+                return root
+            return None
+
+        rewritten = 0
+        for name in order:
+            self._propagated.add(name)
+            expr = expressions[name]
+            expr.propagated_root = None
+            if name in self.unresolvable or expr.parse_tree is None:
+                continue
+            root = expr.parse_tree.evaluation_root()
+            substituted = substitute_variables(root, replacement)
+            if substituted is root:
+                continue
+            try:
+                propagated = ParseTree(substituted).optimised_root
+            except ArithmeticError:
+                # Left for evaluation to report, as before
+                continue
+            if _has_unevaluable_leaf(propagated):
+                # e.g. a complex constant, which evaluates to None when folded
+                continue
+            if variables_of(propagated) != variables_of(substituted):
+                # A zero rule dropped a reference, e.g. (0*E) -> 0, whose
+                # value would no longer be None while E is undefined
+                continue
+            expr.propagated_root = propagated
+            rewritten += 1
+        return rewritten
 
     def optimise_expression(self, var_name: str):
         self.expressions[var_name].parse_tree.optimise()
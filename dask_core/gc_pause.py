@@ -0,0 +1,25 @@
+"""
+Pause the cyclic garbage collector around bulk allocation
+"""
+import gc
+from contextlib import contextmanager
+
+
+@contextmanager
+def paused_collection():
+    """
+    Disable the cyclic collector for the duration of the block, restoring
+    its previous state afterwards.
+
+    Loading or building a whole session creates millions of acyclic objects
+    (nodes, closures, expressions) that reference counting frees on its
+    own; left enabled, the collector would run repeated full collections
+    over them that find nothing to free.
+    """
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if collecting:
+            gc.enable()
@@ -0,0 +1,94 @@
+"""
+Dependency graph algorithms (cycle detection)
+"""
+from collections import deque
+
+
+def strongly_connected_components(names, dependencies: dict) -> list[list[str]]:
+    """
+    Tarjan's algorithm with an explicit stack, so deep reference chains do
+    not hit the recursion limit. Only edges between names are followed.
+
+    :param names: variables in the graph
+    :param dependencies: dict[var_name, names it references]
+    :return: components in reverse topological order
+    """
+    names = set(names)
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for start in names:
+        if start in index:
+            continue
+        index[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(dependencies.get(start, ())))]
+        while work:
+            name, edges = work[-1]
+            for dependency in edges:
+                if dependency not in names:
+                    continue
+                if dependency not in index:
+                    index[dependency] = low[dependency] = counter
+                    counter += 1
+                    stack.append(dependency)
+                    on_stack.add(dependency)
+                    work.append((dependency, iter(dependencies.get(dependency, ()))))
+                    break
+                if dependency in on_stack:
+                    low[name] = min(low[name], index[dependency])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[name])
+                if low[name] == index[name]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == name:
+                            break
+                    components.append(component)
+    return components
+
+
+def find_cycles(names, dependencies: dict) -> list[list[str]]:
+    """
+    Return the strongly connected components that contain a cycle: more than
+    one member, or a single variable that references itself.
+    """
+    return [
+        sorted(component)
+        for component in strongly_connected_components(names, dependencies)
+        if len(component) > 1 or component[0] in dependencies.get(component[0], ())
+    ]
+
+
+def cycle_path(members: list[str], dependencies: dict) -> list[str]:
+    """
+    Return one concrete cycle through the first member, e.g. ['A', 'B', 'A'].
+    """
+    start = members[0]
+    allowed = set(members)
+    previous = {}
+    queue = deque([start])
+    while queue:
+        name = queue.popleft()
+        for dependency in sorted(dependencies.get(name, ())):
+            if dependency == start:
+                path = [name]
+                while path[-1] != start:
+                    path.append(previous[path[-1]])
+                return path[::-1] + [start]
+            if dependency in allowed and dependency not in previous:
+                previous[dependency] = name
+                queue.append(dependency)
+    return [start]
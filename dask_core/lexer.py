@@ -6,8 +6,73 @@ into a list like
 
 Supports operators: +, -, *, /, ++, **, //
 Supports multi-digit numbers: 100, 123, etc.
+
+iter_tokens is the single-pass scanner used by the parser: it matches one
+compiled master regex and yields (kind, text, start, end) tuples lazily.
+tokenize keeps the original character-by-character behaviour.
 """
+import re
 from string import ascii_letters, digits
+from dask_core.operators import OPERATORS
+from dask_core.tree_node import NUMBER, VARIABLE, OPERATOR
+
+# Token kinds besides the TreeNode kinds
+LPAREN = 'lparen'
+RPAREN = 'rparen'
+UNKNOWN = 'unknown'
+_SPACE = 'space'
+
+# Kind of a token decided by its first character; other characters are
+# operators when the whole token is a registered spelling
+_FIRST_CHAR_KINDS = {'(': LPAREN, ')': RPAREN}
+_FIRST_CHAR_KINDS.update(dict.fromkeys(digits + '.', NUMBER))
+_FIRST_CHAR_KINDS.update(dict.fromkeys(ascii_letters + '_', VARIABLE))
+_FIRST_CHAR_KINDS.update(dict.fromkeys(' \t\r\n\f\v', _SPACE))
+
+_master_re = None
+_master_operators = None
+
+
+def _master_pattern() -> re.Pattern:
+    """
+    Build the master regex from the operator registry, rebuilding it only
+    when the registered operators have changed since the last call. Every
+    character belongs to exactly one match, so token offsets are running
+    sums of the match lengths.
+    """
+    global _master_re, _master_operators
+    operators = tuple(OPERATORS)
+    if operators != _master_operators:
+        # Longest spelling first so ** wins over *
+        spellings = '|'.join(re.escape(op) for op in sorted(operators, key=len, reverse=True))
+        _master_re = re.compile(
+            r'\d+(?:\.\d*)?|\.\d+|[A-Za-z_]+|' + spellings + r'|[ \t\r\n\f\v]+|.',
+            re.DOTALL,
+        )
+        _master_operators = operators
+    return _master_re
+
+
+def iter_tokens(expr: str):
+    """
+    Scan a DASK expression in one pass, yielding (kind, text, start, end)
+    tuples. Whitespace is skipped; unexpected characters are yielded as
+    UNKNOWN tokens.
+    """
+    first_char_kinds = _FIRST_CHAR_KINDS
+    start = 0
+    for text in _master_pattern().findall(expr):
+        end = start + len(text)
+        kind = first_char_kinds.get(text[0])
+        if kind is None:
+            kind = OPERATOR if text in OPERATORS else UNKNOWN
+        elif kind == _SPACE:
+            start = end
+            continue
+        elif text == '.':
+            kind = UNKNOWN
+        yield kind, text, start, end
+        start = end
 
 
 def tokenize(expr: str) -> list[str]:
@@ -70,7 +135,7 @@ def tokenize(expr: str) -> list[str]:
             # Check for multi-character operators: ++, **, //
             if i + 1 < len(expr):
                 two_char = ch + expr[i + 1]
-                if two_char in ['++', '**', '//']:
+                if two_char in OPERATORS:
                     tokens.append(two_char)
                     i += 1  # Skip the next character since we've consumed it
                 else:
@@ -0,0 +1,103 @@
+"""
+Hash-consing node factory (shared, immutable TreeNodes)
+
+Structurally equal subtrees built through one factory are the same object,
+so a session full of repeated subexpressions is stored as a DAG.
+"""
+from dask_core.tree_node import TreeNode
+
+
+class InternedNode(TreeNode):
+    """
+    TreeNode that cannot be changed once built, because other trees may share it.
+    """
+    __slots__ = ('_frozen',)
+
+    def __init__(self, value=None, left=None, right=None, kind=None, number=None):
+        super().__init__(value, left, right, kind, number)
+        object.__setattr__(self, '_frozen', True)
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError("Interned nodes are immutable; build a new node instead")
+        object.__setattr__(self, name, value)
+
+    def clone(self):
+        # A clone is meant to be edited, so it is a plain TreeNode
+        left_clone = self.left.clone() if self.left else None
+        right_clone = self.right.clone() if self.right else None
+        return TreeNode(self._value, left_clone, right_clone, self.kind, self.number)
+
+
+class NodeFactory:
+    """
+    Builds InternedNodes, returning the existing node when an equal one was
+    already made. Nodes are keyed on value and child identity; the table
+    keeps every node (and so its children) alive, so identities stay unique.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def make(self, value, left=None, right=None, kind=None, number=None) -> InternedNode:
+        """
+        Return the shared node for (value, left, right). Children that were
+        not made by this factory are interned first.
+        """
+        if left is not None and not self._owns(left):
+            left = self.intern(left)
+        if right is not None and not self._owns(right):
+            right = self.intern(right)
+
+        # type(value) keeps 1 and 1.0 (and '1') apart
+        key = (type(value), value, id(left), id(right))
+        node = self._nodes.get(key)
+        if node is None:
+            self.misses += 1
+            node = InternedNode(value, left, right, kind, number)
+            self._nodes[key] = node
+        else:
+            self.hits += 1
+        return node
+
+    def intern(self, root: TreeNode) -> InternedNode | None:
+        """
+        Return the interned equivalent of an ordinary tree (post-order, iterative).
+        """
+        if root is None:
+            return None
+        done = {}
+        stack = [(root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if id(node) in done:
+                continue
+            if self._owns(node):
+                done[id(node)] = node
+            elif children_done:
+                left = done[id(node.left)] if node.left is not None else None
+                right = done[id(node.right)] if node.right is not None else None
+                done[id(node)] = self.make(node.value, left, right, node.kind, node.number)
+            else:
+                stack.append((node, True))
+                if node.right is not None:
+                    stack.append((node.right, False))
+                if node.left is not None:
+                    stack.append((node.left, False))
+        return done[id(root)]
+
+    def clear(self):
+        self._nodes.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _owns(self, node: TreeNode) -> bool:
+        if not isinstance(node, InternedNode):
+            return False
+        key = (type(node.value), node.value, id(node.left), id(node.right))
+        return self._nodes.get(key) is node
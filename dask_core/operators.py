@@ -0,0 +1,128 @@
+"""
+Operator registry: one entry per DASK operator holding its token spelling,
+arity, evaluation function, cost weight and derivative rule.
+
+Supports operators: +, -, *, /, ++, **, //
+"""
+
+
+class UnsupportedOperatorError(Exception):
+    """Exception raised for operators without a derivative rule (++, //) in differentiation function"""
+    pass
+
+
+class Operator:
+    def __init__(self, symbol: str, function, cost: int, derivative=None, arity: int = 2, raises_on_zero: bool = True):
+        """
+        :param symbol: token spelling, one or two characters
+        :param function: function(left, right) -> value, also applied elementwise to NumPy arrays
+        :param cost: relative weight used by the cost analysis
+        :param derivative: function(left, right, diff) -> TreeNode, where diff
+            differentiates a subtree; None when the operator cannot be differentiated
+        :param arity: number of operands (the parser only builds binary nodes)
+        :param raises_on_zero: whether function can raise ZeroDivisionError,
+            so folding constants with it must happen when an expression is
+            added rather than later
+        """
+        self.symbol = symbol
+        self.function = function
+        self.cost = cost
+        self.derivative = derivative
+        self.arity = arity
+        self.raises_on_zero = raises_on_zero
+
+    def __repr__(self):
+        return f"Operator({self.symbol!r})"
+
+
+OPERATORS: dict[str, Operator] = {}
+
+
+def register_operator(symbol: str, function, cost: int, derivative=None, arity: int = 2, raises_on_zero: bool = True) -> Operator:
+    """
+    Register (or replace) an operator. Registration order is kept, so the
+    built-ins are listed as '+', '-', '*', '/', '++', '**', '//'.
+    """
+    if arity != 2:
+        raise ValueError("Only binary operators are supported by the parser")
+    if not 1 <= len(symbol) <= 2:
+        raise ValueError("Operator symbols must be one or two characters long")
+    if any(char.isalnum() or char in '()=.' for char in symbol):
+        raise ValueError(f"Invalid operator symbol: {symbol}")
+    operator = Operator(symbol, function, cost, derivative, arity, raises_on_zero)
+    OPERATORS[symbol] = operator
+    return operator
+
+
+_raising_symbols = ()
+_raising_for = None
+
+
+def may_divide_by_zero(expr: str) -> bool:
+    """
+    Whether folding the constants of expr could raise ZeroDivisionError,
+    i.e. expr spells an operator registered with raises_on_zero. The check
+    is on the raw text, so it can only err on the side of True.
+    """
+    global _raising_symbols, _raising_for
+    operators = tuple(OPERATORS.values())
+    if operators != _raising_for:
+        symbols = [operator.symbol for operator in operators if operator.raises_on_zero]
+        # '//' can only appear where '/' does, so '/' alone is enough to look for
+        _raising_symbols = tuple(symbol for symbol in symbols
+                                 if not any(other != symbol and other in symbol for other in symbols))
+        _raising_for = operators
+    for symbol in _raising_symbols:
+        if symbol in expr:
+            return True
+    return False
+
+
+def sum_to(n: float) -> float:
+    return n * (n + 1) / 2
+
+
+def _node(value, left=None, right=None):
+    # tree_node imports this module, so TreeNode is imported on first use
+    from dask_core.tree_node import TreeNode
+    return TreeNode(value, left, right)
+
+
+def _derive_add(left, right, diff):
+    return _node("+", diff(left), diff(right))
+
+
+def _derive_subtract(left, right, diff):
+    return _node("-", diff(left), diff(right))
+
+
+def _derive_multiply(left, right, diff):
+    # Product rule: (u*v)' = u'*v + u*v'
+    left_d = diff(left)
+    right_d = diff(right)
+    return _node("+", _node("*", left_d, right), _node("*", left, right_d))
+
+
+def _derive_divide(left, right, diff):
+    # Quotient rule: (u/v)' = (u'*v - u*v') / v**2
+    left_d = diff(left)
+    right_d = diff(right)
+    numerator = _node("-", _node("*", left_d, right), _node("*", left, right_d))
+    return _node("/", numerator, _node("**", right, _node(2)))
+
+
+def _derive_power(left, right, diff):
+    # Power rule only when exponent is a constant number
+    if not (right is not None and right.is_leaf() and right.is_number()):
+        raise UnsupportedOperatorError("Power rule only supports constant exponents.")
+    n = float(right.number)
+    return _node("*", _node(n), _node("*", _node("**", left, _node(n - 1)), diff(left)))
+
+
+register_operator('+', lambda left, right: left + right, 1, _derive_add, raises_on_zero=False)
+register_operator('-', lambda left, right: left - right, 1, _derive_subtract, raises_on_zero=False)
+register_operator('*', lambda left, right: left * right, 2, _derive_multiply, raises_on_zero=False)
+register_operator('/', lambda left, right: left / right, 2, _derive_divide)
+register_operator('++', lambda left, right: sum_to(left) + sum_to(right), 3, raises_on_zero=False)
+register_operator('**', lambda left, right: left ** right, 3, _derive_power)
+register_operator('//', lambda left, right: sum_to(left) / sum_to(right), 3)
@@ -0,0 +1,185 @@
+"""
+Parallel evaluation of independent parts of a session on a process pool.
+
+Workers receive (var_name, encoded tree) pairs rather than pickled
+DaskExpression objects, with the values of any references made outside
+them, and evaluate the encodings in topological order so every variable
+is computed once.
+
+Large input files are also validated and parse-checked in parallel: the
+file is split into byte ranges on line boundaries and each worker sends
+back the (var_name, expression) pairs of its range, whose trees are built
+on first use like those of load_stream.
+"""
+import os
+from collections import deque
+
+from dask_core.evaluator import Evaluator
+from dask_core.operators import OPERATORS, may_divide_by_zero
+from dask_core.parser import ExpressionParser, parses
+from dask_core.tree_node import NUMBER_RE, normalize_number
+from dask_core.validator import validate_line
+
+
+def connected_components(names, dependencies: dict) -> list[list[str]]:
+    """
+    Split names into groups that share no dependency edges (union-find).
+    Only edges between names in the session are followed.
+    """
+    parent = {name: name for name in names}
+
+    def find(name):
+        root = name
+        while parent[root] != root:
+            root = parent[root]
+        while parent[name] != root:
+            parent[name], name = root, parent[name]
+        return root
+
+    for name in names:
+        for dependency in dependencies.get(name, ()):
+            if dependency in parent:
+                a, b = find(name), find(dependency)
+                if a != b:
+                    parent[a] = b
+
+    groups = {}
+    for name in names:
+        groups.setdefault(find(name), []).append(name)
+    return list(groups.values())
+
+
+def partition(components: list[list[str]], chunks: int) -> list[list[str]]:
+    """
+    Pack components into at most chunks lists of similar size, largest first.
+    """
+    bins = [[] for _ in range(max(1, min(chunks, len(components))))]
+    for component in sorted(components, key=len, reverse=True):
+        min(bins, key=len).extend(component)
+    return [chunk for chunk in bins if chunk]
+
+
+def evaluate_chunk(chunk: list[tuple], known: dict | None = None) -> tuple[dict, int, int]:
+    """
+    Worker entry point: evaluate a set of encoded expressions.
+
+    :param chunk: list of (var_name, encoded tree); encodings made with
+        numbers=True are evaluated without converting their number leaves
+    :param known: values of the references made outside chunk; any other
+        reference outside it evaluates to None
+    :return: values by name, cache hits, cache misses
+    """
+    roots = dict(chunk)
+    dependents = {}
+    pending = {}
+    for name, encoded in chunk:
+        references = {value for value in encoded
+                      if type(value) is str and value in roots and value not in OPERATORS}
+        pending[name] = len(references)
+        for reference in references:
+            dependents.setdefault(reference, []).append(name)
+
+    queue = deque(name for name, count in pending.items() if count == 0)
+    apply = Evaluator()._apply_operator
+    cache = dict(known) if known else {}
+    hits = misses = 0
+    while queue:
+        name = queue.popleft()
+        # Run the pre-order encoding backwards with a value stack instead of
+        # rebuilding the tree: an operator's operands are on top of the stack
+        values = []
+        for value in reversed(roots[name]):
+            if type(value) is not str:
+                values.append(value)
+            elif value in OPERATORS:
+                left = values.pop()
+                values[-1] = apply(value, left, values[-1])
+            elif value in cache:
+                hits += 1
+                values.append(cache[value])
+            elif NUMBER_RE.fullmatch(value):
+                values.append(normalize_number(float(value)))
+            else:
+                values.append(None)
+        cache[name] = values[-1] if values else None
+        misses += 1
+        for dependent in dependents.get(name, ()):
+            pending[dependent] -= 1
+            if pending[dependent] == 0:
+                queue.append(dependent)
+
+    # Anything left sits on or behind a cycle
+    values = {name: cache.get(name) for name in roots}
+    return values, hits, misses
+
+
+def line_aligned_ranges(path, chunks: int) -> list[tuple[int, int]]:
+    """
+    Split a file into at most chunks (start, end) byte ranges, each starting
+    at the beginning of a line.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    starts = [0]
+    with open(path, 'rb') as file:
+        for i in range(1, chunks):
+            position = size * i // chunks
+            if position <= starts[-1]:
+                continue
+            file.seek(position - 1)
+            # Reading from one byte earlier keeps a range that already starts on a line
+            file.readline()
+            position = file.tell()
+            if position >= size:
+                break
+            if position > starts[-1]:
+                starts.append(position)
+    return list(zip(starts, starts[1:] + [size]))
+
+
+# Parser reused by every chunk a worker process handles
+_chunk_parser = None
+
+
+def parse_chunk(task: tuple) -> tuple[int, list[tuple], tuple | None]:
+    """
+    Worker entry point: validate and parse-check the lines of one byte
+    range, with the same checks as load_stream. Blank lines are skipped;
+    checking stops at the first line that is invalid, cannot be parsed or
+    divides by a constant zero.
+
+    :param task: (path, start, end)
+    :return: lines read, (var_name, expression) for each valid line, and
+        (message, line) for the invalid line or None
+    """
+    global _chunk_parser
+    path, start, end = task
+    lines = 0
+    parsed = []
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while file.tell() < end:
+            line = file.readline().decode('utf-8')
+            lines += 1
+            if not line.strip():
+                continue
+            message, valid, name, expr, tokens = validate_line(line)
+            if valid:
+                if not parses(tokens):
+                    message = f"Expression could not be parsed: {line.strip()}"
+                elif not may_divide_by_zero(expr):
+                    parsed.append((name, expr))
+                    continue
+                else:
+                    if _chunk_parser is None:
+                        _chunk_parser = ExpressionParser()
+                    try:
+                        # Only folding the constants can find a division by zero
+                        _chunk_parser.parse(expr, tokens)
+                        parsed.append((name, expr))
+                        continue
+                    except ZeroDivisionError:
+                        message = f"Division by zero detected in expression: {line.strip()}"
+            return lines, parsed, (message, line.strip())
+    return lines, parsed, None
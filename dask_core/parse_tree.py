@@ -3,19 +3,90 @@ ParseTree class + methods (evaluate, print)
 """
 from dask_core.tree_node import TreeNode
 from dask_core.evaluator import Evaluator
-from features.optimiser import apply_identity_rules, apply_zero_rules
+from features.optimiser import apply_identity_rules, apply_zero_rules, apply_reassociation, share_common_subtrees
+
+
+# Evaluator used for constant folding
+_folder = Evaluator()
+
+
+def variables_of(root: TreeNode) -> set[str]:
+    """
+    Return the names of the variable leaves under root.
+    """
+    names = set()
+    stack = [root] if root is not None else []
+    while stack:
+        node = stack.pop()
+        if node.is_leaf():
+            if node.is_variable():
+                names.add(node.value)
+            continue
+        if node.left:
+            stack.append(node.left)
+        if node.right:
+            stack.append(node.right)
+    return names
+
+
+# Marks an optimised root that has not been computed yet
+PENDING = object()
+
+
 class ParseTree:
     def __init__(self, root=None):
         self.original_root = root
-        self.optimised_root = self.optimise()
+        self._compiled = None
+        self._optimised = PENDING
+
+    @property
+    def optimised_root(self) -> TreeNode:
+        """
+        The optimised tree, computed on first use and then cached.
+        """
+        if self._optimised is PENDING:
+            self.optimise()
+        return self._optimised
+
+    @optimised_root.setter
+    def optimised_root(self, root: TreeNode):
+        self._optimised = root
     
+    def evaluation_root(self) -> TreeNode:
+        return self.optimised_root if self.optimised_root is not None else self.original_root
+
     def evaluate(self, evaluator = Evaluator(), context = None):
-        root = self.optimised_root if self.optimised_root is not None else self.original_root
+        root = self.evaluation_root()
         if root is None:
             return None
         
         return evaluator.eval_node(root, context)
+
+    def compile(self, evaluator: Evaluator = None):
+        """
+        Compile the optimised root into a closure once and cache it on the tree.
+        The cache is keyed on the root, so re-optimising recompiles on next use.
+        The closures count cache hits on the evaluator that compiled them, so
+        passing a different evaluator recompiles too.
+        """
+        root = self.evaluation_root()
+        compiled = self._compiled
+        if compiled is None or compiled[0] is not root or (evaluator is not None and compiled[1] is not evaluator):
+            if evaluator is None:
+                evaluator = Evaluator()
+            self._compiled = compiled = (root, evaluator, evaluator.compile(root))
+        return compiled[2]
+
+    def evaluate_compiled(self, context = None):
+        return self.compile()(context, set())
     
+    def evaluate_batch(self, bindings: dict, evaluator = Evaluator(), context = None):
+        """
+        Evaluate the tree once over arrays of variable values (see Evaluator.eval_batch).
+        """
+        root = self.evaluation_root()
+        return evaluator.eval_batch(root, bindings, context)
+
     def print_rotated(self, node: TreeNode = None, level: int = 0):
         if node is None:
             node = self.original_root
@@ -37,59 +108,70 @@ class ParseTree:
         if node.left:
             self.printInOrder(node.left, level + 1)
 
-    def optimise(self, node: TreeNode = None):
-        evaluator = Evaluator()
-
-        def to_number(value):
-            return float(value) if isinstance(value, str) else float(value)
-
-        # Use post-order traversal to simplify each subtree
+    def optimise(self, node: TreeNode = None, memo: dict | None = None):
+        """
+        Simplify the tree bottom-up with constant folding, reassociation of
+        '+' and '*' chains that hold several constants, and the identity and
+        zero rules. Passes repeat until one changes nothing, then repeated
+        subtrees are merged (see share_common_subtrees). Unchanged subtrees
+        are shared with the original instead of copied, and memo makes
+        shared (hash-consed) subtrees optimise once, so a DAG stays a DAG.
+        """
         is_root_call = node is None
         if node is None:
             node = self.original_root
         if node is None:
             self.optimised_root = None
             return None
-        if is_root_call:
-            node = node.clone()
-
-        if node.left is not None:
-            node.left = self.optimise(node.left)
-        if node.right is not None:
-            node.right = self.optimise(node.right)
+        if memo is None:
+            memo = {}
 
+        result = memo.get(id(node))
+        if result is None:
+            result = self._optimise_node(node, memo)
+            memo[id(node)] = result
+        if is_root_call:
+            # A rebuilt chain can expose new folds; a pass that changes
+            # nothing returns the very same tree
+            while True:
+                again = self.optimise(result, {})
+                if again is result:
+                    break
+                result = again
+            result = share_common_subtrees(result)
+            self.optimised_root = result
+        return result
+
+    def _optimise_node(self, node: TreeNode, memo: dict) -> TreeNode:
+        # Use post-order traversal to simplify each subtree
         if node.is_leaf():
             return node
+        left = self.optimise(node.left, memo) if node.left is not None else None
+        right = self.optimise(node.right, memo) if node.right is not None else None
+        if left is not node.left or right is not node.right:
+            node = TreeNode(node.value, left, right, node.kind, node.number)
 
         if node.is_operator():
-            left = node.left
-            right = node.right
             left_is_num = left is not None and left.is_leaf() and left.is_number()
             right_is_num = right is not None and right.is_leaf() and right.is_number()
 
             # Constant folding (only when both are numbers)
             if left_is_num and right_is_num:
-                folded = evaluator._apply_operator(node.value, to_number(left.value), to_number(right.value))
-                result = TreeNode(folded)
-                if is_root_call:
-                    self.optimised_root = result
-                return result
+                return TreeNode(_folder._apply_operator(node.value, left.number, right.number))
+
+            # Gather the constants of +/* chains, e.g. (2+(X+3)) -> (X+5)
+            reassociated = apply_reassociation(node, _folder._apply_operator)
+            if reassociated is not None:
+                return reassociated
 
             # Identity and zero rules
-            identity_replacement = apply_identity_rules(node, left_is_num, right_is_num, to_number)
+            identity_replacement = apply_identity_rules(node, left_is_num, right_is_num)
             if identity_replacement is not None:
-                if is_root_call:
-                    self.optimised_root = identity_replacement
                 return identity_replacement
 
-            zero_replacement = apply_zero_rules(node, left_is_num, right_is_num, to_number)
+            zero_replacement = apply_zero_rules(node, left_is_num, right_is_num)
             if zero_replacement is not None:
-                if is_root_call:
-                    self.optimised_root = zero_replacement
                 return zero_replacement
-
-        if is_root_call:
-            self.optimised_root = node
         return node
     
     def display_optimised_root(self, node: TreeNode = None, level: int = 0):
@@ -105,7 +187,7 @@ class ParseTree:
 
     def count_x_variable(self, x, node: TreeNode = None):
         if node is None:
-            node = self.optimised_root if self.optimised_root is not None else self.original_root
+            node = self.evaluation_root()
         if node is None:
             return 0
 
@@ -117,6 +199,12 @@ class ParseTree:
 
         return count
 
+    def variables(self) -> set[str]:
+        """
+        Return the names of the variable leaves in the root used for evaluation.
+        """
+        return variables_of(self.evaluation_root())
+
     def to_expression(self, root: str = "original") -> str:
         """
         Convert the parse tree back into its infix string format.
@@ -1,40 +1,164 @@
 """
 Builds parse tree from tokens
 """
-from dask_core.lexer import tokenize
+from collections import OrderedDict
+from dask_core.lexer import iter_tokens, LPAREN, RPAREN
 from dask_core.parse_tree import ParseTree
+from dask_core.compact_tree import CompactParseTree, NodeArrays, SymbolTable, UNKNOWN_CODE
 from dask_core.data_structures.stack import Stack
-from dask_core.tree_node import TreeNode
+from dask_core.tree_node import TreeNode, NUMBER, VARIABLE, OPERATOR, normalize_number
+from dask_core.operators import OPERATORS, may_divide_by_zero
 class ExpressionParser:
     """
     ExpressionParser to turn a string (2+(4*5)) into a ParseTree
+
+    Parsed trees are kept in an LRU cache keyed by the expression text with
+    whitespace removed, so repeated right-hand sides share one ParseTree.
+    A cached tree only stores what follows from its text (the optimised
+    root, the compiled closure); state that depends on the variable or the
+    session, such as propagated constants, belongs on the DaskExpression.
     """
-    def __init__(self):
-        self.operators = ['+', '-', '*', '/', '++', '**', '//']
+    def __init__(self, cache_size: int = 4096, node_factory=None, compact: bool = False):
+        """
+        :param cache_size: most parsed trees to keep; 0 disables the cache
+        :param node_factory: optional NodeFactory; when given, nodes are
+            hash-consed so equal subtrees across expressions are shared
+        :param compact: build CompactParseTrees (parallel arrays) instead of TreeNodes
+        """
+        self.cache_size = cache_size
+        self.node_factory = node_factory
+        self.compact = compact
+        # Names and number spellings, and the arena holding the arrays, shared
+        # by every compact tree built here
+        self.symbols = SymbolTable()
+        self.arena = NodeArrays()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: OrderedDict[str, ParseTree] = OrderedDict()
+
+    def cache_info(self) -> dict:
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'size': len(self._cache),
+            'max_size': self.cache_size,
+        }
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    @property
+    def operators(self) -> list[str]:
+        return list(OPERATORS)
     
-    def parse(self, expr: str = None) -> ParseTree:
+    def parse(self, expr: str = None, tokens = None) -> ParseTree:
+        """
+        :param expr: DASK expression string
+        :param tokens: optional (kind, text, start, end) tokens already scanned
+            for expr; consumed lazily, so a generator works
+        """
         if expr is None:
             return None
-        
-        expr = tokenize(expr)
+
+        key = ''.join(expr.split())
+        tree = self._cache.get(key)
+        if tree is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return tree
+        tree = self._parse(expr, tokens)
+        if self.cache_size > 0:
+            self.cache_misses += 1
+            self._cache[key] = tree
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tree
+
+    def _parse(self, expr: str, tokens = None) -> ParseTree:
+        if tokens is None:
+            tokens = iter_tokens(expr)
+        if self.compact:
+            return self._parse_compact(tokens)
+        make = self.node_factory.make if self.node_factory is not None else TreeNode
 
         operator_stack = Stack()
         node_stack = Stack()
-        i = 0
-        while i < len(expr):
-            if expr[i] == '(':
+        for kind, text, _, _ in tokens:
+            if kind == LPAREN:
                 pass
-            elif expr[i] == ')':
+            elif kind == RPAREN:
                 operator = operator_stack.pop()
                 rightnode = node_stack.pop()
                 leftnode = node_stack.pop()
             
-                subtree = TreeNode(operator, leftnode, rightnode)
+                subtree = make(operator, leftnode, rightnode, OPERATOR)
                 node_stack.push(subtree)
-            elif expr[i] in self.operators:
-                operator_stack.push(expr[i])
+            elif kind == OPERATOR:
+                operator_stack.push(text)
+            elif kind == NUMBER:
+                node_stack.push(make(text, None, None, NUMBER, normalize_number(float(text))))
+            else:
+                node_stack.push(make(text))
+        tree = ParseTree(node_stack.pop())
+        if may_divide_by_zero(expr):
+            # Optimisation is otherwise left until first use; folding here
+            # raises ZeroDivisionError for a constant division by zero
+            tree.optimise()
+        return tree
+
+    def _parse_compact(self, tokens) -> CompactParseTree:
+        tree = CompactParseTree(self.symbols, self.arena)
+        try:
+            self._build_compact(tree, tokens)
+            tree.optimise()
+        except (IndexError, ZeroDivisionError):
+            # Nothing refers to a tree that failed to parse; reclaim its entries
+            self.arena.truncate(tree.start)
+            raise
+        return tree
+
+    def _build_compact(self, tree: CompactParseTree, tokens):
+        # Same shift/reduce as _parse, but the stacks hold arena indices
+        operator_stack = Stack()
+        node_stack = Stack()
+        for kind, text, _, _ in tokens:
+            if kind == LPAREN:
+                pass
+            elif kind == RPAREN:
+                operator = operator_stack.pop()
+                rightnode = node_stack.pop()
+                leftnode = node_stack.pop()
+                node_stack.push(tree.add_operator(operator, leftnode, rightnode))
+            elif kind == OPERATOR:
+                operator_stack.push(text)
+            elif kind == NUMBER:
+                node_stack.push(tree.add_number(text, float(text)))
+            elif kind == VARIABLE:
+                node_stack.push(tree.add_leaf(text))
             else:
-                node_stack.push(TreeNode(expr[i]))
-            i += 1
-        return ParseTree(node_stack.pop())
-            
\ No newline at end of file
+                node_stack.push(tree.add_leaf(text, UNKNOWN_CODE))
+        # Unreduced leftovers are dropped: only the last complete subtree is kept, as _parse does
+        tree.finish(node_stack.pop())
+
+
+def parses(tokens) -> bool:
+    """
+    Whether the shift/reduce parse of tokens completes, counting stack
+    depths instead of building nodes: every ')' needs an operator and two
+    operands. Lets a loader reject a line that validates but cannot be
+    parsed without paying for the tree.
+
+    :param tokens: (kind, text, start, end) tokens of a validated expression
+    """
+    operators = operands = 0
+    for kind, _, _, _ in tokens:
+        if kind == RPAREN:
+            if operators < 1 or operands < 2:
+                return False
+            operators -= 1
+            operands -= 1
+        elif kind == OPERATOR:
+            operators += 1
+        elif kind != LPAREN:
+            operands += 1
+    return operands > 0
@@ -0,0 +1,40 @@
+"""
+Compact tree encoding for passing trees between processes and to disk.
+
+A tree is encoded as the pre-order sequence of its node values, e.g.
+(2+(4*5)) -> ('+', '2', '*', '4', '5'). Operators are binary, so the
+shape is recovered from the values alone.
+"""
+from dask_core.tree_node import TreeNode, NUMBER, OPERATOR
+
+
+def encode_tree(root: TreeNode, numbers: bool = False) -> tuple:
+    """
+    Encode a tree as the pre-order tuple of its values (empty for None).
+
+    :param numbers: store number leaves as their numeric value rather than
+        as written, so readers need not convert them; decode_tree reads both
+    """
+    values = []
+    stack = [root] if root is not None else []
+    while stack:
+        node = stack.pop()
+        values.append(node.number if numbers and node.kind == NUMBER else node.value)
+        if node.kind == OPERATOR and not node.is_leaf():
+            stack.append(node.right)
+            stack.append(node.left)
+    return tuple(values)
+
+
+def decode_tree(values) -> TreeNode | None:
+    """
+    Rebuild a tree from encode_tree output.
+    """
+    stack = []
+    for value in reversed(values):
+        node = TreeNode(value)
+        if node.kind == OPERATOR:
+            node.left = stack.pop()
+            node.right = stack.pop()
+        stack.append(node)
+    return stack[-1] if stack else None
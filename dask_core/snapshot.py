@@ -0,0 +1,306 @@
+"""
+Binary session snapshots (save_snapshot / load_snapshot)
+
+Layout, little-endian:
+    header   magic, version, symbol count, expression count
+    symbols  per entry: tag (str, int, float, complex), byte length, payload
+    records  one fixed-size record per expression: name and expression
+             symbol ids, cached value, and (offset, length) spans for the
+             original and optimised trees (in pool) and dependencies (in links)
+    cycles   count, then per cycle: member count and member symbol ids
+    blocked  count, then the symbol ids of unresolvable variables
+    links    count, then the symbol ids of every dependency list, back to back
+    pool     uint32 symbol ids of the pre-order encoded trees
+
+Loading maps the file with mmap and reads only the symbols and records up
+front; each tree is decoded the first time it is used.
+"""
+import mmap
+import struct
+import sys
+from array import array
+from sys import intern
+
+from dask_core.expression import DaskExpression
+from dask_core.gc_pause import paused_collection
+from dask_core.parse_tree import ParseTree, PENDING
+from dask_core.serialise import encode_tree, decode_tree
+
+MAGIC = b'DASKSNAP'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sHII')
+_SYMBOL = struct.Struct('<BI')
+_RECORD = struct.Struct('<IIBdqQIQIQI')
+_COUNT = struct.Struct('<I')
+
+# Symbol tags
+_STR, _INT, _FLOAT, _COMPLEX = 0, 1, 2, 3
+# Value tags
+_NONE, _FLOAT_VALUE, _INT_VALUE, _BIG_INT_VALUE, _COMPLEX_VALUE = 0, 1, 2, 3, 4
+
+
+class SnapshotError(Exception):
+    """Exception raised for files that are not snapshots of a supported version"""
+    pass
+
+
+class _SymbolWriter:
+    def __init__(self):
+        self.ids = {}
+        self.entries = []
+
+    def add(self, value) -> int:
+        # type(value) keeps 1, 1.0 and '1' apart
+        key = (type(value), value)
+        symbol = self.ids.get(key)
+        if symbol is None:
+            symbol = self.ids[key] = len(self.entries)
+            self.entries.append(value)
+        return symbol
+
+    def encode(self) -> bytes:
+        parts = []
+        for value in self.entries:
+            if isinstance(value, str):
+                tag, payload = _STR, value.encode('utf-8')
+            elif isinstance(value, bool) or isinstance(value, int):
+                tag, payload = _INT, str(int(value)).encode('ascii')
+            elif isinstance(value, float):
+                tag, payload = _FLOAT, struct.pack('<d', value)
+            elif isinstance(value, complex):
+                tag, payload = _COMPLEX, repr(value).encode('ascii')
+            else:
+                raise TypeError(f"Cannot store {value!r} in a snapshot")
+            parts.append(_SYMBOL.pack(tag, len(payload)))
+            parts.append(payload)
+        return b''.join(parts)
+
+
+def save_snapshot(manager, path):
+    """
+    Write manager's expressions, trees, cached values and cycle analysis to
+    path. Dirty variables are evaluated first so every stored value is current.
+    """
+    manager.evaluate_dirty()
+    symbols = _SymbolWriter()
+    pool = array('I')
+    links = array('I')
+
+    def store(values, ids: array = pool) -> tuple[int, int]:
+        offset = len(ids)
+        ids.extend(symbols.add(value) for value in values)
+        return offset, len(ids) - offset
+
+    records = []
+    for name, expression in manager.expressions.items():
+        parse_tree = expression.parse_tree
+        original = optimised = (0, 0)
+        if parse_tree is not None:
+            original_root = parse_tree.original_root
+            optimised_root = parse_tree.optimised_root
+            original = store(encode_tree(original_root))
+            # An unchanged tree is stored once and shared again on load
+            optimised = original if optimised_root is original_root else store(encode_tree(optimised_root))
+        dependencies = store(sorted(manager.dependencies.get(name, ())), links)
+        records.append(_RECORD.pack(
+            symbols.add(name), symbols.add(expression.expression),
+            *_encode_value(expression.value, symbols),
+            *original, *optimised, *dependencies,
+        ))
+
+    tail = [_COUNT.pack(len(manager.cycles))]
+    for members in manager.cycles:
+        tail.append(_COUNT.pack(len(members)))
+        tail.append(array('I', (symbols.add(member) for member in members)).tobytes())
+    blocked = sorted(manager.unresolvable)
+    tail.append(_COUNT.pack(len(blocked)))
+    tail.append(array('I', (symbols.add(name) for name in blocked)).tobytes())
+    tail.append(_COUNT.pack(len(links)))
+    tail.append(links.tobytes())
+
+    if pool.itemsize != 4 or sys.byteorder != 'little':
+        raise SnapshotError("Snapshots need 4-byte little-endian unsigned ints")
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, len(symbols.entries), len(records)))
+        file.write(symbols.encode())
+        file.write(b''.join(records))
+        file.write(b''.join(tail))
+        file.write(pool.tobytes())
+
+
+def _encode_value(value, symbols: _SymbolWriter) -> tuple[int, float, int]:
+    if value is None:
+        return _NONE, 0.0, 0
+    if isinstance(value, float):
+        return _FLOAT_VALUE, value, 0
+    if isinstance(value, int):
+        if -2**63 <= value < 2**63:
+            return _INT_VALUE, 0.0, value
+        return _BIG_INT_VALUE, 0.0, symbols.add(str(value))
+    if isinstance(value, complex):
+        return _COMPLEX_VALUE, 0.0, symbols.add(repr(value))
+    raise TypeError(f"Cannot store value {value!r} in a snapshot")
+
+
+class Snapshot:
+    """
+    An open, memory-mapped snapshot file that trees are decoded from.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, symbol_count, self.expression_count = _HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotError(f"{path} is not a version {VERSION} DASK snapshot")
+        self.symbols, position = self._read_symbols(_HEADER.size, symbol_count)
+        self.records_at = position
+        position += _RECORD.size * self.expression_count
+
+        self.cycles = []
+        (cycle_count,) = _COUNT.unpack_from(self.map, position)
+        position += _COUNT.size
+        for _ in range(cycle_count):
+            members, position = self._read_ids(position)
+            self.cycles.append(members)
+        self.unresolvable, position = self._read_ids(position)
+        # Dependency lists are all needed at load, so they are read in one go
+        (link_count,) = _COUNT.unpack_from(self.map, position)
+        position += _COUNT.size
+        self.links = array('I', self.map[position:position + 4 * link_count])
+        self.pool_at = position + 4 * link_count
+
+    def _read_symbols(self, position: int, count: int) -> tuple[list, int]:
+        data = self.map
+        symbols = []
+        for _ in range(count):
+            tag, length = _SYMBOL.unpack_from(data, position)
+            position += _SYMBOL.size
+            payload = data[position:position + length]
+            position += length
+            if tag == _STR:
+                symbols.append(intern(payload.decode('utf-8')))
+            elif tag == _INT:
+                symbols.append(int(payload))
+            elif tag == _FLOAT:
+                symbols.append(struct.unpack('<d', payload)[0])
+            else:
+                symbols.append(complex(payload.decode('ascii')))
+        return symbols, position
+
+    def _read_ids(self, position: int) -> tuple[list, int]:
+        (count,) = _COUNT.unpack_from(self.map, position)
+        position += _COUNT.size
+        ids = array('I', self.map[position:position + 4 * count])
+        return [self.symbols[symbol] for symbol in ids], position + 4 * count
+
+    def values(self, offset: int, length: int) -> list:
+        start = self.pool_at + 4 * offset
+        ids = array('I', self.map[start:start + 4 * length])
+        symbols = self.symbols
+        return [symbols[symbol] for symbol in ids]
+
+    def decode(self, offset: int, length: int):
+        return decode_tree(self.values(offset, length)) if length else None
+
+    def records(self):
+        """
+        Yield (name, expression, value, original span, optimised span, dependencies).
+        """
+        symbols = self.symbols
+        links = self.links
+        end = self.records_at + _RECORD.size * self.expression_count
+        view = memoryview(self.map)[self.records_at:end]
+        try:
+            for (name, expression, tag, real, integer,
+                 original_at, original_len, optimised_at, optimised_len,
+                 dependencies_at, dependencies_len) in _RECORD.iter_unpack(view):
+                if tag == _NONE:
+                    value = None
+                elif tag == _FLOAT_VALUE:
+                    value = real
+                elif tag == _INT_VALUE:
+                    value = integer
+                elif tag == _BIG_INT_VALUE:
+                    value = int(symbols[integer])
+                else:
+                    value = complex(symbols[integer])
+                yield (symbols[name], symbols[expression], value,
+                       (original_at, original_len), (optimised_at, optimised_len),
+                       [symbols[symbol] for symbol in links[dependencies_at:dependencies_at + dependencies_len]])
+        finally:
+            view.release()
+
+
+class SnapshotParseTree(ParseTree):
+    """
+    ParseTree whose roots are decoded from a snapshot the first time they
+    are used. Assigning a root (e.g. re-optimising) works as usual.
+    """
+
+    def __init__(self, snapshot: Snapshot, original: tuple[int, int], optimised: tuple[int, int]):
+        self._snapshot = snapshot
+        self._spans = (original, optimised)
+        self._original = PENDING
+        self._optimised = PENDING
+        self._compiled = None
+
+    @property
+    def original_root(self):
+        if self._original is PENDING:
+            self._original = self._snapshot.decode(*self._spans[0])
+            if self._spans[1] == self._spans[0] and self._optimised is PENDING:
+                self._optimised = self._original
+        return self._original
+
+    @original_root.setter
+    def original_root(self, root):
+        self._original = root
+
+    @property
+    def optimised_root(self):
+        if self._optimised is PENDING:
+            if self._spans[1] == self._spans[0]:
+                self._optimised = self.original_root
+            else:
+                self._optimised = self._snapshot.decode(*self._spans[1])
+        return self._optimised
+
+    @optimised_root.setter
+    def optimised_root(self, root):
+        self._optimised = root
+
+
+def load_snapshot(manager, path) -> Snapshot:
+    """
+    Replace manager's session with the one stored at path. Values, the
+    dependency graph and the cycle analysis come from the file, so nothing
+    is parsed or evaluated; trees are decoded on first use.
+    """
+    expressions = {}
+    dependencies = {}
+    dependents = {}
+    with paused_collection():
+        snapshot = Snapshot(path)
+        for name, text, value, original, optimised, references in snapshot.records():
+            expression = DaskExpression(name, text, SnapshotParseTree(snapshot, original, optimised), session=manager)
+            expression.value = value
+            expressions[name] = expression
+            dependencies[name] = set(references)
+            for reference in references:
+                dependents.setdefault(reference, set()).add(name)
+
+    manager.expressions = expressions
+    manager.dependencies = dependencies
+    manager.dependents = dependents
+    manager.dirty = set()
+    manager.cycles = snapshot.cycles
+    manager.unresolvable = set(snapshot.unresolvable)
+    manager._cycles_stale = False
+    manager._propagated = set()
+    manager.propagated_roots = {}
+    manager.compiled_roots = {}
+    manager.read_cache = {}
+    manager.encoded_roots = {}
+    return snapshot
@@ -1,36 +1,88 @@
 """
 TreeNode class (left, right, value/operator)
 """
+import re
+from sys import intern
+from dask_core.operators import OPERATORS
+
+# Node kinds, decided once when the value is set
+NUMBER = 'number'
+VARIABLE = 'variable'
+OPERATOR = 'operator'
+
+NUMBER_RE = re.compile(r'(\d+(\.\d*)?|\.\d+)$')
+
+
+def normalize_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def classify(value) -> tuple:
+    """
+    Classify a node value.
+
+    Returns:
+        tuple: kind (NUMBER, VARIABLE, OPERATOR or None), numeric value for NUMBER leaves
+    """
+    if isinstance(value, (int, float)):
+        return NUMBER, normalize_number(value)
+    if isinstance(value, str):
+        if value in OPERATORS:
+            return OPERATOR, None
+        if NUMBER_RE.fullmatch(value):
+            return NUMBER, normalize_number(float(value))
+        if value.replace("_", "").isalpha():
+            return VARIABLE, None
+    return None, None
+
+
 class TreeNode:
-    def __init__(self, value=None, left=None, right=None):
-        self.value: str = value
+    # No per-node __dict__; string values (names, operators) are interned so
+    # every node spelling the same name shares one string
+    __slots__ = ('left', 'right', '_value', 'kind', 'number')
+
+    def __init__(self, value=None, left=None, right=None, kind=None, number=None):
         self.left: TreeNode = left
         self.right: TreeNode = right
+        if kind is None:
+            self.value = value
+        else:
+            self._value = intern(value) if type(value) is str else value
+            self.kind = kind
+            self.number = number
+
+    @property
+    def value(self) -> str:
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = intern(value) if type(value) is str else value
+        self.kind, self.number = classify(value)
 
     def is_leaf(self):
         return self.left is None and self.right is None
-    
+
     def is_operator(self):
-        return self.value in {"+", "-", "*", "/", "**", "++", "//"}
+        return self.kind == OPERATOR
 
     def is_number(self):
-        num = isinstance(self.value, (int, float))
-        if isinstance(self.value, str):
-            try:
-                float(self.value)
-                num_str = True
-            except ValueError:
-                num_str = False
-        else:
-            num_str = False
-        return num or num_str
-    
+        return self.kind == NUMBER
+
     def is_variable(self):
-        if isinstance(self.value, str):
-            return self.value.replace("_", "").isalpha()
-        return False
+        return self.kind == VARIABLE
 
     def clone(self):
         left_clone = self.left.clone() if self.left else None
         right_clone = self.right.clone() if self.right else None
-        return TreeNode(self.value, left_clone, right_clone)
+        return TreeNode(self._value, left_clone, right_clone, self.kind, self.number)
+
+
+class SharedNode(TreeNode):
+    """
+    An operator node reached through more than one parent once common
+    subexpressions are eliminated. Evaluators compute it once per evaluation.
+    """
+    __slots__ = ()
@@ -0,0 +1,205 @@
+"""
+Single-pass validation of "name=expression" lines
+
+validate_line scans a line once with the lexer's master regex, records
+every fact the checks need as it goes, then reports the first failing
+check in the same order (and with the same messages) as the original
+multi-pass validator. The tokens of the expression are returned too, so
+the parser does not scan the line again.
+"""
+from dask_core.lexer import _master_pattern, _FIRST_CHAR_KINDS, LPAREN, RPAREN, UNKNOWN
+from dask_core.operators import OPERATORS
+from dask_core.tree_node import NUMBER, VARIABLE, OPERATOR
+
+MISSING_EQUALS = "*Missing '=' sign in expression. Please re enter the expression*"
+MULTIPLE_EQUALS = "*Multiple '=' signs in expression. Please re enter the expression*"
+MISMATCHED_PARENTHESES = "*Mismatched parentheses in expression. Please re enter the expression*"
+EMPTY_PARENTHESES = "*Empty parentheses in expression. Please re enter the expression*"
+INVALID_CHARACTER = "*Invalid character '{}' in expression. Please re enter the expression*"
+INVALID_NAME = "*Invalid variable name. Please re enter the expression*"
+ENDS_WITH_OPERATOR = "*Expression cannot end with an operator. Please re enter the expression*"
+STARTS_WITH_OPERATOR = "*Expression cannot start with an operator. Please re enter the expression*"
+NEGATIVE_NUMBER = "*Negative numbers are not allowed. Please re enter the expression*"
+INVALID_NUMBER = "*Invalid number format. Please re enter the expression*"
+EMPTY_EXPRESSION = "*Expression cannot be empty. Please re enter the expression*"
+MISSING_OPERATOR = "*Enter a valid expression with an operator*"
+
+_ASCII_DIGITS = '0123456789'
+# Characters after which '-' followed by a number reads as a negative number
+_NEGATIVE_PREFIX = '=(*/+'
+
+_allowed_chars = None
+_allowed_for = None
+
+
+def _allowed() -> tuple[frozenset, frozenset]:
+    """
+    (characters allowed outside letters, characters used by operators),
+    rebuilt when the operator registry changes.
+    """
+    global _allowed_chars, _allowed_for
+    operators = tuple(OPERATORS)
+    if operators != _allowed_for:
+        operator_chars = frozenset(''.join(operators))
+        _allowed_chars = (frozenset(_ASCII_DIGITS + '()=.') | operator_chars, operator_chars)
+        _allowed_for = operators
+    return _allowed_chars
+
+
+def _invalid(message: str) -> tuple:
+    return message, False, '', '', []
+
+
+def validate_line(line: str) -> tuple:
+    """
+    Validate a DASK assignment line in one scan.
+
+    Returns:
+        tuple: error message, boolean of whether valid, var_name,
+            var_expression, and the expression's (kind, text, start, end)
+            tokens with offsets into var_expression
+    """
+    allowed_chars, operator_chars = _allowed()
+    first_char_kinds = _FIRST_CHAR_KINDS
+    operators = OPERATORS
+    line = line.strip()
+
+    # Whole line
+    equals_at = -1           # chunk index of the first '='
+    equals_count = 0
+    open_count = close_count = 0
+    empty_parentheses = False
+    after_open = False       # only whitespace since the last '('
+    invalid_char = None
+    # Right-hand side; reset when the '=' is reached
+    tokens = []
+    start = 0
+    has_operator = False
+    has_open = has_close = False
+    last_significant = ''    # last chunk that is not ')'
+    negative = False
+    minus_pending = False    # previous chunk ended in a '-' that followed _NEGATIVE_PREFIX
+    previous_char = '='
+    previous_numeric = False
+    bad_number = False
+
+    chunks = _master_pattern().findall(line)
+    for text in chunks:
+        first = text[0]
+        kind = first_char_kinds.get(first)
+        if minus_pending:
+            negative = negative or first in _ASCII_DIGITS or first == '.'
+            minus_pending = False
+
+        if kind is None:
+            # Operators, '=' and stray characters
+            if first == '=':
+                equals_count += 1
+                if equals_at < 0:
+                    # Chunks before it; any whitespace chunk skipped here already made the line invalid
+                    equals_at = len(tokens)
+                    tokens = []
+                    start = 0
+                    has_operator = has_open = has_close = negative = bad_number = False
+                    last_significant = ''
+                    previous_char = '='
+                    previous_numeric = False
+                after_open = False
+                continue
+            if text.isspace():
+                if invalid_char is None:
+                    invalid_char = first
+                continue
+            after_open = False
+            if text in operators:
+                kind = OPERATOR
+                has_operator = True
+            else:
+                kind = UNKNOWN
+            if invalid_char is None:
+                for char in text:
+                    if char not in allowed_chars and not char.isalpha():
+                        invalid_char = char
+                        break
+            if '-' in text:
+                for j, char in enumerate(text):
+                    if char == '-' and (text[j - 1] if j else previous_char) in _NEGATIVE_PREFIX:
+                        if j + 1 < len(text):
+                            negative = negative or text[j + 1] in _ASCII_DIGITS or text[j + 1] == '.'
+                        else:
+                            minus_pending = True
+            previous_numeric = False
+        elif kind == VARIABLE:
+            after_open = False
+            if invalid_char is None and '_' in text:
+                invalid_char = '_'
+            previous_numeric = False
+        elif kind == NUMBER:
+            after_open = False
+            # A run of digits and dots must be exactly one number token
+            if previous_numeric or text == '.':
+                bad_number = True
+            previous_numeric = True
+            if text == '.':
+                kind = UNKNOWN
+            elif invalid_char is None and not text.isascii():
+                # \d also matches non-ASCII digits, which are not allowed
+                invalid_char = next(char for char in text if char not in allowed_chars)
+        elif kind == LPAREN:
+            open_count += 1
+            after_open = True
+            has_open = True
+            previous_numeric = False
+        elif kind == RPAREN:
+            close_count += 1
+            if after_open:
+                empty_parentheses = True
+            after_open = False
+            has_close = True
+            previous_numeric = False
+        else:
+            # Whitespace
+            if invalid_char is None:
+                invalid_char = first
+            continue
+
+        if kind != RPAREN:
+            last_significant = text
+        previous_char = text[-1]
+        end = start + len(text)
+        tokens.append((kind, text, start, end))
+        start = end
+
+    if equals_count == 0:
+        return _invalid(MISSING_EQUALS)
+    if equals_count > 1:
+        return _invalid(MULTIPLE_EQUALS)
+    if open_count != close_count:
+        return _invalid(MISMATCHED_PARENTHESES)
+    if empty_parentheses:
+        return _invalid(EMPTY_PARENTHESES)
+    if invalid_char is not None:
+        return _invalid(INVALID_CHARACTER.format(invalid_char))
+
+    # From here the line holds no whitespace (and \d matched ASCII digits
+    # only), so the chunks split cleanly at the '='
+    if equals_at != 1 or first_char_kinds.get(chunks[0][0]) != VARIABLE:
+        return _invalid(INVALID_NAME)
+    name = chunks[0]
+    expr = line[len(name) + 1:]
+
+    if last_significant and last_significant[-1] in operator_chars:
+        return _invalid(ENDS_WITH_OPERATOR)
+    if expr and expr[0] in operator_chars:
+        return _invalid(STARTS_WITH_OPERATOR)
+    if negative:
+        return _invalid(NEGATIVE_NUMBER)
+    if bad_number:
+        return _invalid(INVALID_NUMBER)
+    if not expr:
+        return _invalid(EMPTY_EXPRESSION)
+    if not has_operator and not any(op in expr for op in operators):
+        return _invalid(MISSING_OPERATOR)
+    if not has_open or not has_close:
+        return _invalid(EMPTY_PARENTHESES)
+    return '', True, name, expr, tokens
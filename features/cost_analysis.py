@@ -5,16 +5,23 @@ Metrics:
     operator_count: internal operator nodes
     leaf_count: numbers + variables
     tree_height / max_depth
+    distinct_nodes: nodes left once equal operator subtrees are merged
+    cse_removed_nodes: optimised nodes removed by common subexpression elimination
     weighted op cost: 
             +, - -> 1
             *, / -> 2
             ** -> 3
             ++, // -> 3 (summative is heavier)
         not true runtime, just a relative cost model 
+        (weights are the cost entries in dask_core.operators)
 """
+from array import array
 
-from dask_core.tree_node import TreeNode
+from dask_core.tree_node import TreeNode, NUMBER, normalize_number
 from dask_core.parse_tree import ParseTree
+from dask_core.compact_tree import CompactParseTree, NodeArrays, NUMBER_CODE
+from features.optimiser import leaf_key
+from dask_core.operators import OPERATORS
 
 class CostAnalyser:
     def __init__(self, tree: ParseTree = None):
@@ -26,17 +33,25 @@ class CostAnalyser:
             ('total_nodes', 'count_nodes', 'all'),
             ('operator_nodes', 'count_nodes', 'operator'),
             ('leaf_nodes', 'count_nodes', 'leaf'),
+            ('distinct_nodes', 'count_distinct_nodes'),
             ('tree_height', 'count_tree_height'),
             ('weighted_op_cost', 'count_weighted_op_cost'),
         ]
         
         # Compute metrics for both roots
         for root_type in ['original', 'optimised']:
-            root = getattr(self.tree, f'{root_type}_root')
+            if isinstance(self.tree, CompactParseTree):
+                # Walk the arrays directly instead of building TreeNodes
+                root = getattr(self.tree, root_type)
+            else:
+                root = getattr(self.tree, f'{root_type}_root')
             for suffix, method_name, *args in metrics:
                 key = f'{root_type}_{suffix}'
                 method = getattr(self, method_name)
                 self.statistics[key] = method(root, *args)
+        self.statistics['cse_removed_nodes'] = (
+            self.statistics['optimised_total_nodes'] - self.statistics['optimised_distinct_nodes']
+        )
 
     def count_nodes(self, root: TreeNode, count_type: str = "all") -> int:
         """
@@ -49,6 +64,8 @@ class CostAnalyser:
         """
         if root is None:
             return 0
+        if isinstance(root, NodeArrays):
+            return self._count_array_nodes(root, count_type)
 
         match count_type:
             case "all":
@@ -66,12 +83,66 @@ class CostAnalyser:
             count += self.count_nodes(root.right, count_type)
         return count
 
+    def count_distinct_nodes(self, root: TreeNode) -> int:
+        """
+        Count nodes with each distinct operator subtree counted once, with
+        its leaf children (see share_common_subtrees). Subtrees are compared
+        by structure, so the count is the same for shared and copied subtrees.
+        """
+        if root is None:
+            return 0
+        ids = {}  # operator subtree key -> small int
+        count = 0
+        if isinstance(root, NodeArrays):
+            keys = []
+            for i, code in enumerate(root.codes):
+                if code < 0:
+                    # Same keys as leaf_key(): numbers by value, names by symbol id
+                    if code == NUMBER_CODE:
+                        keys.append((NUMBER, normalize_number(root.numbers[i])))
+                    else:
+                        keys.append((code, root.symbols[i]))
+                    continue
+                key = (code, keys[root.left[i]], keys[root.right[i]])
+                if key not in ids:
+                    ids[key] = len(ids)
+                    count += 1 + isinstance(key[1], tuple) + isinstance(key[2], tuple)
+                keys.append(ids[key])
+            return count if ids else len(root)
+
+        keys = {}  # id(node) -> key
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in keys:
+                continue
+            if node.is_leaf():
+                keys[id(node)] = leaf_key(node)
+                continue
+            if not expanded:
+                stack.append((node, True))
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+                continue
+            key = (node.value, keys[id(node.left)], keys[id(node.right)])
+            if key not in ids:
+                ids[key] = len(ids)
+                count += 1 + isinstance(key[1], tuple) + isinstance(key[2], tuple)
+            keys[id(node)] = ids[key]
+        return count if ids else 1
+
     def count_tree_height(self, root: TreeNode) -> int:
         """
         Measure the height (max depth) of a tree.
         """
         if root is None:
             return 0
+        if isinstance(root, NodeArrays):
+            # Post-order: children are measured before their parent
+            heights = array('i')
+            for i, code in enumerate(root.codes):
+                heights.append(1 + max(heights[root.left[i]], heights[root.right[i]]) if code >= 0 else 1)
+            return heights[-1] if heights else 0
         left_height = self.count_tree_height(root.left)
         right_height = self.count_tree_height(root.right)
         return 1 + max(left_height, right_height)
@@ -79,19 +150,24 @@ class CostAnalyser:
     def count_weighted_op_cost(self, root: TreeNode) -> int:
         if root is None:
             return 0
+        if isinstance(root, NodeArrays):
+            costs = [operator.cost for operator in OPERATORS.values()]
+            return sum(costs[code] for code in root.codes if code >= 0)
         
         left_cost = self.count_weighted_op_cost(root.left) if root.left else 0
         right_cost = self.count_weighted_op_cost(root.right) if root.right else 0
 
         if root.is_operator():
-            match root.value:
-                case '+' | '-':
-                    return 1 + left_cost + right_cost
-                case '*' | '/':
-                    return 2 + left_cost + right_cost
-                case '**':
-                    return 3 + left_cost + right_cost
-                case '++' | '//':
-                    return 3 + left_cost + right_cost
-            return left_cost + right_cost
-        return left_cost + right_cost
\ No newline at end of file
+            return OPERATORS[root.value].cost + left_cost + right_cost
+        return left_cost + right_cost
+
+    def _count_array_nodes(self, root: NodeArrays, count_type: str) -> int:
+        match count_type:
+            case "all":
+                return len(root)
+            case "operator":
+                return sum(1 for code in root.codes if code >= 0)
+            case "leaf":
+                return sum(1 for code in root.codes if code < 0)
+            case _:
+                raise ValueError(f"Unknown count_type: {count_type}")
@@ -2,6 +2,8 @@
 *Scope*
 Supported Operators: + , - , * , / , **
 Unsupported Operators: ++ , //
+(rules come from the derivative entries in dask_core.operators; operators
+registered without one are unsupported)
 
 Only differentiation w.r.t. one variable
 Power rule only when exponent is a constant number
@@ -11,17 +13,21 @@ Derivatives are stored as a new variable
 """
 from dask_core.tree_node import TreeNode
 from dask_core.parse_tree import ParseTree
+from dask_core.operators import OPERATORS, UnsupportedOperatorError
 
-class UnsupportedOperatorError(Exception):
-    """Exception raised for unsupported operators (++, //) in differentiation function"""
-    pass
 
-def _is_constant(node: TreeNode) -> bool:
-    return node is not None and node.is_leaf() and node.is_number()
+class _NotDifferentiable(Exception):
+    """Raised inside a derivative rule when a subtree has no derivative"""
+    pass
 
 
-def _constant_value(node: TreeNode) -> float:
-    return float(node.value)
+def _apply_rule(node: TreeNode, diff):
+    if not node.is_operator():
+        raise ValueError("Non-leaf is not an operator.")
+    operator = OPERATORS[node.value]
+    if operator.derivative is None:
+        raise UnsupportedOperatorError(f"{node.value} is not supported for differentation.")
+    return operator.derivative(node.left, node.right, diff)
 
 
 def _differentiate_node(node: TreeNode, wrt: str):
@@ -36,73 +42,18 @@ def _differentiate_node(node: TreeNode, wrt: str):
             return TreeNode(1 if node.value == wrt else 0)
         return None
 
-    if not node.is_operator():
-        raise ValueError("Non-leaf is not an operator.")
-
-    op = node.value
-    left = node.left
-    right = node.right
-
-    # Unsupported operators
-    if op in {"++", "//"}:
-        raise UnsupportedOperatorError("++ and // are not supported for differentation.")
+    def diff(child: TreeNode):
+        result = _differentiate_node(child, wrt)
+        if result is None:
+            raise _NotDifferentiable()
+        return result
 
-    # Recursive rules
-    if op == "+":
-        left_d = _differentiate_node(left, wrt)
-        right_d = _differentiate_node(right, wrt)
-        if left_d is None or right_d is None:
-            return None
-        result = TreeNode("+", left_d, right_d)
-    elif op == "-":
-        left_d = _differentiate_node(left, wrt)
-        right_d = _differentiate_node(right, wrt)
-        if left_d is None or right_d is None:
-            return None
-        result = TreeNode("-", left_d, right_d)
-    elif op == "*":
-        # Product rule: (u*v)' = u'*v + u*v'
-        left_d = _differentiate_node(left, wrt)
-        right_d = _differentiate_node(right, wrt)
-        if left_d is None or right_d is None:
-            return None
-        result = TreeNode(
-            "+",
-            TreeNode("*", left_d, right),
-            TreeNode("*", left, right_d),
-        )
-    elif op == "/":
-        # Quotient rule: (u/v)' = (u'*v - u*v') / v**2
-        left_d = _differentiate_node(left, wrt)
-        right_d = _differentiate_node(right, wrt)
-        if left_d is None or right_d is None:
-            return None
-        numerator = TreeNode(
-            "-",
-            TreeNode("*", left_d, right),
-            TreeNode("*", left, right_d),
-        )
-        denominator = TreeNode("**", right, TreeNode(2))
-        result = TreeNode("/", numerator, denominator)
-    elif op == "**":
-        # Power rule only when exponent is a constant number
-        if _is_constant(right):
-            n = _constant_value(right)
-            left_d = _differentiate_node(left, wrt)
-            if left_d is None:
-                return None
-            result = TreeNode(
-                "*",
-                TreeNode(n),
-                TreeNode("*", TreeNode("**", left, TreeNode(n - 1)), left_d),
-            )
-        else:
-            raise UnsupportedOperatorError("Power rule only supports constant exponents.")
-    else:
+    # Recursive rules come from the operator registry
+    try:
+        return _apply_rule(node, diff)
+    except _NotDifferentiable:
         return None
 
-    return result
-
 
 def differentiate(node: TreeNode, wrt: str):
     """
@@ -147,51 +98,7 @@ def differentiate_with_trace(node: TreeNode, wrt: str):
                 snapshot(result)
                 return result
             return None
-        if not n.is_operator():
-            raise ValueError("Non-leaf is not an operator.")
-        if n.value in {"++", "//"}:
-            raise UnsupportedOperatorError("++ and // are not supported for differentation.")
-
-        op = n.value
-        left = n.left
-        right = n.right
-
-        if op == "+":
-            result = TreeNode("+", _diff(left), _diff(right))
-        elif op == "-":
-            result = TreeNode("-", _diff(left), _diff(right))
-        elif op == "*":
-            left_d = _diff(left)
-            right_d = _diff(right)
-            result = TreeNode(
-                "+",
-                TreeNode("*", left_d, right),
-                TreeNode("*", left, right_d),
-            )
-        elif op == "/":
-            left_d = _diff(left)
-            right_d = _diff(right)
-            numerator = TreeNode(
-                "-",
-                TreeNode("*", left_d, right),
-                TreeNode("*", left, right_d),
-            )
-            denominator = TreeNode("**", right, TreeNode(2))
-            result = TreeNode("/", numerator, denominator)
-        elif op == "**":
-            if _is_constant(right):
-                n_val = _constant_value(right)
-                left_d = _diff(left)
-                result = TreeNode(
-                    "*",
-                    TreeNode(n_val),
-                    TreeNode("*", TreeNode("**", left, TreeNode(n_val - 1)), left_d),
-                )
-            else:
-                raise UnsupportedOperatorError("Power rule only supports constant exponents.")
-        else:
-            return None
-
+        result = _apply_rule(n, _diff)
         snapshot(result)
         return result
 
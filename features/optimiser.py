@@ -2,37 +2,212 @@
 Expression Optimisation Engine
 """
 
-from dask_core.tree_node import TreeNode
+from dask_core.tree_node import TreeNode, SharedNode, NUMBER, normalize_number
 
 
-def apply_identity_rules(node: TreeNode, left_is_num: bool, right_is_num: bool, to_number):
+def apply_identity_rules(node: TreeNode, left_is_num: bool, right_is_num: bool):
     if node.value == '+':
-        if right_is_num and to_number(node.right.value) == 0:
+        if right_is_num and node.right.number == 0:
             return node.left
-        if left_is_num and to_number(node.left.value) == 0:
+        if left_is_num and node.left.number == 0:
             return node.right
     if node.value == '*':
-        if left_is_num and to_number(node.left.value) == 1:
+        if left_is_num and node.left.number == 1:
             return node.right
-        if right_is_num and to_number(node.right.value) == 1:
+        if right_is_num and node.right.number == 1:
             return node.left
     if node.value == '/':
-        if right_is_num and to_number(node.right.value) == 1:
+        if right_is_num and node.right.number == 1:
             return node.left
     if node.value == '**':
-        if right_is_num and to_number(node.right.value) == 1:
+        if right_is_num and node.right.number == 1:
             return node.left
-        if right_is_num and to_number(node.right.value) == 0:
+        if right_is_num and node.right.number == 0:
             return TreeNode(1)
     return None
 
 
-def apply_zero_rules(node: TreeNode, left_is_num: bool, right_is_num: bool, to_number):
+def apply_zero_rules(node: TreeNode, left_is_num: bool, right_is_num: bool):
     if node.value == '*':
-        if (left_is_num and to_number(node.left.value) == 0) or (right_is_num and to_number(node.right.value) == 0):
+        if (left_is_num and node.left.number == 0) or (right_is_num and node.right.number == 0):
             return TreeNode(0)
     if node.value == '/':
-        if left_is_num and to_number(node.left.value) == 0:
-            if right_is_num and to_number(node.right.value) != 0:
+        if left_is_num and node.left.number == 0:
+            if right_is_num and node.right.number != 0:
                 return TreeNode(0)
     return None
+
+
+# Operators whose chains may be flattened and their constants gathered
+ASSOCIATIVE_OPERATORS = ('+', '*')
+
+
+def collect_chain(left, right, chain_of) -> list:
+    """
+    Return, left to right, the operands of the chain formed by left and
+    right under one associative operator.
+
+    :param chain_of: function(operand) -> (left, right) when operand is a
+        node of the same operator, else None
+    """
+    operands = []
+    stack = [right, left]
+    while stack:
+        operand = stack.pop()
+        children = chain_of(operand)
+        if children is None:
+            operands.append(operand)
+        else:
+            stack.append(children[1])
+            stack.append(children[0])
+    return operands
+
+
+def fold_constants(operator: str, numbers: list, fold):
+    """
+    Combine numbers with operator, left to right, using fold(operator, left, right).
+    """
+    value = numbers[0]
+    for number in numbers[1:]:
+        value = fold(operator, value, number)
+    return value
+
+
+def apply_reassociation(node: TreeNode, fold):
+    """
+    Gather the constants of a '+' or '*' chain into one:
+    (2+(X+3)) -> (X+5), ((X*2)*4) -> (X*8).
+
+    Chains with fewer than two constants are left as they are; otherwise
+    the other operands keep their order, left-deep, with the folded
+    constant last, and the identity and zero rules are applied to the result.
+
+    :param fold: function(operator, left, right) -> value, used on constants
+    """
+    operator = node.value
+    if operator not in ASSOCIATIVE_OPERATORS:
+        return None
+
+    def chain_of(operand: TreeNode):
+        if operand.is_operator() and operand.value == operator:
+            return operand.left, operand.right
+        return None
+
+    operands = collect_chain(node.left, node.right, chain_of)
+    numbers = [operand.number for operand in operands if operand.is_leaf() and operand.is_number()]
+    if len(numbers) < 2:
+        return None
+    constant = TreeNode(fold_constants(operator, numbers, fold))
+    others = [operand for operand in operands if not (operand.is_leaf() and operand.is_number())]
+    if not others:
+        return constant
+
+    result = others[0]
+    for operand in others[1:]:
+        result = TreeNode(operator, result, operand)
+    result = TreeNode(operator, result, constant)
+    replacement = apply_identity_rules(result, False, True)
+    if replacement is None:
+        replacement = apply_zero_rules(result, False, True)
+    return replacement if replacement is not None else result
+
+
+def leaf_key(node: TreeNode) -> tuple:
+    """
+    Structure key of a leaf for share_common_subtrees: numbers by value, so
+    a folded 2 matches a literal '2', and names tagged apart from numbers.
+    """
+    if node.kind == NUMBER:
+        return (NUMBER, normalize_number(node.number))
+    return (node.kind, node.value)
+
+
+def share_common_subtrees(root: TreeNode) -> TreeNode:
+    """
+    Common subexpression elimination: structurally equal operator subtrees
+    become one node, e.g. ((A*B)+(A*B)) keeps a single (A*B). Subtrees are
+    hashed bottom-up on their operator and their children's keys (a leaf's
+    key is leaf_key(), an operator's the id of the node kept for its
+    structure). Kept nodes with more than one parent become SharedNodes.
+    Leaves are not merged; reading one costs no more than a lookup.
+
+    :return: root itself when no operator subtree repeats
+    """
+    if root is None or root.is_leaf():
+        return root
+    kept = {}   # structure key -> first node seen with that structure
+    keys = {}   # id(node) -> structure key
+    order = []  # kept nodes, children before parents
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in keys:
+            continue
+        if node.is_leaf():
+            keys[id(node)] = leaf_key(node)
+            continue
+        if not expanded:
+            stack.append((node, True))
+            stack.append((node.right, False))
+            stack.append((node.left, False))
+            continue
+        key = (node.value, keys[id(node.left)], keys[id(node.right)])
+        first = kept.get(key)
+        if first is None:
+            first = kept[key] = node
+            order.append(node)
+        keys[id(node)] = id(first)
+
+    uses = {}
+    for node in order:
+        for child in (node.left, node.right):
+            if not child.is_leaf():
+                key = keys[id(child)]
+                uses[key] = uses.get(key, 0) + 1
+    if all(count == 1 for count in uses.values()):
+        return root
+
+    built = {}
+    for node in order:
+        # Leaf keys are tuples, so they never match a built node's id
+        left = built.get(keys[id(node.left)], node.left)
+        right = built.get(keys[id(node.right)], node.right)
+        shared = uses.get(id(node), 0) > 1
+        if left is node.left and right is node.right and (not shared or type(node) is SharedNode):
+            built[id(node)] = node
+        else:
+            built[id(node)] = (SharedNode if shared else TreeNode)(node.value, left, right, node.kind, node.number)
+    return built[keys[id(root)]]
+
+
+def substitute_variables(root: TreeNode, replacement) -> TreeNode:
+    """
+    Replace the variable leaves under root with replacement(name) wherever
+    it returns a node. Subtrees with nothing replaced are shared, not copied.
+
+    :param replacement: function(name) -> TreeNode, or None to keep the leaf
+    :return: root itself when no leaf was replaced
+    """
+    if root is None:
+        return None
+    built = {}  # id(node) -> node after substitution
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in built:
+            continue
+        if node.is_leaf():
+            substitute = replacement(node.value) if node.is_variable() else None
+            built[id(node)] = substitute if substitute is not None else node
+            continue
+        if not expanded:
+            stack.append((node, True))
+            stack.append((node.right, False))
+            stack.append((node.left, False))
+            continue
+        left, right = built[id(node.left)], built[id(node.right)]
+        if left is node.left and right is node.right:
+            built[id(node)] = node
+        else:
+            built[id(node)] = TreeNode(node.value, left, right, node.kind, node.number)
+    return built[id(root)]
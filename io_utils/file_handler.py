@@ -1,11 +1,151 @@
+import os
 from pathlib import Path
 
+INVALID_FILENAME_CHARS = ['<', '>', ':', '"', '|', '?', '*']
+# Directories never searched for input files
+SKIPPED_DIRS = {'.git', '__pycache__'}
+
+
+class DirectoryIndex:
+    """
+    File names under a root directory, mapped to their paths. Built with one
+    walk of the tree and rebuilt only when a directory's mtime changes (a
+    file or folder was added, removed or renamed in it).
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.paths: dict[str, list[Path]] = {}
+        self._mtimes: dict[str, int] = {}
+        self.builds = 0
+
+    def find(self, filename: str) -> list[Path]:
+        """
+        Return the paths, sorted, whose trailing parts match filename
+        (e.g. 'dt.txt' or 'data/dt.txt').
+        """
+        if self._stale():
+            self._build()
+        parts = Path(filename).parts
+        if not parts:
+            return []
+        return [path for path in self.paths.get(parts[-1], ()) if path.parts[-len(parts):] == parts]
+
+    def _stale(self) -> bool:
+        if not self._mtimes:
+            return True
+        for directory, mtime in self._mtimes.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return True
+            except FileNotFoundError:
+                return True
+        return False
+
+    def _build(self):
+        paths = {}
+        mtimes = {}
+        for directory, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [name for name in dirnames if name not in SKIPPED_DIRS]
+            mtimes[directory] = os.stat(directory).st_mtime_ns
+            for name in filenames:
+                paths.setdefault(name, []).append(Path(directory) / name)
+        for matches in paths.values():
+            # Prefer deterministic behavior if multiple matches exist
+            matches.sort()
+        self.paths = paths
+        self._mtimes = mtimes
+        self.builds += 1
+
+
+# One index per root, shared by every FileHandler
+_indexes: dict[Path, DirectoryIndex] = {}
+
 
 class FileHandler:
-    def __init__(self):
-        self.project_root = Path(__file__).resolve().parents[1]
+    def __init__(self, project_root: Path = None):
+        self.project_root = Path(project_root) if project_root is not None else Path(__file__).resolve().parents[1]
+        self.index = _indexes.setdefault(self.project_root, DirectoryIndex(self.project_root))
+
+    # Path-based API (no prompts)
+
+    def resolve(self, filename) -> Path:
+        """
+        Return the file for filename: an existing path as given, otherwise
+        the first match by name anywhere under the project root.
+
+        :raises FileNotFoundError: when nothing matches
+        """
+        path = Path(filename)
+        if path.is_file():
+            return path
+        matches = self.index.find(str(filename))
+        if not matches:
+            raise FileNotFoundError(f"File not found: {filename}")
+        return matches[0]
+
+    def read_path(self, filename) -> str:
+        return self.resolve(filename).read_text(encoding="utf-8")
+
+    def open_stream(self, filename):
+        """
+        Open the file for filename for reading, so it can be streamed line by
+        line instead of read whole.
+        """
+        return self.resolve(filename).open(encoding="utf-8")
+
+    def write_path(self, filename, content: str) -> Path:
+        """
+        Write content to filename. Relative names are placed in data/.
+
+        :raises ValueError: for names that are not .txt files or contain
+            characters invalid in file names
+        """
+        path = self.output_path(filename)
+        path.write_text(content, encoding="utf-8")
+        return path
+
+    def open_output(self, filename):
+        """
+        Open filename for writing, so output can be streamed to it through a
+        buffered writer instead of built up in memory. Names are checked and
+        placed as in write_path.
+        """
+        return self.output_path(filename).open('w', encoding="utf-8")
+
+    def output_path(self, filename) -> Path:
+        message = self.check_output_name(str(filename))
+        if message:
+            raise ValueError(message)
+        path = Path(filename)
+        if not path.is_absolute():
+            path = self.project_root / 'data' / path
+        return path
+
+    def check_output_name(self, filename: str) -> str:
+        """
+        Return what is wrong with an output file name, or '' if it is fine.
+        """
+        if not filename:
+            return 'Please enter a file name.'
+        if not filename.endswith('.txt'):
+            return 'Please enter a valid .txt file'
+        if any(char in filename for char in INVALID_FILENAME_CHARS):
+            return 'Invalid characters in filename.'
+        return ''
+
+    # Interactive wrappers used by the menu
 
     def read_file(self):
+        return self.find_file().read_text(encoding="utf-8")
+
+    def open_file(self):
+        """
+        Prompt for an input file and return it opened for reading.
+        """
+        return self.find_file().open(encoding="utf-8")
+
+    def find_file(self) -> Path:
         while True:
             filename = input("Please enter input file: ").strip()
             if not filename:
@@ -14,27 +154,26 @@ class FileHandler:
             if not filename.endswith('.txt'):
                 print("Please enter a valid txt file.")
                 continue
-            matches = list(self.project_root.rglob(filename))
+            matches = self.index.find(filename)
             if not matches:
                 print(f"File not found: {filename}")
                 continue
-            if len(matches) > 1:
-                # Prefer deterministic behavior if multiple matches exist
-                matches.sort()
-            return matches[0].read_text(encoding="utf-8")
-        
+            return matches[0]
+
     def write_file(self,content):
+        self.write_path(self.ask_output_name(), content)
+
+    def open_output_file(self):
+        """
+        Prompt for an output file and return it opened for writing.
+        """
+        return self.open_output(self.ask_output_name())
+
+    def ask_output_name(self) -> str:
         while True:
             filename = input('\nPlease enter ouptut file: ').strip()
-            if not filename:
-                print('\nPlease enter a file name.')
-                continue
-            if not filename.endswith('.txt'):
-                print('\nPlease enter a valid .txt file')
-                continue
-            if any(char in filename for char in ['<', '>', ':', '"', '|', '?', '*']):
-                print("\nInvalid characters in filename.")
+            message = self.check_output_name(filename)
+            if message:
+                print(f'\n{message}')
                 continue
-            file_path = self.project_root / 'data' /filename
-            file_path.write_text(content, encoding="utf-8")
-            return
\ No newline at end of file
+            return filename
@@ -1,5 +1,10 @@
-from ui.menu import Menu
+import sys
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        # Arguments given: run headless (see ui/cli.py)
+        from ui.cli import main
+        sys.exit(main())
+    from ui.menu import Menu
     menu = Menu()
-    menu.run_menu()
\ No newline at end of file
+    menu.run_menu()
@@ -0,0 +1,91 @@
+import sys
+import json
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ui.cli import main
+import pytest
+
+
+@pytest.fixture
+def session_file(tmp_path):
+    path = tmp_path / "session.txt"
+    path.write_text("A=(1+2)\nB=(A*X)\nX=(2+0)\n", encoding="utf-8")
+    return path
+
+
+def records(output: str) -> list[dict]:
+    return [json.loads(line) for line in output.splitlines()]
+
+
+class TestCli:
+    """Test suite for the headless command-line mode."""
+
+    def test_load_prints_expressions_and_values(self, session_file, capsys):
+        assert main(["load", str(session_file)]) == 0
+        [record] = records(capsys.readouterr().out)
+        assert (record["lines"], record["loaded"]) == (3, 3)
+        assert record["expressions"][1] == {"name": "B", "expression": "(A*X)", "value": 6}
+
+    def test_eval_processes_every_file(self, session_file, tmp_path, capsys):
+        other = tmp_path / "other.txt"
+        other.write_text("A=(5*5)\n", encoding="utf-8")
+        assert main(["eval", "A", str(session_file), str(other)]) == 0
+        assert [record["value"] for record in records(capsys.readouterr().out)] == [3, 25]
+
+    def test_errors_are_reported_and_set_exit_status(self, session_file, tmp_path, capsys):
+        bad = tmp_path / "bad.txt"
+        bad.write_text("A=(1/0)\n", encoding="utf-8")
+        assert main(["eval", "Z", str(session_file), str(bad), str(tmp_path / "missing.txt")]) == 1
+        missing_var, division, missing_file = records(capsys.readouterr().out)
+        assert missing_var["error"] == "Variable not found"
+        assert division["error"] == "Division by zero detected in expression: A=(1/0)"
+        assert "missing.txt" in missing_file["error"]
+
+    def test_unparsable_and_unevaluable_files_do_not_stop_the_run(self, session_file, tmp_path, capsys):
+        unparsable = tmp_path / "unparsable.txt"
+        unparsable.write_text("A=(1+2)\nB=((2+3)4)\n", encoding="utf-8")
+        zero = tmp_path / "zero.txt"
+        zero.write_text("Z=(0+0)\nA=(1/Z)\n", encoding="utf-8")
+        assert main(["eval", "A", str(unparsable), str(zero), str(session_file)]) == 1
+        parse_error, evaluation_error, good = records(capsys.readouterr().out)
+        assert parse_error["error"] == "Expression could not be parsed: B=((2+3)4)"
+        assert parse_error["line"] == "B=((2+3)4)"
+        assert evaluation_error["error"] == "Evaluation failed: division by zero"
+        assert good["value"] == 3
+
+    def test_diff_failure_in_one_file_does_not_stop_the_run(self, session_file, tmp_path, capsys):
+        zero = tmp_path / "zero.txt"
+        zero.write_text("X=(0+0)\nY=(X**0.5)\n", encoding="utf-8")
+        square = tmp_path / "square.txt"
+        square.write_text("X=(1+2)\nY=(X*X)\n", encoding="utf-8")
+        assert main(["diff", "Y", "X", str(zero), str(square)]) == 1
+        failed, good = records(capsys.readouterr().out)
+        assert failed["error"].startswith("Evaluation failed: ")
+        assert (good["derivative"], good["value"]) == ("(X+X)", 6)
+
+    def test_sort_writes_report(self, session_file, tmp_path, capsys):
+        out = tmp_path / "sorted.txt"
+        assert main(["sort", str(session_file), "--out", str(out)]) == 0
+        assert out.read_text(encoding="utf-8").startswith("*** Expressions with value=> 6\nB=(A*X)\n")
+        assert records(capsys.readouterr().out)[0]["loaded"] == 3
+        assert main(["sort", str(session_file)]) == 0
+        captured = capsys.readouterr()
+        assert captured.out == out.read_text(encoding="utf-8")
+        # Without --out the per-file record goes to stderr
+        assert records(captured.err)[0]["loaded"] == 3
+
+    def test_optimise_reports_cost_analysis(self, session_file, capsys):
+        assert main(["optimise", str(session_file), "--var", "X"]) == 0
+        [record] = records(capsys.readouterr().out)
+        [expression] = record["expressions"]
+        assert expression["optimised"] == "2"
+        assert expression["statistics"]["optimised_total_nodes"] == 1
+
+    def test_diff_prints_derivative_and_value(self, session_file, capsys):
+        assert main(["diff", "B", "A", str(session_file)]) == 0
+        [record] = records(capsys.readouterr().out)
+        assert record["derivative"] == "X"
+        assert record["value"] == 2
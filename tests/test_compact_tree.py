@@ -0,0 +1,135 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dask_core.compact_tree import CompactParseTree, NUMBER_CODE, VARIABLE_CODE
+from dask_core.expression import DaskExpression
+from dask_core.expression_manager import ExpressionManager
+from dask_core.parser import ExpressionParser
+from features.cost_analysis import CostAnalyser
+import pytest
+
+EXPRESSIONS = [
+    "(2+(4*5))",
+    "((Alpha*1)+(0*Beta))",
+    "((Alpha++2.5)//(Beta**(3-1)))",
+    "(((2*3)+Alpha)/(Alpha**1))",
+    "(3.50-(Alpha+0))",
+    "Alpha",
+    "(2+(Alpha+3))",
+    "(((Alpha*2)*(Beta*4))*0.125)",
+    "(((Alpha*2)+(Beta-1))*((Alpha*(1+1))+(Beta-1)))",
+]
+
+
+@pytest.fixture
+def parsers():
+    return ExpressionParser(), ExpressionParser(compact=True)
+
+
+class TestCompactParseTree:
+    """Test suite for the array-backed parse tree."""
+
+    def test_parser_builds_compact_tree(self, parsers):
+        tree = parsers[1].parse("(2+Alpha)")
+        assert isinstance(tree, CompactParseTree)
+        assert list(tree.original.codes) == [NUMBER_CODE, VARIABLE_CODE, 0]
+        assert list(tree.original.left) == [-1, -1, 0]
+        assert list(tree.original.right) == [-1, -1, 1]
+        assert tree.original.numbers[0] == 2.0
+
+    @pytest.mark.parametrize("expr", EXPRESSIONS)
+    def test_to_expression_matches_nodes(self, parsers, expr):
+        nodes, compact = (parser.parse(expr) for parser in parsers)
+        for root in ["original", "optimised"]:
+            assert compact.to_expression(root) == nodes.to_expression(root)
+
+    @pytest.mark.parametrize("expr", EXPRESSIONS)
+    def test_cost_analysis_matches_nodes(self, parsers, expr):
+        nodes, compact = (parser.parse(expr) for parser in parsers)
+        assert CostAnalyser(compact).statistics == CostAnalyser(nodes).statistics
+
+    def test_count_x_variable(self, parsers):
+        tree = parsers[1].parse("((Alpha*Beta)+(Alpha*1))")
+        assert tree.count_x_variable("Alpha") == 2
+        assert tree.count_x_variable("Gamma") == 0
+        assert tree.variables() == {"Alpha", "Beta"}
+
+    def test_evaluate_with_context(self, parsers):
+        compact = parsers[1]
+        context = {
+            "A": DaskExpression("A", "(2+3)", parser=compact),
+            "B": DaskExpression("B", "(A*A)", parser=parsers[0]),
+            "C": DaskExpression("C", "(B-A)", parser=compact),
+        }
+        assert context["C"].parse_tree.evaluate(context=context) == 20
+
+    def test_evaluate_cycle_is_none(self, parsers):
+        compact = parsers[1]
+        context = {
+            "A": DaskExpression("A", "(B+1)", parser=compact),
+            "B": DaskExpression("B", "(A+1)", parser=compact),
+        }
+        assert context["A"].parse_tree.evaluate(context=context) is None
+
+    def test_folding_keeps_divide_by_zero_error(self, parsers):
+        with pytest.raises(ZeroDivisionError):
+            parsers[1].parse("(1/0)")
+
+    def test_optimised_arrays_drop_folded_entries(self, parsers):
+        tree = parsers[1].parse("((2*3)+(Alpha*0))")
+        assert len(tree.optimised) == 1
+        assert tree.evaluate() == 6
+
+    def test_node_views(self, parsers):
+        tree = parsers[1].parse("((2*3)+Alpha)")
+        assert tree.original_root.left.value == "*"
+        assert tree.optimised_root.left.value == 6
+
+    def test_unchanged_tree_shares_arrays(self, parsers):
+        tree = parsers[1].parse("(Alpha+Beta)")
+        assert tree._range("optimised") == tree._range("original")
+        folded = parsers[1].parse("(2+3)")
+        assert folded._range("optimised") != folded._range("original")
+
+    def test_trees_share_the_parsers_arena(self, parsers):
+        compact = parsers[1]
+        first = compact.parse("(Alpha+1)")
+        second = compact.parse("(Beta*2)")
+        assert first.arena is second.arena is compact.arena
+        assert second.start == first.original_end
+        assert list(second.original.left) == [-1, -1, 0]
+        assert second.to_expression() == "(Beta*2)"
+
+    def test_failed_parse_leaves_arena_unchanged(self, parsers):
+        compact = parsers[1]
+        compact.parse("(Alpha+1)")
+        used = len(compact.arena)
+        with pytest.raises(ZeroDivisionError):
+            compact.parse("(Beta+(1/0))")
+        assert len(compact.arena) == used
+
+    def test_symbols_shared_across_trees(self, parsers):
+        compact = parsers[1]
+        compact.parse("(Alpha+1)")
+        compact.parse("(Alpha*2)")
+        assert compact.symbols.names.count("Alpha") == 1
+
+    def test_session_redefines_and_propagates(self):
+        manager = ExpressionManager()
+        manager.parser = ExpressionParser(compact=True)
+        stats = manager.load_stream(["A=(2+3)", "B=((A*A)+(A*A))", "C=(B/2)"])
+        assert stats['error'] is None
+        manager.evaluate_dirty()
+        assert manager.expressions["C"].value == 25
+
+        assert manager.propagate_constants() == 2
+        assert manager.expressions["C"].propagated_root.number == 25
+        manager.add_expression("A", "(1+1)")
+        assert manager.expressions["C"].propagated_root is None
+        manager.propagate_constants()
+        manager.evaluate_dirty()
+        assert manager.expressions["B"].value == 8
+        assert manager.expressions["C"].value == 4
@@ -48,3 +48,31 @@ class TestCostAnalyser:
         assert stats["optimised_operator_nodes"] == 0
         assert stats["optimised_leaf_nodes"] == 1
         assert stats["optimised_weighted_op_cost"] == 0
+
+    def test_cost_analysis_reports_nodes_removed_by_cse(self):
+        # Tree: ((X*Y) + (X*Y)) keeps one (X*Y) after optimising
+        product = lambda: TreeNode("*", TreeNode("X"), TreeNode("Y"))
+        tree = ParseTree(TreeNode("+", product(), product()))
+        tree.optimise()
+        stats = CostAnalyser(tree).statistics
+
+        assert stats["original_distinct_nodes"] == 4
+        assert stats["optimised_total_nodes"] == 7
+        assert stats["optimised_distinct_nodes"] == 4
+        assert stats["cse_removed_nodes"] == 3
+
+    def test_cost_analysis_distinct_nodes_agree_across_backends(self):
+        # ((B+(1+1))*(B+2)) folds to ((B+2)*(B+2)): a folded 2 and a literal '2' are one subtree
+        from dask_core.parser import ExpressionParser
+
+        for compact in (False, True):
+            tree = ExpressionParser(compact=compact).parse("((B+(1+1))*(B+2))")
+            stats = CostAnalyser(tree).statistics
+            assert stats["optimised_total_nodes"] == 7
+            assert stats["optimised_distinct_nodes"] == 4
+
+    def test_cost_analysis_no_repeats_removes_nothing(self):
+        root = TreeNode("+", TreeNode("A"), TreeNode("*", TreeNode("A"), TreeNode("C")))
+        stats = CostAnalyser(ParseTree(root)).statistics
+        assert stats["optimised_distinct_nodes"] == stats["optimised_total_nodes"] == 5
+        assert stats["cse_removed_nodes"] == 0
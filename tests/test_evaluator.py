@@ -4,7 +4,7 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from dask_core.tree_node import TreeNode
+from dask_core.tree_node import TreeNode, SharedNode
 from dask_core.evaluator import Evaluator
 import pytest
 
@@ -231,3 +231,149 @@ class TestEvaluator:
         result = evaluator.eval_node(node, context)
         assert result is None
 
+
+    def test_compile_matches_eval_node(self, evaluator):
+        """Test compiled closures give the same result as eval_node()."""
+        node = TreeNode("*",
+                        TreeNode("+", TreeNode("10"), TreeNode("5")),
+                        TreeNode("//", TreeNode(3), TreeNode("2")))
+        compiled = evaluator.compile(node)
+        assert compiled({}, set()) == evaluator.eval_node(node, {})
+
+    def test_compile_resolves_variables_from_context(self, evaluator):
+        """Test compiled closures look up variables in the context."""
+        from dask_core.expression import DaskExpression
+
+        context = {"X": DaskExpression("X", "(2+3)"), "Y": DaskExpression("Y", "(X*X)")}
+        compiled = evaluator.compile(TreeNode("+", TreeNode("Y"), TreeNode("1")))
+        assert compiled(context, set()) == 26
+        assert compiled({}, set()) is None
+
+    def test_compile_cycle_returns_none(self, evaluator):
+        """Test compiled closures keep the visited cycle semantics."""
+        from dask_core.expression import DaskExpression
+
+        context = {"A": DaskExpression("A", "(B+1)"), "B": DaskExpression("B", "(A+1)")}
+        compiled = evaluator.compile(TreeNode("A"))
+        assert compiled(context, set()) is None
+
+    def test_shared_nodes_are_computed_once_per_evaluation(self):
+        """Test every evaluation mode applies a shared node's operator once per evaluation."""
+        from unittest.mock import patch
+        from dask_core.operators import OPERATORS
+
+        shared = SharedNode("**", TreeNode("2"), TreeNode("3"))
+        root = TreeNode("+", shared, TreeNode("*", shared, TreeNode("2")))
+        calls = []
+        power = OPERATORS["**"].function
+
+        def counted(left, right):
+            calls.append((left, right))
+            return power(left, right)
+
+        with patch.object(OPERATORS["**"], "function", counted):
+            assert Evaluator().eval_node(root, {}) == 24
+            assert Evaluator(iterative=True).eval_node(root, {}) == 24
+            compiled = Evaluator().compile(root)
+            assert compiled({}, set()) == 24
+            assert compiled({}, set()) == 24
+        assert len(calls) == 4
+
+    def test_shared_nodes_reentered_through_a_cycle_agree(self):
+        """Test compiled, recursive and iterative evaluation agree when a shared node is reached while computing it."""
+        from dask_core.expression_manager import ExpressionManager
+
+        manager = ExpressionManager()
+        manager.add_expression("W", "(2+3)")
+        # The parse cache gives P and Q one tree, so one SharedNode (W*W)
+        manager.add_expression("P", "(((W*W)+(W*W))+0)")
+        manager.add_expression("Q", "(((W*W)+(W*W))+0)")
+        tree = manager.expressions["P"].parse_tree
+        assert tree.evaluate_compiled(manager.expressions) == 50
+
+        manager.add_expression("W", "(Q+1)")
+        results = [
+            tree.evaluate_compiled(manager.expressions),
+            tree.evaluate(Evaluator(), manager.expressions),
+            tree.evaluate(Evaluator(iterative=True), manager.expressions),
+        ]
+        assert results == [None, None, None]
+
+    def test_iterative_matches_recursive(self):
+        """Test the iterative mode gives the same results as recursion."""
+        from dask_core.expression import DaskExpression
+
+        context = {
+            "X": DaskExpression("X", "(2+3)"),
+            "Y": DaskExpression("Y", "((X*X)//(X-2))"),
+            "Z": DaskExpression("Z", "(Y+Missing)"),
+        }
+        iterative = Evaluator(iterative=True)
+        for name in context:
+            assert iterative.eval_variable(name, context) == Evaluator().eval_variable(name, context)
+
+    def test_iterative_keeps_cycle_semantics(self):
+        """Test the iterative mode returns None for cyclic references."""
+        from dask_core.expression import DaskExpression
+
+        context = {"A": DaskExpression("A", "(B+1)"), "B": DaskExpression("B", "(A+1)")}
+        assert Evaluator(iterative=True).eval_node(TreeNode("A"), context) is None
+
+    def test_iterative_handles_chains_beyond_recursion_limit(self):
+        """Test a long chain of references evaluates without recursion."""
+        from dask_core.expression import DaskExpression
+
+        def name(i):
+            # Variable names are letters only, so spell the index in base 26
+            letters = ""
+            while True:
+                i, digit = divmod(i, 26)
+                letters += chr(ord("a") + digit)
+                if i == 0:
+                    return "V" + letters
+
+        length = sys.getrecursionlimit() * 3
+        context = {name(0): DaskExpression(name(0), "(0+1)")}
+        for i in range(1, length):
+            context[name(i)] = DaskExpression(name(i), f"({name(i - 1)}+1)")
+
+        result = Evaluator(iterative=True).eval_variable(name(length - 1), context)
+        assert result == length
+
+    def test_eval_batch_matches_scalar_evaluation(self, evaluator):
+        """Test eval_batch() agrees with eval_node() row by row for every operator."""
+        np = pytest.importorskip("numpy")
+        from dask_core.parser import ExpressionParser
+
+        parser = ExpressionParser()
+        a_values = np.array([1.0, 2.0, 3.0, 4.5])
+        b_values = np.array([2.0, 1.0, 4.0, 3.0])
+        for op in ['+', '-', '*', '/', '++', '//', '**']:
+            root = parser.parse(f"((A{op}B){op}2)").original_root
+            result = evaluator.eval_batch(root, {"A": a_values, "B": b_values})
+            for i in range(len(a_values)):
+                expected = evaluator._apply_operator(op, evaluator._apply_operator(op, a_values[i], b_values[i]), 2)
+                assert result[i] == pytest.approx(expected)
+
+    def test_eval_batch_masks_division_by_zero_and_none(self, evaluator):
+        """Test eval_batch() masks rows the scalar evaluator cannot compute."""
+        np = pytest.importorskip("numpy")
+
+        division = TreeNode("/", TreeNode("A"), TreeNode("B"))
+        result = evaluator.eval_batch(division, {"A": np.array([1.0, 2.0]), "B": np.array([0.0, 4.0])})
+        assert result.mask.tolist() == [True, False]
+        assert result[1] == 0.5
+
+        missing = TreeNode("+", TreeNode("A"), TreeNode("Missing"))
+        result = evaluator.eval_batch(missing, {"A": np.array([1.0, 2.0])})
+        assert result.mask.all()
+
+    def test_eval_batch_resolves_context_variables(self, evaluator):
+        """Test eval_batch() evaluates referenced expressions over the same bindings."""
+        np = pytest.importorskip("numpy")
+        from dask_core.expression import DaskExpression
+
+        context = {"Y": DaskExpression("Y", "(X*2)")}
+        node = TreeNode("+", TreeNode("Y"), TreeNode("1"))
+        result = evaluator.eval_batch(node, {"X": np.arange(3.0)}, context)
+        assert result.tolist() == [1.0, 3.0, 5.0]
@@ -143,3 +143,46 @@ class TestDaskExpression:
         assert expr2.expression == "(C*D)"
         assert expr3.expression == "(E/F)"
 
+
+    def test_dask_expression_is_slotted_and_interns_name(self):
+        """Test DaskExpression has no __dict__ and interns its name."""
+        expr = DaskExpression(''.join(['Al', 'pha']), "(A+B)")
+        assert not hasattr(expr, '__dict__')
+        assert expr.name is sys.intern("Alpha")
+
+    def test_expressions_share_their_managers_session(self):
+        """Test per-session state lives once on the manager rather than on every expression."""
+        from dask_core.expression_manager import ExpressionManager
+
+        manager = ExpressionManager()
+        manager.add_expression("A", "(1+2)")
+        manager.add_expression("B", "(A*2)")
+        assert manager.expressions["A"].session is manager.expressions["B"].session is manager
+        assert manager.expressions["B"].context is manager.expressions
+        manager.propagate_constants()
+        assert manager.propagated_roots["B"] is manager.expressions["B"].propagated_root
+        manager.add_expression("A", "(2+2)")
+        assert "B" not in manager.propagated_roots
+
+    def test_dask_expression_builds_tree_on_first_access(self):
+        """Test the tree is parsed only when parse_tree is first read."""
+        parser = Mock(wraps=ExpressionParser())
+        expr = DaskExpression("Alpha", "(A+B)", parser=parser)
+        parser.parse.assert_not_called()
+        assert expr.parse_tree.original_root.value == "+"
+        assert expr.parse_tree is expr.parse_tree
+        parser.parse.assert_called_once_with("(A+B)")
+
+    def test_dask_expression_value_evaluated_on_demand(self):
+        """Test the value is evaluated against the context when read, until one is stored."""
+        context = {}
+        context["A"] = DaskExpression("A", "(1+2)", context=context)
+        context["B"] = DaskExpression("B", "(A*2)", context=context)
+        assert context["B"].value == 6
+        context["A"] = DaskExpression("A", "(5+5)", context=context)
+        assert context["B"].value == 20
+        context["B"].value = 20
+        context["A"] = DaskExpression("A", "(1+1)", context=context)
+        assert context["B"].value == 20
+        context["B"].invalidate()
+        assert context["B"].value == 4
@@ -5,9 +5,20 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from dask_core.expression_manager import ExpressionManager
+from dask_core.parse_tree import PENDING
 import pytest
 
 
+def variable_name(i: int) -> str:
+    # Variable names are letters only, so spell the index in base 26
+    letters = ""
+    while True:
+        i, digit = divmod(i, 26)
+        letters += chr(ord("a") + digit)
+        if i == 0:
+            return "V" + letters
+
+
 class TestExpressionManager:
     """Test suite for the ExpressionManager class."""
 
@@ -85,3 +96,464 @@ class TestExpressionManager:
         message, result, _, _ = manager.validate_expression("a=(-1+2)")
         assert result is False
         assert "Negative numbers" in message
+
+    def test_evaluate_all_computes_each_variable_once(self):
+        """Test evaluate_all() shares one cache across a diamond dependency graph."""
+        manager = ExpressionManager()
+        manager.add_expression("Alpha", "(3*5)")
+        manager.add_expression("Delta", "(Alpha*2)")
+        manager.add_expression("Pi", "(Alpha+1)")
+        manager.add_expression("Mu", "(Delta+Pi)")
+
+        manager.evaluate_all()
+
+        assert manager.expressions["Mu"].value == 46
+        assert manager.last_pass_stats["misses"] == 4
+        assert manager.last_pass_stats["hits"] == 4
+        assert manager.last_pass_stats["hit_rate"] == 0.5
+
+    def test_evaluation_passes_reuse_compiled_closures(self):
+        """Test passes run the trees' compiled closures and compile each tree once."""
+        manager = ExpressionManager()
+        manager.add_expression("Alpha", "(3*5)")
+        manager.add_expression("Mu", "((Alpha*2)+(Alpha+1))")
+        manager.evaluate_all()
+        closure = manager.expressions["Mu"].compile()
+        manager.evaluate_all()
+        assert manager.expressions["Mu"].compile() is closure
+        assert manager.expressions["Mu"].value == 46
+
+        manager.add_expression("Alpha", "(1+1)")
+        manager.evaluate_dirty()
+        assert manager.expressions["Mu"].compile() is closure
+        assert manager.expressions["Mu"].value == 7
+
+    def test_evaluation_passes_handle_chains_beyond_recursion_limit(self):
+        """Test passes order a long chain defined back to front so no reference recurses."""
+        length = sys.getrecursionlimit() * 3
+        manager = ExpressionManager()
+        for i in range(length - 1, 0, -1):
+            manager.add_expression(variable_name(i), f"({variable_name(i - 1)}+1)")
+        manager.add_expression(variable_name(0), "(0+1)")
+        manager.evaluate_all()
+        assert manager.expressions[variable_name(length - 1)].value == length
+
+        manager.add_expression(variable_name(0), "(1+1)")
+        manager.evaluate_dirty()
+        assert manager.expressions[variable_name(length - 1)].value == length + 1
+
+    def test_evaluate_variable_computes_shared_references_once(self):
+        """Test a doubling diamond evaluates in linear time, before and after a pass."""
+        manager = ExpressionManager()
+        manager.add_expression(variable_name(0), "(1+0)")
+        for i in range(1, 60):
+            manager.add_expression(variable_name(i), f"({variable_name(i - 1)}+{variable_name(i - 1)})")
+        assert manager.evaluate_variable(variable_name(59)) == 2 ** 59
+        manager.evaluate_dirty()
+        assert manager.evaluate_variable(variable_name(59)) == 2 ** 59
+        manager.add_expression(variable_name(0), "(1+1)")
+        assert manager.evaluate_variable(variable_name(59)) == 2 ** 60
+
+    def test_evaluate_all_cycle_values_are_none(self):
+        """Test cached evaluation still resolves cycles to None."""
+        manager = ExpressionManager()
+        manager.add_expression("A", "(B+1)")
+        manager.add_expression("B", "(A+1)")
+        manager.add_expression("C", "(2+3)")
+
+        manager.evaluate_all()
+
+        assert manager.expressions["A"].value is None
+        assert manager.expressions["B"].value is None
+        assert manager.expressions["C"].value == 5
+
+    def test_add_expression_builds_dependency_graph(self):
+        """Test forward and reverse dependencies follow the parse tree leaves."""
+        manager = ExpressionManager()
+        manager.add_expression("Pi", "(Alpha+1)")
+        manager.add_expression("Alpha", "(3*5)")
+
+        assert manager.dependencies["Pi"] == {"Alpha"}
+        assert manager.dependents["Alpha"] == {"Pi"}
+
+        manager.add_expression("Pi", "(Beta+1)")
+        assert manager.dependencies["Pi"] == {"Beta"}
+        assert manager.dependents["Alpha"] == set()
+
+    def test_modify_marks_only_transitive_dependents_dirty(self):
+        """Test a modification dirties the variable and its dependents only."""
+        manager = ExpressionManager()
+        manager.add_expression("Alpha", "(3*5)")
+        manager.add_expression("Pi", "(Alpha+1)")
+        manager.add_expression("Mu", "(Pi*2)")
+        manager.add_expression("Other", "(1+1)")
+        manager.evaluate_all()
+        assert manager.dirty == set()
+
+        manager.add_expression("Alpha", "(1+1)")
+        assert manager.dirty == {"Alpha", "Pi", "Mu"}
+
+        manager.evaluate_dirty()
+        assert manager.dirty == set()
+        assert manager.expressions["Mu"].value == 6
+        assert manager.expressions["Other"].value == 2
+        assert manager.last_pass_stats["misses"] == 3
+
+    def test_evaluate_dirty_resolves_late_definitions_and_cycles(self):
+        """Test defining a referenced variable later dirties its dependents."""
+        manager = ExpressionManager()
+        manager.add_expression("Pi", "(Alpha+1)")
+        manager.add_expression("A", "(B+1)")
+        manager.add_expression("B", "(A+1)")
+        manager.evaluate_dirty()
+        assert manager.expressions["Pi"].value is None
+
+        manager.add_expression("Alpha", "(3*5)")
+        manager.evaluate_dirty()
+        assert manager.expressions["Pi"].value == 16
+        assert manager.expressions["A"].value is None
+        assert manager.expressions["B"].value is None
+
+    def test_evaluate_all_parallel_matches_sequential(self):
+        """Test evaluating on a process pool gives the same values."""
+        lines = [
+            ("Alpha", "(3*5)"), ("Pi", "(Alpha+1)"), ("Delta", "(Alpha*Pi)"),
+            ("A", "(B+1)"), ("B", "(A+1)"), ("C", "(A*0)"), ("D", "(B+2)"),
+            ("Zeta", "(3//(4++5))"), ("Lone", "(Missing+1)"),
+        ]
+        sequential = ExpressionManager()
+        parallel = ExpressionManager()
+        parallel.workers = 2
+        for name, expr in lines:
+            sequential.add_expression(name, expr)
+            parallel.add_expression(name, expr)
+
+        sequential.evaluate_all()
+        parallel.evaluate_all()
+
+        for name, _ in lines:
+            assert parallel.expressions[name].value == sequential.expressions[name].value
+        assert parallel.expressions["C"].value == 0
+        assert parallel.dirty == set()
+
+    def test_evaluate_parallel_splits_one_component_into_wavefronts(self):
+        """Test a single wide component is evaluated on the pool a wavefront at a time."""
+        lines = [("Base", "(1+1)")] + [(variable_name(i), f"(Base*{i})") for i in range(40)]
+        lines += [("Top", f"({variable_name(3)}+{variable_name(39)})"), ("Loop", "(Loop+Top)")]
+        sequential = ExpressionManager()
+        parallel = ExpressionManager()
+        for name, expr in lines:
+            sequential.add_expression(name, expr)
+            parallel.add_expression(name, expr)
+
+        sequential.evaluate_all()
+        parallel.evaluate_parallel(2, min_wavefront=8)
+
+        for name, _ in lines:
+            assert parallel.expressions[name].value == sequential.expressions[name].value
+        assert parallel.expressions["Top"].value == 84
+        assert parallel.dirty == set()
+
+    def test_evaluate_dirty_parallel_reuses_clean_values_and_encodings(self):
+        """Test a parallel dirty pass only re-encodes and re-evaluates what changed."""
+        manager = ExpressionManager()
+        manager.add_expression("Base", "(1+1)")
+        for i in range(40):
+            manager.add_expression(variable_name(i), f"(Base*{i})")
+        manager.add_expression("Other", "(5+5)")
+        manager.evaluate_parallel(2, min_wavefront=8)
+        assert variable_name(39) in manager.encoded_roots
+
+        manager.add_expression("Base", "(2+1)")
+        assert variable_name(39) not in manager.encoded_roots
+        # (Base*0) folds to 0, so variable_name(0) does not depend on Base
+        assert manager.dirty == {"Base"} | {variable_name(i) for i in range(1, 40)}
+        manager.evaluate_parallel(2, names=manager.dirty, min_wavefront=8)
+        assert manager.expressions[variable_name(39)].value == 117
+        assert manager.expressions["Other"].value == 10
+        assert not manager.dirty
+
+        encoded = manager.encoded_roots[variable_name(39)][1]
+        manager.evaluate_parallel(2, min_wavefront=8)
+        assert manager.encoded_roots[variable_name(39)][1] is encoded
+
+    def test_analyse_cycles_marks_members_and_dependents(self):
+        """Test cycle members and their dependents are unresolvable up front."""
+        manager = ExpressionManager()
+        manager.add_expression("A", "(B+1)")
+        manager.add_expression("B", "(C+1)")
+        manager.add_expression("C", "(A+1)")
+        manager.add_expression("Self", "(Self*2)")
+        manager.add_expression("D", "(A*2)")
+        manager.add_expression("E", "(1+2)")
+
+        manager.analyse_cycles()
+
+        assert sorted(manager.cycles) == [["A", "B", "C"], ["Self"]]
+        assert manager.unresolvable == {"A", "B", "C", "Self", "D"}
+        report = manager.cycle_report()
+        assert "A -> B -> C -> A" in report
+        assert "Self -> Self" in report
+        assert "Depends on a cycle: D" in report
+
+    def test_breaking_a_cycle_makes_variables_resolvable(self):
+        """Test modifying a cycle member re-analyses only the dirty region."""
+        manager = ExpressionManager()
+        manager.add_expression("A", "(B+1)")
+        manager.add_expression("B", "(A+1)")
+        manager.add_expression("D", "(A*2)")
+        manager.evaluate_dirty()
+        assert manager.expressions["D"].value is None
+
+        manager.add_expression("B", "(1+1)")
+        manager.evaluate_dirty()
+
+        assert manager.cycles == []
+        assert manager.unresolvable == set()
+        assert manager.expressions["D"].value == 6
+        assert manager.cycle_report() == "No cycles found."
+
+    def test_unresolvable_variables_skip_evaluation(self):
+        """Test evaluation never walks into a known cycle."""
+        manager = ExpressionManager()
+        manager.add_expression("A", "(B+1)")
+        manager.add_expression("B", "(A+1)")
+        manager.add_expression("C", "(A+B)")
+        manager.evaluate_all()
+
+        assert manager.last_pass_stats["misses"] == 0
+        assert manager.evaluate_variable("C") is None
+
+    def test_add_expression_reuses_given_parse_tree(self):
+        """Test a tree parsed once for validation is stored without re-parsing."""
+        manager = ExpressionManager()
+        tree = manager.parser.parse("(1+2)")
+        manager.add_expression("a", "(1+2)", tree)
+        manager.add_expression("b", "(1+2)")
+
+        assert manager.expressions["a"].parse_tree is tree
+        assert manager.expressions["b"].parse_tree is tree
+        assert manager.parser.cache_hits == 1
+
+    def test_load_stream_adds_lines_in_batches(self):
+        """Test load_stream reads lazily, skips blank lines and reports progress."""
+        manager = ExpressionManager()
+        lines = iter(["A=(1+2)\n", "\n", "B=(A*2)\n", "C=(B+A)"])
+        batches = []
+        stats = manager.load_stream(lines, batch_size=2, progress=lambda s: batches.append(s['lines']))
+        assert stats['error'] is None
+        assert (stats['lines'], stats['loaded']) == (4, 3)
+        assert batches == [2, 4]
+        manager.evaluate_dirty()
+        assert manager.expressions["C"].value == 9
+
+    def test_load_stream_rolls_back_on_invalid_line(self):
+        """Test a failed load leaves the session as it was."""
+        manager = ExpressionManager()
+        manager.add_expression("A", "(1+2)")
+        manager.add_expression("D", "(Z+1)")
+        manager.evaluate_dirty()
+        stats = manager.load_stream(["A=(5+5)", "Z=(A*2)", "B=(1+)"], batch_size=2)
+        assert stats['error'] == "*Expression cannot end with an operator. Please re enter the expression*"
+        assert stats['line'] == "B=(1+)"
+        assert stats['loaded'] == 0
+        assert set(manager.expressions) == {"A", "D"}
+        assert manager.expressions["A"].expression == "(1+2)"
+        assert "Z" not in manager.dependencies
+        manager.evaluate_dirty()
+        assert manager.expressions["A"].value == 3
+        assert manager.expressions["D"].value is None
+
+    def test_load_stream_rejects_division_by_zero(self):
+        """Test constant division by zero fails the load."""
+        manager = ExpressionManager()
+        stats = manager.load_stream(["A=(1+2)", "B=(1/0)"])
+        assert stats['error'] == "Division by zero detected in expression: B=(1/0)"
+        assert manager.expressions == {}
+
+    def test_load_stream_rolls_back_on_unparsable_line(self):
+        """Test a line that validates but cannot be parsed fails the load with timing filled in."""
+        manager = ExpressionManager()
+        manager.add_expression("A", "(1+2)")
+        stats = manager.load_stream(["A=(5+5)", "B=((2+3)4)", "C=(2+2)"])
+        assert stats['error'] == "Expression could not be parsed: B=((2+3)4)"
+        assert stats['line'] == "B=((2+3)4)"
+        assert (stats['lines'], stats['loaded']) == (2, 0)
+        assert stats['seconds'] > 0
+        assert set(manager.expressions) == {"A"}
+        assert manager.expressions["A"].expression == "(1+2)"
+
+    def test_add_expression_defers_parsing(self):
+        """Test expressions that cannot divide by zero are parsed on first use."""
+        manager = ExpressionManager()
+        manager.add_expression("A", "(1+2)")
+        manager.add_expression("B", "(A*2)")
+        assert manager.expressions["B"]._parse_tree is PENDING
+        # Reading the graph resolves the deferred references
+        assert manager.dependencies["B"] == {"A"}
+        assert manager.dependents["A"] == {"B"}
+
+    def test_deferred_expressions_stay_incremental(self):
+        """Test edits mark dependents of deferred expressions dirty and values update on demand."""
+        manager = ExpressionManager()
+        manager.load_stream(["A=(1+2)", "B=(A*2)", "C=(B+A)"])
+        manager.evaluate_dirty()
+        assert manager.dirty == set()
+        manager.add_expression("A", "(2+2)")
+        assert manager.dirty == {"A", "B", "C"}
+        # Read before the next pass: evaluated on demand against the session
+        assert manager.expressions["C"].value == 12
+        manager.evaluate_dirty()
+        assert manager.expressions["B"].value == 8
+
+    def test_division_is_still_checked_when_added(self):
+        """Test constant division by zero is still reported by add_expression."""
+        manager = ExpressionManager()
+        with pytest.raises(ZeroDivisionError):
+            manager.add_expression("A", "((2-2)**(0-1))")
+
+    def test_propagate_constants_collapses_reference_chains(self):
+        """Test constants flow through a chain into propagated_root while dependencies stay as written."""
+        manager = ExpressionManager()
+        manager.add_expression("Alpha", "(3*5)")
+        manager.add_expression("Pi", "(Alpha+1)")
+        manager.add_expression("Mu", "((Pi*2)+Beta)")
+
+        assert manager.propagate_constants() == 2
+        assert manager.expressions["Pi"].propagated_root.number == 16
+        propagated = manager.expressions["Mu"].propagated_root
+        assert (propagated.left.number, propagated.right.value) == (32, "Beta")
+        assert manager.expressions["Pi"].parse_tree.to_expression("optimised") == "(Alpha+1)"
+        assert manager.dependencies["Pi"] == {"Alpha"}
+        manager.add_expression("Beta", "(1+1)")
+        manager.evaluate_dirty()
+        assert manager.expressions["Mu"].value == 34
+
+    def test_propagate_constants_reruns_only_after_changes(self):
+        """Test an edit drops the propagated trees of its dependents and only they are redone."""
+        manager = ExpressionManager()
+        manager.add_expression("Alpha", "(3*5)")
+        manager.add_expression("Pi", "(Alpha+1)")
+        manager.add_expression("Other", "(Alpha*2)")
+        manager.add_expression("Lone", "(Zeta+1)")
+        manager.add_expression("Zeta", "(2+2)")
+        assert manager.propagate_constants() == 3
+        assert manager.propagate_constants() == 0
+
+        manager.add_expression("Alpha", "(1+1)")
+        assert manager.expressions["Pi"].propagated_root is None
+        assert manager.propagate_constants() == 2
+        assert manager.expressions["Lone"].propagated_root.number == 5
+        manager.evaluate_dirty()
+        assert manager.expressions["Pi"].value == 3
+        assert manager.expressions["Other"].value == 4
+
+    def test_propagate_constants_keeps_evaluation_results(self):
+        """Test cycles, missing variables, complex values and division by zero evaluate as before."""
+        lines = [
+            ("A", "(B+1)"), ("B", "(A+1)"), ("C", "(A*2)"),
+            ("X", "(0-1)"), ("Z", "(X**0.5)"), ("W", "(Z+1)"),
+            ("M", "(Missing+1)"), ("N", "(M*2)"),
+            ("K", "(2-2)"), ("D", "(K**2)"),
+        ]
+        plain = ExpressionManager()
+        manager = ExpressionManager()
+        for name, expr in lines:
+            plain.add_expression(name, expr)
+            manager.add_expression(name, expr)
+        plain.evaluate_all()
+        manager.optimise_all(inline_limit=7)
+        manager.evaluate_all()
+
+        for name, _ in lines:
+            assert manager.expressions[name].value == plain.expressions[name].value
+        for name in ("A", "B", "C", "Z"):
+            assert manager.expressions[name].propagated_root is None
+
+    def test_propagate_constants_keeps_references_to_undefined_variables(self):
+        """Test a propagated zero does not fold away a reference that still evaluates to None."""
+        lines = [("F", "(0+0)"), ("B", "(F*E)"), ("G", "(E**F)"), ("H", "((F*E)+1)"), ("J", "(F+E)")]
+        plain = ExpressionManager()
+        manager = ExpressionManager()
+        for name, expr in lines:
+            plain.add_expression(name, expr)
+            manager.add_expression(name, expr)
+        plain.evaluate_all()
+        manager.optimise_all()
+        manager.evaluate_all()
+
+        for name, _ in lines:
+            assert manager.expressions[name].value == plain.expressions[name].value
+        assert manager.expressions["B"].value is None
+        for name in ("B", "G", "H"):
+            assert manager.expressions[name].propagated_root is None
+        assert manager.expressions["J"].propagated_root.value == "E"
+
+    def test_propagate_constants_inlines_small_trees(self):
+        """Test inline_limit substitutes small non-constant trees and leaves larger ones."""
+        manager = ExpressionManager()
+        manager.add_expression("Small", "(Free*2)")
+        manager.add_expression("Large", "((Free*2)+(Free*3))")
+        manager.add_expression("Use", "(Small+Large)")
+
+        manager.propagate_constants(inline_limit=3)
+        propagated = manager.expressions["Use"].propagated_root
+        assert (propagated.left.value, propagated.left.left.value) == ("*", "Free")
+        assert propagated.right.value == "Large"
+        assert manager.evaluate_variable("Use") is None
+        manager.add_expression("Free", "(1+2)")
+        manager.evaluate_dirty()
+        assert manager.expressions["Use"].value == 21
+
+    def test_variables_sharing_a_cached_tree_keep_their_own_state(self):
+        """Test propagation stays per variable when the parse cache gives two variables one tree."""
+        manager = ExpressionManager()
+        manager.add_expression("A", "(2+3)")
+        manager.add_expression("P", "(A+1)")
+        manager.propagate_constants()
+        manager.add_expression("Q", "(A+1)")
+
+        assert manager.expressions["P"].parse_tree is manager.expressions["Q"].parse_tree
+        assert manager.expressions["P"].propagated_root.number == 6
+        assert manager.expressions["Q"].propagated_root is None
+        assert manager.expressions["Q"].parse_tree.to_expression("optimised") == "(A+1)"
+        manager.add_expression("Q", "(A*2)")
+        assert manager.expressions["P"].propagated_root.number == 6
+
+    def test_value_read_while_dirty_is_dropped_by_later_edits(self):
+        """Test a value read on demand before its dependency exists is re-evaluated once it does."""
+        manager = ExpressionManager()
+        manager.add_expression("B", "(A+1)")
+        manager.add_expression("C", "(B*2)")
+        assert manager.expressions["C"].value is None
+        assert manager.expressions["B"].value is None
+
+        manager.add_expression("A", "(2+3)")
+        assert manager.expressions["B"].value == 6
+        assert manager.expressions["C"].value == 12
+
+    def test_value_reads_share_work_between_edits(self):
+        """Test on-demand reads of a doubling diamond share one cache that edits clear."""
+        manager = ExpressionManager()
+        manager.add_expression(variable_name(0), "(1+0)")
+        for i in range(1, 60):
+            manager.add_expression(variable_name(i), f"({variable_name(i - 1)}+{variable_name(i - 1)})")
+        top = manager.expressions[variable_name(59)]
+        assert top.value == 2 ** 59
+        assert manager.read_cache[variable_name(30)] == 2 ** 30
+        manager.add_expression(variable_name(0), "(1+1)")
+        assert manager.read_cache == {}
+        assert top.value == 2 ** 60
+
+    def test_group_by_value_evaluates_dirty_variables_in_one_pass(self):
+        """Test grouping a long unevaluated chain stores every value with one pass."""
+        manager = ExpressionManager()
+        length = 3000
+        manager.add_expression(variable_name(0), "(1+0)")
+        for i in range(1, length):
+            manager.add_expression(variable_name(i), f"({variable_name(i - 1)}+1)")
+        groups = manager.group_by_value()
+        assert len(groups) == length + 1
+        assert groups[0][0] == length and groups[-1] == (None, [])
+        assert not manager.dirty
+        assert manager.expressions[variable_name(length - 1)].is_evaluated
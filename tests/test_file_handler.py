@@ -0,0 +1,58 @@
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from io_utils.file_handler import FileHandler
+import pytest
+
+
+@pytest.fixture
+def handler(tmp_path):
+    (tmp_path / 'data' / 'nested').mkdir(parents=True)
+    (tmp_path / 'data' / 'a.txt').write_text("A=(1+2)\n", encoding="utf-8")
+    (tmp_path / 'data' / 'nested' / 'b.txt').write_text("B=(2*3)\n", encoding="utf-8")
+    return FileHandler(tmp_path)
+
+
+class TestFileHandler:
+    """Test suite for the path-based FileHandler API."""
+
+    def test_read_path_resolves_by_name(self, handler):
+        assert handler.read_path('b.txt') == "B=(2*3)\n"
+        assert handler.read_path('nested/b.txt') == "B=(2*3)\n"
+
+    def test_read_path_missing_file(self, handler):
+        with pytest.raises(FileNotFoundError):
+            handler.read_path('missing.txt')
+
+    def test_open_stream_yields_lines(self, handler):
+        with handler.open_stream('a.txt') as file:
+            assert list(file) == ["A=(1+2)\n"]
+
+    def test_lookups_reuse_index(self, handler):
+        handler.resolve('a.txt')
+        handler.resolve('b.txt')
+        assert handler.index.builds == 1
+
+    def test_index_rebuilt_when_directory_changes(self, handler, tmp_path):
+        handler.resolve('a.txt')
+        new_file = tmp_path / 'data' / 'nested' / 'c.txt'
+        new_file.write_text("C=(1+1)\n", encoding="utf-8")
+        # Make sure the directory mtime moves even on coarse clocks
+        stat = os.stat(new_file.parent)
+        os.utime(new_file.parent, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert handler.read_path('c.txt') == "C=(1+1)\n"
+        assert handler.index.builds == 2
+
+    def test_write_path_goes_to_data(self, handler, tmp_path):
+        path = handler.write_path('out.txt', "X=(1+1)")
+        assert path == tmp_path / 'data' / 'out.txt'
+        assert handler.read_path('out.txt') == "X=(1+1)"
+
+    @pytest.mark.parametrize("filename", ['', 'out.csv', 'o|ut.txt'])
+    def test_write_path_rejects_bad_names(self, handler, filename):
+        with pytest.raises(ValueError):
+            handler.write_path(filename, "X=(1+1)")
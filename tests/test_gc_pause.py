@@ -0,0 +1,33 @@
+import gc
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dask_core.gc_pause import paused_collection
+
+
+class TestPausedCollection:
+    """Test suite for paused_collection."""
+
+    def test_restores_collection_after_block(self):
+        """Test the collector is off inside the block and back on after, even on error."""
+        assert gc.isenabled()
+        try:
+            with paused_collection():
+                assert not gc.isenabled()
+                raise ValueError
+        except ValueError:
+            pass
+        assert gc.isenabled()
+
+    def test_leaves_disabled_collection_disabled(self):
+        """Test a collector that was already off stays off."""
+        gc.disable()
+        try:
+            with paused_collection():
+                pass
+            assert not gc.isenabled()
+        finally:
+            gc.enable()
@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dask_core.graph import strongly_connected_components, find_cycles, cycle_path
+import pytest
+
+
+class TestGraph:
+    """Test suite for the dependency graph algorithms."""
+
+    def test_strongly_connected_components(self):
+        dependencies = {"A": {"B"}, "B": {"A", "C"}, "C": set(), "D": {"Missing"}}
+        components = strongly_connected_components(dependencies, dependencies)
+        assert sorted(sorted(component) for component in components) == [["A", "B"], ["C"], ["D"]]
+
+    def test_find_cycles_includes_self_references(self):
+        dependencies = {"A": {"A"}, "B": {"A"}}
+        assert find_cycles(dependencies, dependencies) == [["A"]]
+
+    def test_find_cycles_on_deep_chain_without_recursion(self):
+        length = sys.getrecursionlimit() * 3
+        dependencies = {i: {i + 1} for i in range(length)}
+        dependencies[length] = {0}
+        cycles = find_cycles(dependencies, dependencies)
+        assert len(cycles) == 1
+        assert len(cycles[0]) == length + 1
+
+    def test_cycle_path_is_shortest_cycle_through_first_member(self):
+        dependencies = {"A": {"B", "C"}, "B": {"C"}, "C": {"A"}}
+        assert cycle_path(["A", "B", "C"], dependencies) == ["A", "C", "A"]
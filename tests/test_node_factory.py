@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dask_core.evaluator import Evaluator
+from dask_core.node_factory import NodeFactory, InternedNode
+from dask_core.parser import ExpressionParser
+from dask_core.tree_node import TreeNode
+import pytest
+
+
+class TestNodeFactory:
+    """Test suite for hash-consed (shared) tree nodes."""
+
+    def test_equal_nodes_are_shared(self):
+        factory = NodeFactory()
+        first = factory.make('+', factory.make('A'), factory.make('2'))
+        second = factory.make('+', factory.make('A'), factory.make('2'))
+        assert first is second
+        assert len(factory) == 3
+
+    def test_values_of_different_types_stay_apart(self):
+        factory = NodeFactory()
+        assert factory.make(1) is not factory.make(1.0)
+        assert factory.make(1) is not factory.make('1')
+
+    def test_interned_nodes_are_immutable(self):
+        node = NodeFactory().make('A')
+        with pytest.raises(AttributeError):
+            node.value = 'B'
+        with pytest.raises(AttributeError):
+            node.left = TreeNode('C')
+
+    def test_clone_is_mutable(self):
+        factory = NodeFactory()
+        clone = factory.make('+', factory.make('A'), factory.make('2')).clone()
+        assert not isinstance(clone, InternedNode)
+        clone.left.value = 'B'
+        assert clone.left.value == 'B'
+
+    def test_intern_plain_tree(self):
+        factory = NodeFactory()
+        root = ExpressionParser().parse("((A+1)*(A+1))").original_root
+        interned = factory.intern(root)
+        assert interned.left is interned.right
+        assert factory.intern(root) is interned
+
+    def test_parser_shares_subtrees_across_expressions(self):
+        factory = NodeFactory()
+        parser = ExpressionParser(cache_size=0, node_factory=factory)
+        first = parser.parse("((Alpha*2)+3)")
+        second = parser.parse("((Alpha*2)-4)")
+        assert first.original_root.left is second.original_root.left
+
+    def test_optimise_and_evaluate_shared_tree(self):
+        factory = NodeFactory()
+        parser = ExpressionParser(cache_size=0, node_factory=factory)
+        tree = parser.parse("(((2*3)+A)*((2*3)+A))")
+        assert tree.optimised_root.left is tree.optimised_root.right
+        assert tree.optimised_root.left.left.value == 6
+        assert Evaluator().eval_node(tree.optimised_root, {}) is None
+        # The shared input tree is left untouched
+        assert tree.original_root.left.left.value == '*'
@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dask_core.operators import OPERATORS, register_operator, may_divide_by_zero
+from dask_core.lexer import tokenize
+from dask_core.parser import ExpressionParser
+from dask_core.evaluator import Evaluator
+from dask_core.expression_manager import ExpressionManager
+from dask_core.tree_node import TreeNode
+from features.cost_analysis import CostAnalyser
+from features.differentiation import differentiate, UnsupportedOperatorError
+import pytest
+
+
+class TestOperatorRegistry:
+    """Test suite for the operator registry."""
+
+    @pytest.fixture
+    def modulo(self):
+        """Register a temporary % operator and remove it afterwards."""
+        operator = register_operator('%', lambda left, right: left % right, 2)
+        yield operator
+        del OPERATORS['%']
+
+    def test_builtin_operators_registered_in_order(self):
+        assert list(OPERATORS) == ['+', '-', '*', '/', '++', '**', '//']
+
+    def test_builtin_cost_weights(self):
+        assert [OPERATORS[op].cost for op in OPERATORS] == [1, 1, 2, 2, 3, 3, 3]
+
+    def test_register_rejects_non_binary(self):
+        with pytest.raises(ValueError):
+            register_operator('!', lambda value: value, 1, arity=1)
+
+    def test_register_rejects_invalid_symbol(self):
+        with pytest.raises(ValueError):
+            register_operator('x', lambda left, right: left, 1)
+
+    def test_registered_operator_works_end_to_end(self, modulo):
+        """Test a single registration reaches every stage of the pipeline."""
+        assert TreeNode('%').is_operator()
+        assert tokenize("(A%3)") == ["(", "A", "%", "3", ")"]
+
+        tree = ExpressionParser().parse("(10%4)")
+        assert tree.original_root.value == '%'
+        assert tree.optimised_root.value == 2
+        assert Evaluator().eval_node(tree.original_root, {}) == 2
+
+        manager = ExpressionManager()
+        _, valid, name, expr = manager.validate_expression("a=(10%4)")
+        assert valid is True
+        assert (name, expr) == ("a", "(10%4)")
+
+        stats = CostAnalyser(ExpressionParser().parse("(A%4)")).statistics
+        assert stats["original_weighted_op_cost"] == 2
+
+    def test_operator_without_derivative_is_unsupported(self, modulo):
+        root = ExpressionParser().parse("(A%4)").original_root
+        with pytest.raises(UnsupportedOperatorError):
+            differentiate(root, "A")
+
+    def test_may_divide_by_zero_follows_registry(self, modulo):
+        assert not may_divide_by_zero("((A*2)+(B++3))")
+        assert may_divide_by_zero("(A//2)")
+        assert may_divide_by_zero("(A**2)")
+        # Registered operators raise unless they say otherwise
+        assert may_divide_by_zero("(A%4)")
+        with pytest.raises(ZeroDivisionError):
+            ExpressionParser(cache_size=0).parse("(1%0)")
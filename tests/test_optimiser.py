@@ -4,8 +4,11 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from dask_core.tree_node import TreeNode
-from features.optimiser import apply_identity_rules, apply_zero_rules
+from dask_core.tree_node import TreeNode, SharedNode
+from features.optimiser import (
+    apply_identity_rules, apply_zero_rules, apply_reassociation, share_common_subtrees, substitute_variables,
+)
+from dask_core.evaluator import Evaluator
 
 
 class TestOptimiser:
@@ -13,34 +16,94 @@ class TestOptimiser:
 
     def test_apply_identity_rules_add_zero(self):
         node = TreeNode("+", TreeNode("X"), TreeNode("0"))
-        result = apply_identity_rules(node, False, True, float)
+        result = apply_identity_rules(node, False, True)
         assert result.value == "X"
 
     def test_apply_identity_rules_mul_one(self):
         node = TreeNode("*", TreeNode("1"), TreeNode("Y"))
-        result = apply_identity_rules(node, True, False, float)
+        result = apply_identity_rules(node, True, False)
         assert result.value == "Y"
 
     def test_apply_identity_rules_div_one(self):
         node = TreeNode("/", TreeNode("Z"), TreeNode("1"))
-        result = apply_identity_rules(node, False, True, float)
+        result = apply_identity_rules(node, False, True)
         assert result.value == "Z"
 
     def test_apply_identity_rules_pow_one_zero(self):
         node_one = TreeNode("**", TreeNode("A"), TreeNode("1"))
-        result_one = apply_identity_rules(node_one, False, True, float)
+        result_one = apply_identity_rules(node_one, False, True)
         assert result_one.value == "A"
 
         node_zero = TreeNode("**", TreeNode("A"), TreeNode("0"))
-        result_zero = apply_identity_rules(node_zero, False, True, float)
+        result_zero = apply_identity_rules(node_zero, False, True)
         assert result_zero.value == 1
 
     def test_apply_zero_rules_mul_zero(self):
         node = TreeNode("*", TreeNode("0"), TreeNode("X"))
-        result = apply_zero_rules(node, True, False, float)
+        result = apply_zero_rules(node, True, False)
         assert result.value == 0
 
     def test_apply_zero_rules_zero_div_nonzero(self):
         node = TreeNode("/", TreeNode("0"), TreeNode("2"))
-        result = apply_zero_rules(node, True, True, float)
+        result = apply_zero_rules(node, True, True)
         assert result.value == 0
+
+    def test_apply_reassociation_gathers_constants(self):
+        fold = Evaluator()._apply_operator
+        node = TreeNode("+", TreeNode("2"), TreeNode("+", TreeNode("X"), TreeNode("3")))
+        result = apply_reassociation(node, fold)
+        assert (result.value, result.left.value, result.right.value) == ("+", "X", 5)
+
+    def test_apply_reassociation_keeps_operand_order(self):
+        fold = Evaluator()._apply_operator
+        node = TreeNode("*", TreeNode("*", TreeNode("B"), TreeNode("2")), TreeNode("*", TreeNode("A"), TreeNode("4")))
+        result = apply_reassociation(node, fold)
+        assert (result.left.left.value, result.left.right.value, result.right.value) == ("B", "A", 8)
+
+    def test_apply_reassociation_applies_identity_rules(self):
+        fold = Evaluator()._apply_operator
+        node = TreeNode("*", TreeNode("*", TreeNode("X"), TreeNode("2")), TreeNode("0.5"))
+        assert apply_reassociation(node, fold).value == "X"
+
+    def test_apply_reassociation_leaves_single_constant_chains(self):
+        fold = Evaluator()._apply_operator
+        node = TreeNode("+", TreeNode("2"), TreeNode("+", TreeNode("X"), TreeNode("Y")))
+        assert apply_reassociation(node, fold) is None
+        assert apply_reassociation(TreeNode("-", TreeNode("2"), TreeNode("3")), fold) is None
+
+    def test_share_common_subtrees_merges_equal_subtrees(self):
+        product = lambda: TreeNode("*", TreeNode("A"), TreeNode("B"))
+        root = TreeNode("+", product(), TreeNode("-", product(), TreeNode("1")))
+        result = share_common_subtrees(root)
+        assert result.left is result.right.left
+        assert type(result.left) is SharedNode
+        assert type(result) is TreeNode and type(result.right) is TreeNode
+
+    def test_share_common_subtrees_matches_folded_and_literal_numbers(self):
+        folded = TreeNode("+", TreeNode("B"), TreeNode(2))
+        literal = TreeNode("+", TreeNode("B"), TreeNode("2"))
+        result = share_common_subtrees(TreeNode("*", folded, literal))
+        assert result.left is result.right
+        unrelated = TreeNode("*", TreeNode("+", TreeNode("B"), TreeNode(2)), TreeNode("+", TreeNode("B"), TreeNode("C")))
+        assert share_common_subtrees(unrelated) is unrelated
+
+    def test_share_common_subtrees_keeps_trees_without_repeats(self):
+        root = TreeNode("+", TreeNode("*", TreeNode("A"), TreeNode("A")), TreeNode("*", TreeNode("A"), TreeNode("B")))
+        assert share_common_subtrees(root) is root
+        assert share_common_subtrees(TreeNode("A")).value == "A"
+
+    def test_share_common_subtrees_is_idempotent(self):
+        square = lambda: TreeNode("*", TreeNode("X"), TreeNode("2"))
+        root = TreeNode("-", TreeNode("+", square(), square()), TreeNode("+", square(), square()))
+        result = share_common_subtrees(root)
+        assert result.left is result.right
+        assert result.left.left is result.left.right
+        assert share_common_subtrees(result) is result
+
+    def test_substitute_variables_replaces_named_leaves(self):
+        shared = TreeNode("*", TreeNode("X"), TreeNode("Y"))
+        root = TreeNode("+", shared, TreeNode("-", TreeNode("X"), TreeNode("2")))
+        result = substitute_variables(root, lambda name: TreeNode(5) if name == "X" else None)
+        assert (result.left.left.number, result.left.right.value) == (5, "Y")
+        assert (result.right.left.number, result.right.right.value) == (5, "2")
+        assert substitute_variables(root, lambda name: None) is root
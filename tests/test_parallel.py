@@ -0,0 +1,115 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dask_core.expression_manager import ExpressionManager
+from dask_core.parse_tree import PENDING
+from dask_core.parallel import connected_components, partition, evaluate_chunk, line_aligned_ranges, parse_chunk
+from dask_core.parser import ExpressionParser
+from dask_core.serialise import encode_tree
+import pytest
+
+
+class TestParallel:
+    """Test suite for the parallel evaluation helpers."""
+
+    def test_connected_components_ignores_undefined_names(self):
+        dependencies = {"A": {"B"}, "B": set(), "C": {"Missing"}, "D": {"C"}}
+        components = connected_components(["A", "B", "C", "D"], dependencies)
+        assert sorted(sorted(component) for component in components) == [["A", "B"], ["C", "D"]]
+
+    def test_partition_balances_components(self):
+        chunks = partition([["A", "B", "C"], ["D"], ["E", "F"], ["G"]], 2)
+        assert sorted(len(chunk) for chunk in chunks) == [3, 4]
+
+    def test_evaluate_chunk_orders_dependencies_and_cycles(self):
+        parser = ExpressionParser()
+        chunk = [
+            (name, encode_tree(parser.parse(expr).optimised_root))
+            for name, expr in [("Pi", "(Alpha+1)"), ("Alpha", "(3*5)"), ("A", "(B+1)"), ("B", "(A+1)")]
+        ]
+        values, hits, misses = evaluate_chunk(chunk)
+        assert values == {"Pi": 16, "Alpha": 15, "A": None, "B": None}
+        assert (hits, misses) == (1, 2)
+
+    def test_evaluate_chunk_uses_known_values(self):
+        parser = ExpressionParser()
+        chunk = [
+            (name, encode_tree(parser.parse(expr).optimised_root, numbers=True))
+            for name, expr in [("Pi", "(Alpha+1.5)"), ("Tau", "(Pi*Missing)")]
+        ]
+        values, hits, misses = evaluate_chunk(chunk, {"Alpha": 15})
+        assert values == {"Pi": 16.5, "Tau": None}
+        assert (hits, misses) == (2, 2)
+
+    def test_line_aligned_ranges_cover_file_on_line_starts(self, tmp_path):
+        path = tmp_path / "session.txt"
+        lines = [f"A=({i}+1)\n" for i in range(50)]
+        path.write_text(''.join(lines), encoding="utf-8")
+        data = path.read_bytes()
+        ranges = line_aligned_ranges(path, 7)
+        assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start and data[start - 1:start] == b"\n"
+
+    def test_parse_chunk_stops_at_invalid_line(self, tmp_path):
+        path = tmp_path / "session.txt"
+        path.write_text("A=(1+2)\n\nB=(1+)\nC=(2+2)\n", encoding="utf-8")
+        lines, parsed, error = parse_chunk((str(path), 0, path.stat().st_size))
+        assert lines == 3
+        assert parsed == [("A", "(1+2)")]
+        assert error == ("*Expression cannot end with an operator. Please re enter the expression*", "B=(1+)")
+
+    def test_parse_chunk_reports_unparsable_line(self, tmp_path):
+        path = tmp_path / "session.txt"
+        path.write_text("A=(1+2)\nB=((2+3)4)\nC=(2+2)\n", encoding="utf-8")
+        lines, parsed, error = parse_chunk((str(path), 0, path.stat().st_size))
+        assert lines == 2
+        assert [name for name, _ in parsed] == ["A"]
+        assert error == ("Expression could not be parsed: B=((2+3)4)", "B=((2+3)4)")
+
+    def test_load_parallel_merges_in_file_order(self, tmp_path):
+        path = tmp_path / "session.txt"
+        lines = [f"A=({i}+1)" for i in range(200)] + ["B=(A*2)"]
+        path.write_text('\n'.join(lines), encoding="utf-8")
+        manager = ExpressionManager()
+        stats = manager.load_parallel(path, workers=2, chunk_bytes=256)
+        assert stats['error'] is None
+        assert (stats['lines'], stats['loaded']) == (201, 201)
+        manager.evaluate_dirty()
+        assert manager.expressions["A"].expression == "(199+1)"
+        assert manager.expressions["B"].value == 400
+
+    def test_load_parallel_builds_trees_on_first_use(self, tmp_path):
+        path = tmp_path / "session.txt"
+        path.write_text("A=(1+2)\nB=(A*2)\n", encoding="utf-8")
+        manager = ExpressionManager()
+        manager.load_parallel(path, workers=2)
+        assert manager.expressions["B"]._parse_tree is PENDING
+        assert manager.expressions["B"].value == 6
+
+    def test_load_parallel_rolls_back_on_error(self, tmp_path):
+        path = tmp_path / "session.txt"
+        lines = [f"X{chr(97 + i % 26)}=({i}+1)" for i in range(100)] + ["B=(1/0)"]
+        path.write_text('\n'.join(lines), encoding="utf-8")
+        manager = ExpressionManager()
+        manager.add_expression("Xa", "(5+5)")
+        stats = manager.load_parallel(path, workers=2, chunk_bytes=128)
+        assert stats['error'] == "Division by zero detected in expression: B=(1/0)"
+        assert set(manager.expressions) == {"Xa"}
+        assert manager.expressions["Xa"].expression == "(5+5)"
+
+    def test_load_parallel_rolls_back_on_unparsable_line(self, tmp_path):
+        path = tmp_path / "session.txt"
+        lines = [f"X{chr(97 + i % 26)}=({i}+1)" for i in range(100)] + ["B=((2+3)4)"]
+        path.write_text('\n'.join(lines), encoding="utf-8")
+        manager = ExpressionManager()
+        manager.add_expression("Xa", "(5+5)")
+        stats = manager.load_parallel(path, workers=2, chunk_bytes=128)
+        assert stats['error'] == "Expression could not be parsed: B=((2+3)4)"
+        assert stats['line'] == "B=((2+3)4)"
+        assert stats['loaded'] == 0
+        assert set(manager.expressions) == {"Xa"}
+        assert manager.expressions["Xa"].expression == "(5+5)"
@@ -6,7 +6,7 @@ from unittest.mock import patch, Mock
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from dask_core.parse_tree import ParseTree
+from dask_core.parse_tree import ParseTree, PENDING
 from dask_core.tree_node import TreeNode
 import pytest
 
@@ -26,6 +26,36 @@ class TestParseTree:
         tree = ParseTree(root)
         assert tree.original_root == root
 
+    def test_parse_tree_optimises_on_first_use(self):
+        """Test the optimised root is computed when first read, then cached."""
+        root = TreeNode("+", TreeNode("2"), TreeNode("3"))
+        tree = ParseTree(root)
+        assert tree._optimised is PENDING
+        optimised = tree.optimised_root
+        assert optimised.value == 5
+        assert tree.optimised_root is optimised
+
+    def test_parse_tree_optimise_runs_to_fixed_point(self):
+        """Test constants gathered from a chain fold with the rest of the tree."""
+        # (X+1)+(Y+(0-1)): the chain's constants cancel, then +0 is dropped
+        root = TreeNode("+",
+                        TreeNode("+", TreeNode("X"), TreeNode("1")),
+                        TreeNode("+", TreeNode("Y"), TreeNode("-", TreeNode("0"), TreeNode("1"))))
+        tree = ParseTree(root)
+        assert tree.to_expression("optimised") == "(X+Y)"
+        assert tree.optimise(tree.optimised_root, {}) is tree.optimised_root
+
+    def test_parse_tree_optimise_shares_common_subtrees(self):
+        """Test subtrees that are equal after folding become one shared node."""
+        # ((A*(1+1)) - (A*(3-1))): both sides fold to (A*2)
+        root = TreeNode("-",
+                        TreeNode("*", TreeNode("A"), TreeNode("+", TreeNode("1"), TreeNode("1"))),
+                        TreeNode("*", TreeNode("A"), TreeNode("-", TreeNode("3"), TreeNode("1"))))
+        tree = ParseTree(root)
+        optimised = tree.optimised_root
+        assert optimised.left is optimised.right
+        assert tree.to_expression("optimised") == "((A*2)-(A*2))"
+
     def test_parse_tree_evaluate_none_root(self):
         """Test evaluate() with None root."""
         tree = ParseTree()
@@ -328,3 +358,13 @@ class TestParseTree:
         root = TreeNode("*", TreeNode("5"), TreeNode("6"))
         tree = ParseTree(root)
         assert tree.to_expression() == "(5*6)"
+
+    def test_parse_tree_compile_is_cached(self):
+        """Test compile() caches the closure until the root changes."""
+        tree = ParseTree(TreeNode("+", TreeNode("A"), TreeNode("3")))
+        compiled = tree.compile()
+        assert tree.compile() is compiled
+
+        tree.optimised_root = TreeNode("*", TreeNode("2"), TreeNode("3"))
+        assert tree.compile() is not compiled
+        assert tree.evaluate_compiled({}) == 6
@@ -4,8 +4,8 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from dask_core.lexer import tokenize
-from dask_core.parser import ExpressionParser
+from dask_core.lexer import tokenize, iter_tokens
+from dask_core.parser import ExpressionParser, parses
 from dask_core.tree_node import TreeNode
 import pytest
 
@@ -573,9 +573,103 @@ class TestParser:
         assert tree.original_root.right.left.value == "C"
         assert tree.original_root.right.right.value == "D"
 
+    def test_parse_cache_reuses_tree(self, parser):
+        """Test repeated expressions return the cached tree and count hits."""
+        first = parser.parse("(A+(2*B))")
+        second = parser.parse(" (A + (2*B)) ")
+        assert second is first
+        assert parser.cache_info() == {'hits': 1, 'misses': 1, 'size': 1, 'max_size': 4096}
+
+    def test_parse_cache_evicts_least_recently_used(self):
+        """Test the cache keeps at most cache_size trees."""
+        parser = ExpressionParser(cache_size=2)
+        a = parser.parse("(A+1)")
+        parser.parse("(B+1)")
+        parser.parse("(A+1)")
+        parser.parse("(C+1)")
+        assert parser.parse("(A+1)") is a
+        assert parser.cache_info()['size'] == 2
+        assert parser.cache_misses == 3
+        parser.parse("(B+1)")
+        assert parser.cache_misses == 4
+
+    def test_parse_cache_disabled(self):
+        """Test cache_size=0 parses every time."""
+        parser = ExpressionParser(cache_size=0)
+        assert parser.parse("(A+1)") is not parser.parse("(A+1)")
+        assert parser.cache_info()['size'] == 0
+
+    def test_parse_zero_division_is_not_cached(self, parser):
+        """Test constant division by zero raises on every parse."""
+        for _ in range(2):
+            with pytest.raises(ZeroDivisionError):
+                parser.parse("(1/0)")
+
     def test_parse_empty_string(self, parser):
         """Test parsing an empty string."""
         expr = ""
         # Empty string causes an error because node_stack is empty when trying to pop
         with pytest.raises(IndexError):
             parser.parse(expr)
+
+    @pytest.mark.parametrize("expr", ["((2+3)4)", "((2)+3)", "(2(+3))", "(2+3)(4)", ""])
+    def test_parses_rejects_what_the_parser_cannot_build(self, parser, expr):
+        """Test parses() is False exactly where parse raises IndexError."""
+        assert not parses(iter_tokens(expr))
+        with pytest.raises(IndexError):
+            parser.parse(expr)
+
+    @pytest.mark.parametrize("expr", ["(2+3+4)", "((A+2)*(3-B))", "(1+2)3", "(2+(3*4))"])
+    def test_parses_accepts_what_the_parser_builds(self, parser, expr):
+        """Test parses() is True for expressions the parser builds."""
+        assert parses(iter_tokens(expr))
+        parser.parse(expr)
+
+
+class TestIterTokens:
+    """Test suite for the single-pass iter_tokens scanner."""
+
+    def test_iter_tokens_kinds_and_spans(self):
+        from dask_core.lexer import iter_tokens, LPAREN, RPAREN
+        from dask_core.tree_node import NUMBER, VARIABLE, OPERATOR
+
+        tokens = list(iter_tokens("(Alpha++2.5)"))
+        assert tokens == [
+            (LPAREN, "(", 0, 1),
+            (VARIABLE, "Alpha", 1, 6),
+            (OPERATOR, "++", 6, 8),
+            (NUMBER, "2.5", 8, 11),
+            (RPAREN, ")", 11, 12),
+        ]
+
+    def test_iter_tokens_is_lazy(self):
+        from dask_core.lexer import iter_tokens
+
+        tokens = iter_tokens("(A+B)")
+        assert next(tokens)[1] == "("
+        assert next(tokens)[1] == "A"
+
+    def test_iter_tokens_skips_whitespace_and_flags_unknown(self):
+        from dask_core.lexer import iter_tokens, UNKNOWN
+
+        tokens = list(iter_tokens("A + $"))
+        assert [text for _, text, _, _ in tokens] == ["A", "+", "$"]
+        assert tokens[1][2:] == (2, 3)
+        assert tokens[2][0] == UNKNOWN
+
+    def test_iter_tokens_matches_tokenize_on_valid_expressions(self):
+        from dask_core.lexer import iter_tokens
+
+        for expr in ["(Alpha+(Delta+(Pi*(Beta*(Gamma/Sigma)))))", "(3//(4++5))", "(2*(65.5+2.25))", "(A**B)"]:
+            assert [text for _, text, _, _ in iter_tokens(expr)] == tokenize(expr)
+
+    def test_parse_accepts_pre_scanned_tokens(self):
+        from dask_core.lexer import iter_tokens
+
+        expr = "(A+(2*B))"
+        tree = ExpressionParser().parse(expr, tokens=iter_tokens(expr))
+        assert tree.original_root.right.left.number == 2
+
+    def test_parse_variable_with_underscore(self):
+        tree = ExpressionParser().parse("(my_var+1)")
+        assert tree.original_root.left.value == "my_var"
@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dask_core.parser import ExpressionParser
+from dask_core.serialise import encode_tree, decode_tree
+import pytest
+
+
+class TestSerialise:
+    """Test suite for the pre-order tree encoding."""
+
+    def test_encode_tree_is_pre_order(self):
+        tree = ExpressionParser().parse("(2+(4*5))")
+        assert encode_tree(tree.original_root) == ('+', '2', '*', '4', '5')
+
+    def test_round_trip_keeps_structure(self):
+        tree = ExpressionParser().parse("((Alpha++2.5)//(Beta**(Gamma-1)))")
+        decoded = decode_tree(encode_tree(tree.original_root))
+        assert encode_tree(decoded) == encode_tree(tree.original_root)
+        assert decoded.left.right.is_number()
+        assert decoded.right.left.is_variable()
+
+    def test_round_trip_none(self):
+        assert encode_tree(None) == ()
+        assert decode_tree(()) is None
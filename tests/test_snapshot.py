@@ -0,0 +1,92 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dask_core.expression_manager import ExpressionManager
+from dask_core.parse_tree import PENDING
+from dask_core.snapshot import SnapshotParseTree, SnapshotError
+import pytest
+
+
+def build_session() -> ExpressionManager:
+    manager = ExpressionManager()
+    for line in ["A=((2+3)*B)", "B=(4/2)", "C=(C+1)", "D=(C*2)", "E=((X*1)+0)",
+                 "F=(2**100)", "G=((0-1)**0.5)", "H=(1.5+2)"]:
+        _, _, name, expr, tokens = manager.validate_and_tokenize(line)
+        manager.add_expression(name, expr, manager.parser.parse(expr, tokens))
+    return manager
+
+
+class TestSnapshot:
+    """Test suite for binary session snapshots."""
+
+    def test_round_trip(self, tmp_path):
+        """Test names, texts, values and both trees survive a save and load."""
+        manager = build_session()
+        path = tmp_path / "session.snap"
+        manager.save_snapshot(path)
+        loaded = ExpressionManager()
+        loaded.load_snapshot(path)
+        assert list(loaded.expressions) == list(manager.expressions)
+        for name, expression in manager.expressions.items():
+            restored = loaded.expressions[name]
+            assert restored.expression == expression.expression
+            assert restored.value == expression.value
+            assert type(restored.value) is type(expression.value)
+            assert restored.parse_tree.to_expression() == expression.parse_tree.to_expression()
+            assert restored.parse_tree.to_expression("optimised") == expression.parse_tree.to_expression("optimised")
+        assert loaded.expressions["F"].value == 2**100
+        assert loaded.dependencies == manager.dependencies
+        assert loaded.cycles == [["C"]]
+        assert loaded.unresolvable == {"C", "D"}
+
+    def test_trees_decoded_lazily(self, tmp_path):
+        """Test trees are only decoded on first use, and unchanged trees stay shared."""
+        manager = build_session()
+        path = tmp_path / "session.snap"
+        manager.save_snapshot(path)
+        loaded = ExpressionManager()
+        loaded.load_snapshot(path)
+        tree = loaded.expressions["H"].parse_tree
+        assert isinstance(tree, SnapshotParseTree)
+        assert tree._original is PENDING and tree._optimised is PENDING
+        assert tree.optimised_root.value == 3.5
+        assert tree._original is PENDING
+        unchanged = loaded.expressions["D"].parse_tree
+        assert unchanged.optimised_root is unchanged.original_root
+
+    def test_loaded_session_stays_incremental(self, tmp_path):
+        """Test edits after loading re-evaluate only what depends on them."""
+        manager = build_session()
+        path = tmp_path / "session.snap"
+        manager.save_snapshot(path)
+        loaded = ExpressionManager()
+        loaded.load_snapshot(path)
+        assert loaded.dirty == set()
+        loaded.add_expression("B", "(1+1)")
+        assert loaded.dirty == {"A", "B"}
+        loaded.evaluate_dirty()
+        assert loaded.expressions["A"].value == 10
+        loaded.add_expression("X", "(1+2)")
+        loaded.evaluate_dirty()
+        assert loaded.expressions["E"].value == 3
+
+    def test_save_evaluates_dirty_values(self, tmp_path):
+        """Test values are current in the snapshot even if the session was not evaluated."""
+        manager = ExpressionManager()
+        manager.add_expression("A", "(1+2)")
+        manager.add_expression("B", "(A*2)")
+        path = tmp_path / "session.snap"
+        manager.save_snapshot(path)
+        loaded = ExpressionManager()
+        loaded.load_snapshot(path)
+        assert loaded.expressions["B"].value == 6
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test a file that is not a snapshot raises SnapshotError."""
+        path = tmp_path / "session.txt"
+        path.write_text("A=(1+2)\n" * 10)
+        with pytest.raises(SnapshotError):
+            ExpressionManager().load_snapshot(path)
@@ -0,0 +1,95 @@
+import sys
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dask_core.expression_manager import ExpressionManager
+from io_utils.file_handler import FileHandler
+from ui.menu import Menu
+import pytest
+
+
+def build_session(lines) -> ExpressionManager:
+    manager = ExpressionManager()
+    for line in lines:
+        _, _, name, expr, tokens = manager.validate_and_tokenize(line)
+        manager.add_expression(name, expr, manager.parser.parse(expr, tokens))
+    manager.evaluate_dirty()
+    return manager
+
+
+class TestGroupByValue:
+    """Test suite for ExpressionManager.group_by_value."""
+
+    def test_groups_descending_with_none_last(self):
+        """Test groups are ordered highest value first and None comes last."""
+        manager = build_session(["A=(1+1)", "B=(5+5)", "C=(Z+1)", "D=(2*3)"])
+        groups = [(value, [expr.name for expr in group]) for value, group in manager.group_by_value()]
+        assert groups == [(10, ["B"]), (6, ["D"]), (2, ["A"]), (None, ["C"])]
+
+    def test_ties_keep_insertion_order(self):
+        """Test expressions with equal values stay in the order they were added."""
+        manager = build_session(["Zeta=(1+1)", "Alpha=(4/2)", "Mid=(3+3)", "Beta=(2*1)"])
+        groups = manager.group_by_value()
+        assert [expr.name for expr in groups[1][1]] == ["Zeta", "Alpha", "Beta"]
+        # 2 and 2.0 share one group, named after the first
+        assert groups[1][0] == 2 and isinstance(groups[1][0], int)
+
+    def test_none_group_always_present(self):
+        """Test an empty None group is still reported, as the menu always did."""
+        manager = build_session(["A=(1+1)"])
+        assert manager.group_by_value()[-1] == (None, [])
+
+    def test_complex_values_sort_after_real_values(self):
+        """Test complex values (e.g. a root of a negative variable) do not break sorting."""
+        manager = build_session(["X=(0-1)", "A=(X**0.5)", "B=(1+1)"])
+        values = [value for value, _ in manager.group_by_value()]
+        assert values[0] == 2
+        assert values[1] == -1
+        assert isinstance(values[2], complex)
+        assert values[3] is None
+
+
+class TestWriteSorted:
+    """Test suite for the streamed sort report."""
+
+    def test_report_format(self):
+        """Test the report matches the option 5 output format."""
+        manager = build_session(["A=(1+1)", "B=(5+5)", "C=(Z+1)", "D=(A*1)"])
+        stream = StringIO()
+        manager.write_sorted(stream)
+        assert stream.getvalue() == (
+            "*** Expressions with value=> 10\nB=(5+5)\n\n"
+            "*** Expressions with value=> 2\nA=(1+1)\nD=(A*1)\n\n"
+            "*** Expressions with value=> None\nC=(Z+1)\n\n"
+        )
+
+    def test_menu_writes_report_to_file(self, tmp_path):
+        """Test option 5 streams the report to the chosen output file."""
+        menu = Menu()
+        menu.EM = build_session(["A=(1+1)", "B=(5+5)"])
+        path = tmp_path / "sorted.txt"
+        with patch('builtins.input', side_effect=[str(path)]):
+            with patch('sys.stdout', new=StringIO()) as fake_output:
+                menu.sortexpressions()
+        assert "Sorting of DASK expressions completed" in fake_output.getvalue()
+        assert path.read_text(encoding="utf-8").startswith("*** Expressions with value=> 10\nB=(5+5)\n")
+
+
+class TestOpenOutput:
+    """Test suite for FileHandler.open_output."""
+
+    def test_relative_names_go_to_data(self, tmp_path):
+        """Test relative output names are opened in data/."""
+        (tmp_path / 'data').mkdir()
+        with FileHandler(tmp_path).open_output('out.txt') as file:
+            file.write('x')
+        assert (tmp_path / 'data' / 'out.txt').read_text() == 'x'
+
+    def test_rejects_bad_names(self, tmp_path):
+        """Test invalid output names raise ValueError before anything is opened."""
+        with pytest.raises(ValueError):
+            FileHandler(tmp_path).open_output('out.csv')
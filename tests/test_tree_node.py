@@ -4,7 +4,7 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from dask_core.tree_node import TreeNode
+from dask_core.tree_node import TreeNode, NUMBER, VARIABLE, OPERATOR
 import pytest
 
 
@@ -146,3 +146,36 @@ class TestTreeNode:
         assert node.right == right
         assert node.is_leaf() is False
 
+
+    def test_tree_node_classifies_kind_once(self):
+        """Test leaves store their kind and pre-parsed numeric value."""
+        assert TreeNode("3.5").kind == NUMBER
+        assert TreeNode("3.5").number == 3.5
+        assert TreeNode("4.0").number == 4
+        assert TreeNode(7).number == 7
+        assert TreeNode("Alpha").kind == VARIABLE
+        assert TreeNode("Alpha").number is None
+        assert TreeNode("**").kind == OPERATOR
+        assert TreeNode(None).kind is None
+
+    def test_tree_node_modify_value_reclassifies(self):
+        """Test assigning a new value updates the stored kind."""
+        node = TreeNode("A")
+        node.value = "12"
+        assert node.is_number() is True
+        assert node.is_variable() is False
+        assert node.number == 12
+
+    def test_tree_node_clone_keeps_kind(self):
+        """Test clone() copies the kind without re-checking the value."""
+        clone = TreeNode("+", TreeNode("2"), TreeNode("X")).clone()
+        assert clone.is_operator() is True
+        assert clone.left.number == 2
+        assert clone.right.is_variable() is True
+
+    def test_tree_node_is_slotted_and_interns_names(self):
+        """Test nodes have no __dict__ and equal names share one string."""
+        first = TreeNode(''.join(['Al', 'pha']))
+        second = TreeNode(''.join(['Alp', 'ha']))
+        assert not hasattr(first, '__dict__')
+        assert first.value is second.value
@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dask_core.lexer import iter_tokens
+from dask_core.parser import ExpressionParser
+from dask_core.validator import (
+    validate_line, MISSING_EQUALS, MULTIPLE_EQUALS, MISMATCHED_PARENTHESES,
+    EMPTY_PARENTHESES, INVALID_CHARACTER, INVALID_NAME, ENDS_WITH_OPERATOR,
+    STARTS_WITH_OPERATOR, NEGATIVE_NUMBER, INVALID_NUMBER, EMPTY_EXPRESSION,
+    MISSING_OPERATOR,
+)
+import pytest
+
+
+class TestValidateLine:
+    """Test suite for the single-pass line validator."""
+
+    @pytest.mark.parametrize("line, message", [
+        ("A(1+2)", MISSING_EQUALS),
+        ("A=(1+2)=3", MULTIPLE_EQUALS),
+        ("A=((1+2)", MISMATCHED_PARENTHESES),
+        ("A=( )+(1+2)", EMPTY_PARENTHESES),
+        ("A=(1 + 2)", INVALID_CHARACTER.format(' ')),
+        ("A=(1%2)", INVALID_CHARACTER.format('%')),
+        ("A_b=(1+2)", INVALID_CHARACTER.format('_')),
+        ("A1=(1+2)", INVALID_NAME),
+        ("A=(1+2)+", ENDS_WITH_OPERATOR),
+        ("A=(1+2*)", ENDS_WITH_OPERATOR),
+        ("A=*(1+2)", STARTS_WITH_OPERATOR),
+        ("A=(2*-1)", NEGATIVE_NUMBER),
+        ("A=(1.2.3+1)", INVALID_NUMBER),
+        ("A=(.+1)", INVALID_NUMBER),
+        ("A=", EMPTY_EXPRESSION),
+        ("A=(B)", MISSING_OPERATOR),
+        ("A=1+2", EMPTY_PARENTHESES),
+    ])
+    def test_error_messages(self, line, message):
+        assert validate_line(line) == (message, False, '', '', [])
+
+    def test_first_failing_check_wins(self):
+        # Whitespace is an invalid character, but mismatched parentheses are reported first
+        assert validate_line("A = ((1+2)")[0] == MISMATCHED_PARENTHESES
+
+    def test_valid_line_returns_tokens(self):
+        message, valid, name, expr, tokens = validate_line("  Alpha=((Beta**2)+3.5)  ")
+        assert (message, valid, name, expr) == ('', True, 'Alpha', '((Beta**2)+3.5)')
+        assert tokens == list(iter_tokens(expr))
+
+    def test_tokens_feed_parser(self):
+        _, _, _, expr, tokens = validate_line("A=((2*3)+4)")
+        tree = ExpressionParser(cache_size=0).parse(expr, tokens)
+        assert tree.evaluate(context={}) == 10
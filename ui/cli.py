@@ -0,0 +1,160 @@
+"""
+Headless command-line mode (no prompts or sleeps)
+
+Every input file is loaded into its own session. Results are printed as
+one JSON object per line, one per file: its line and load counts plus the
+command's result (load and optimise give an expressions list, one entry
+per variable) or an error. Scripts can process many files in one run:
+
+    python main.py load data/dt.txt
+    python main.py eval Alpha data/*.txt
+    python main.py sort data/dt.txt --out sorted.txt
+    python main.py optimise data/dt.txt --var Alpha
+    python main.py diff Alpha Beta data/dt.txt
+
+The exit status is 1 when any file could not be processed, 0 otherwise.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from dask_core.evaluator import Evaluator
+from dask_core.expression_manager import ExpressionManager
+from features.cost_analysis import CostAnalyser
+from features.differentiation import differentiate, UnsupportedOperatorError
+
+
+def load_session(path: Path) -> tuple[ExpressionManager, dict]:
+    """
+    Load path into a new ExpressionManager and evaluate it.
+
+    :return: (manager, load_stream stats); stats['error'] is set when the
+        file is missing, holds an invalid or unparsable line, or cannot be
+        evaluated (e.g. a variable divides by one that is zero)
+    """
+    manager = ExpressionManager()
+    try:
+        with path.open(encoding="utf-8") as file:
+            stats = manager.load_stream(file)
+    except OSError as error:
+        return manager, {'lines': 0, 'loaded': 0, 'error': str(error), 'line': None}
+    if stats['error'] is None:
+        try:
+            manager.evaluate_dirty()
+        except (IndexError, ArithmeticError, RecursionError) as error:
+            # Reported like a bad line, so the remaining files still run
+            stats.update(error=f"Evaluation failed: {error}", line=None)
+    return manager, stats
+
+
+def cmd_load(manager: ExpressionManager, args) -> dict:
+    return {'expressions': [
+        {'name': name, 'expression': expr.expression, 'value': expr.value}
+        for name, expr in sorted(manager.expressions.items())
+    ]}
+
+
+def cmd_eval(manager: ExpressionManager, args) -> dict:
+    if args.var not in manager.expressions:
+        return {'name': args.var, 'error': 'Variable not found'}
+    return {'name': args.var, 'value': manager.evaluate_variable(args.var)}
+
+
+def cmd_sort(manager: ExpressionManager, args) -> dict:
+    if args.output is None:
+        manager.write_sorted(sys.stdout)
+    else:
+        manager.write_sorted(args.output)
+    return {}
+
+
+def cmd_optimise(manager: ExpressionManager, args) -> dict:
+    if args.var and args.var not in manager.expressions:
+        return {'name': args.var, 'error': 'Variable not found'}
+    results = []
+    for name in [args.var] if args.var else sorted(manager.expressions):
+        manager.optimise_expression(name)
+        parse_tree = manager.expressions[name].parse_tree
+        results.append({
+            'name': name,
+            'original': parse_tree.to_expression('original'),
+            'optimised': parse_tree.to_expression('optimised'),
+            'statistics': CostAnalyser(parse_tree).statistics,
+        })
+    return {'expressions': results}
+
+
+def cmd_diff(manager: ExpressionManager, args) -> dict:
+    result = {'name': args.var, 'wrt': args.wrt}
+    if args.var not in manager.expressions:
+        return {**result, 'error': 'Variable not found'}
+    parse_tree = manager.expressions[args.var].parse_tree
+    if parse_tree.count_x_variable(args.wrt) == 0:
+        return {**result, 'derivative': '0', 'value': 0}
+    try:
+        derivative = differentiate(parse_tree.evaluation_root(), args.wrt)
+        if derivative is None:
+            return {**result, 'error': 'Differentiation could not be completed for this expression'}
+        value = derivative.evaluate(Evaluator(iterative=True), manager.expressions)
+    except UnsupportedOperatorError as error:
+        return {**result, 'error': str(error) or 'Unsupported operator for differentiation'}
+    except (ArithmeticError, ValueError, RecursionError) as error:
+        # e.g. the derivative divides by a variable that is zero
+        return {**result, 'error': f"Evaluation failed: {error}"}
+    return {**result, 'derivative': derivative.to_expression('optimised'), 'value': value}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='main.py', description='Evaluate DASK expression files without the menu.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load = commands.add_parser('load', help='load files and print every expression with its value')
+    load.set_defaults(run=cmd_load)
+
+    evaluate = commands.add_parser('eval', help='print the value of one variable')
+    evaluate.add_argument('var')
+    evaluate.set_defaults(run=cmd_eval)
+
+    sort = commands.add_parser('sort', help='write the sorted-by-value report')
+    sort.add_argument('--out', dest='out', help='file to write the report to (default: stdout)')
+    sort.set_defaults(run=cmd_sort)
+
+    optimise = commands.add_parser('optimise', help='optimise expressions and print their cost analysis')
+    optimise.add_argument('--var', help='only this variable (default: all)')
+    optimise.set_defaults(run=cmd_optimise)
+
+    diff = commands.add_parser('diff', help='differentiate a variable with respect to another')
+    diff.add_argument('var')
+    diff.add_argument('wrt')
+    diff.set_defaults(run=cmd_diff)
+
+    for command in (load, evaluate, sort, optimise, diff):
+        command.add_argument('files', nargs='+', type=Path, metavar='FILE')
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    args.output = None
+    records = sys.stdout
+    if args.command == 'sort' and args.out is None:
+        # stdout carries the report itself
+        records = sys.stderr
+    failed = False
+    try:
+        if args.command == 'sort' and args.out is not None:
+            args.output = open(args.out, 'w', encoding="utf-8")
+        for path in args.files:
+            manager, stats = load_session(path)
+            record = {'file': str(path), 'lines': stats['lines'], 'loaded': stats['loaded']}
+            if stats['error'] is not None:
+                record.update(error=stats['error'], line=stats['line'])
+            else:
+                record.update(args.run(manager, args))
+            failed = failed or 'error' in record
+            print(json.dumps(record, default=str), file=records)
+    finally:
+        if args.output is not None:
+            args.output.close()
+    return 1 if failed else 0
@@ -24,6 +24,8 @@ class Menu:
 
         self.EM = ExpressionManager()
         self.animation_delay = 0.5
+        self.load_batch_size = 1000 # lines validated and parsed per batch when reading a file
+        self.load_workers = 1 # processes used to parse a file; 1 streams it in-process
 
         self.title_screen = '''
 *********************************************************
@@ -76,24 +78,24 @@ class Menu:
     
     def _wait_for_continue(self):
         input("Press enter key, to continue....")
-        self.EM.evaluate_all()
+        self.EM.evaluate_dirty()
 
     def add_modify(self):
         expression = input('Enter the DASK expression you want to add/modify: \nFor example, a=(1+2)\n')
-        message, result,name,expr = self.EM.validate_expression(expression)
+        message, result, name, expr, tokens = self.EM.validate_and_tokenize(expression)
         while True:
             if result == False:
                 expression = input(f'\n{message}: ')
-                message,result,name,expr = self.EM.validate_expression(expression)
+                message, result, name, expr, tokens = self.EM.validate_and_tokenize(expression)
             elif result == True:
                 try:
                     # Parse once to catch constant division by zero before storing
-                    self.EM.parser.parse(expr)
+                    parse_tree = self.EM.parser.parse(expr, tokens)
                 except ZeroDivisionError:
                     expression = input("\nDivision by zero detected. Please enter a new expression: ")
-                    message, result, name, expr = self.EM.validate_expression(expression)
+                    message, result, name, expr, tokens = self.EM.validate_and_tokenize(expression)
                     continue
-                self.EM.add_expression(name, expr)
+                self.EM.add_expression(name, expr, parse_tree)
                 break
 
     def display_current(self):
@@ -121,74 +123,39 @@ class Menu:
         print('Expression Tree:')
         expr_tree = expr.parse_tree
         expr_tree.printInOrder()
-        expr_value = expr.evaluate(context=self.EM.expressions)
+        expr_value = self.EM.evaluate_variable(var_name)
         print(f'Value for variable "{var_name}" is {expr_value}', end='\n\n')
 
     def read_from_file(self):
         file_handler = FileHandler()
 
-        file_contents = file_handler.read_file()
-        file_expressions = file_contents.split('\n')
-        
-        validity: bool = True
-        parsed_expressions = {}
-        for expression in file_expressions:
-            (err_msg, validity, name, expr) = self.EM.validate_expression(expression)
-            parsed_expressions[name] = expr
-            if not validity:
-                print(err_msg)
-                print(validity)
-                print(name)
-                print(expr)
-                break
-            try:
-                # Parse once to catch constant division by zero before storing
-                self.EM.parser.parse(expr)
-            except ZeroDivisionError:
-                print(f"Division by zero detected in expression: {expression}")
-                validity = False
-                break
+        if self.load_workers > 1:
+            stats = self.EM.load_parallel(file_handler.find_file(), self.load_workers)
+        else:
+            with file_handler.open_file() as file:
+                stats = self.EM.load_stream(file, batch_size=self.load_batch_size)
 
-        if not validity:
+        if stats['error'] is not None:
+            print(stats['error'])
+            print(stats['line'])
             print('There is an invalid expression in the file provided.\nPlease try again later.')
 
             return
 
-        for name, expr in parsed_expressions.items():
-            self.EM.add_expression(name, expr)
+        print(f"\nLoaded {stats['loaded']} expressions from {stats['lines']} lines "
+              f"({stats['lines_per_second']:,.0f} lines/s)")
         print('')
-        self.EM.evaluate_all()
+        self.EM.evaluate_dirty()
         self.display_current()
         print('\n\n')
 
     def sortexpressions(self):
-        counter = 0
-        output = ''
         if len(self.EM.expressions) < 1:
             print("There are currently no variables in this session.")
             return
-        values = []
-        for expr in self.EM.expressions.values():
-            values.append(expr.value)
-        values = [v for v in values if v is not None]
-        values = set(values)
-        values = list(values)
-        values = sorted(values, reverse=True)
-        values.append(None)
-        
-        while True: 
-            output += f'*** Expressions with value=> {values[counter]}\n'
-
-            for expr in self.EM.expressions.values():
-                if expr.value == values[counter]:
-                    output += f'{expr.name}={expr.expression}\n'
-
-            counter += 1
-            output += '\n'
-            if counter == len(values):
-                break
         file_handler = FileHandler()
-        file_handler.write_file(output)
+        with file_handler.open_output_file() as file:
+            self.EM.write_sorted(file)
         print(f'\n>>> Sorting of DASK expressions completed!\n')
 
     def request_expression(self) -> str:
@@ -291,6 +258,7 @@ class Menu:
             f"* Overall saving    : {saved_percent(total_orig, total_opt):.1f}% fewer nodes, "
             f"{saved_percent(cost_orig, cost_opt):.1f}% less op-cost"
         )
+        lines.append(f"* Shared subtrees   : {statistics.get('cse_removed_nodes', 0)} nodes removed by common subexpression elimination")
         lines.append("=" * 60)
         lines.append("Legend: Visual bar shows % saved (more filled = more reduction)")
         print("\n".join(lines))
@@ -340,7 +308,7 @@ class Menu:
         new_name = f"d{var_name}_d{wrt}"
         self.EM.add_expression(new_name, expr_str)
         print(f"Stored derivative as {new_name}={expr_str}")
-        self.EM.evaluate_all()
+        self.EM.evaluate_dirty()
 
 
         self._loading_animation("Optimising")